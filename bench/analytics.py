@@ -0,0 +1,131 @@
+"""
+===========================================================
+BENCHMARK - ATINGIMENTO DE METAS (src/analytics.py)
+===========================================================
+
+Mede o cálculo de GET /api/analytics/atingimento sem o banco: gera linhas
+sintéticas no formato da consulta (indicador, setor, mês, valor) para
+setores × indicadores × meses e compara a versão vetorizada (NumPy) com
+um laço em Python puro que faz a mesma conta série a série.
+
+Uso:
+    python -m bench.analytics                       # 50 setores x 20 indicadores x 5 anos
+    python -m bench.analytics --setores 200 --anos 5 --falhas 0.1
+    python -m bench.analytics --sem-python          # só a versão NumPy (volumes grandes)
+===========================================================
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+from datetime import date
+from statistics import median
+from time import perf_counter
+
+from src import analytics
+
+
+def gerar_linhas(setores: int, indicadores: int, meses: int, mes_de: int, falhas: float, seed: int = 42):
+    """Colunas (indicadores, setores, meses, valores) + metas; `falhas` = fração de meses sem valor."""
+    rnd = random.Random(seed)
+    cols = ([], [], [], [])
+    metas = {}
+    for s in range(1, setores + 1):
+        for k in range(indicadores):
+            ind_id = s * 1000 + k  # indicadores são por setor (ZIN_SETOR_ID)
+            metas[ind_id] = rnd.choice([None, 0.0]) if rnd.random() < 0.05 else rnd.uniform(50, 500)
+            base = rnd.uniform(10, 400)
+            for m in range(meses):
+                if rnd.random() < falhas:
+                    continue
+                cols[0].append(ind_id)
+                cols[1].append(s)
+                cols[2].append(mes_de + m)
+                cols[3].append(base * rnd.uniform(0.8, 1.2))
+    return cols, metas
+
+
+def atingimento_python(indicadores, setores, meses, valores, metas, mes_de, mes_ate, janela=3):
+    """Mesma saída de analytics.atingimento, com laços em Python (referência do benchmark)."""
+    n = mes_ate - mes_de + 1
+    grade = {}
+    for ind, setor, mes, valor in zip(indicadores, setores, meses, valores):
+        col = mes - mes_de
+        if 0 <= col < n:
+            grade.setdefault((ind, setor), [None] * n)[col] = valor
+
+    def r(v, d=2):
+        return None if v is None else round(v, d)
+
+    series = []
+    for (ind, setor) in sorted(grade):
+        linha = grade[(ind, setor)]
+        meta = metas.get(ind)
+        ating, variacao, media = [], [], []
+        for t, v in enumerate(linha):
+            ating.append(r(v / meta * 100) if v is not None and meta else None)
+            ant = linha[t - 1] if t else None
+            variacao.append(r((v - ant) / abs(ant) * 100) if v is not None and ant else None)
+            janela_vals = [x for x in linha[max(t + 1 - janela, 0):t + 1] if x is not None]
+            media.append(r(sum(janela_vals) / len(janela_vals), 4) if janela_vals else None)
+        series.append({
+            "indicador_id": ind, "setor_id": setor, "meta": r(meta, 4),
+            "valor": [r(v, 4) for v in linha], "atingimento": ating,
+            "variacao_mes": variacao, "media_movel": media,
+        })
+    return {"periodos": [analytics.month_label(m) for m in range(mes_de, mes_ate + 1)], "series": series}
+
+
+def medir(fn, repeticoes: int) -> tuple[float, object]:
+    tempos, result = [], None
+    for _ in range(repeticoes):
+        t0 = perf_counter()
+        result = fn()
+        tempos.append((perf_counter() - t0) * 1000)
+    return median(tempos), result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do cálculo de atingimento de metas")
+    parser.add_argument("--setores", type=int, default=50)
+    parser.add_argument("--indicadores", type=int, default=20, help="Indicadores por setor")
+    parser.add_argument("--anos", type=int, default=5)
+    parser.add_argument("--falhas", type=float, default=0.05, help="Fração de meses sem valor")
+    parser.add_argument("--janela", type=int, default=3)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--sem-python", action="store_true", help="Não roda a referência em Python puro")
+    args = parser.parse_args(argv)
+
+    if not analytics.available():
+        print("numpy não instalado (pip install numpy)", file=sys.stderr)
+        return 1
+
+    meses = args.anos * 12
+    mes_de = analytics.month_index(date(2020, 1, 1))
+    mes_ate = mes_de + meses - 1
+    t0 = perf_counter()
+    cols, metas = gerar_linhas(args.setores, args.indicadores, meses, mes_de, args.falhas)
+    print(f"linhas={len(cols[0])} series={args.setores * args.indicadores} meses={meses} "
+          f"(geradas em {(perf_counter() - t0) * 1000:.0f} ms)")
+
+    calc = lambda: analytics.atingimento(*cols, metas, mes_de, mes_ate, janela=args.janela)  # noqa: E731
+    ms_np, res_np = medir(calc, args.repeticoes)
+    ms_json, body = medir(lambda: json.dumps(res_np, separators=(",", ":")), args.repeticoes)
+    print(f"numpy:  calculo {ms_np:8.1f} ms | json {ms_json:7.1f} ms | {len(body) / 1024:,.0f} KiB")
+
+    if not args.sem_python:
+        ms_py, res_py = medir(
+            lambda: atingimento_python(*cols, metas, mes_de, mes_ate, janela=args.janela), args.repeticoes
+        )
+        iguais = json.dumps(res_py, sort_keys=True) == json.dumps(res_np, sort_keys=True)
+        print(f"python: calculo {ms_py:8.1f} ms | {ms_py / ms_np:.1f}x mais lento | mesma saída: {iguais}")
+        if not iguais:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+"""
+===========================================================
+BENCHMARK - MODELOS DE LINHA (src/models.py)
+===========================================================
+
+Compara, para linhas sintéticas no formato do SELECT de cada tabela, o
+dict por linha (como _rows_to_dicts / _fetch_user_by_* montavam) com os
+modelos de __slots__:
+
+- memória retida pela lista de objetos (tracemalloc);
+- tempo de construção a partir das linhas;
+- tempo de serialização da lista para JSON.
+
+Uso:
+    python -m bench.models                  # 100k linhas por modelo
+    python -m bench.models --linhas 500000 --repeticoes 5
+===========================================================
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tracemalloc
+from datetime import date, datetime
+from decimal import Decimal
+from statistics import median
+from time import perf_counter
+
+from src.models import Draft, Indicador, Setor, Usuario, Valor, json_value
+
+
+def _linha(model, i: int) -> tuple:
+    """Linha sintética com tipos parecidos com os que o pyodbc devolve."""
+    agora = datetime(2024, 5, 1, 12, 30, i % 60)
+    if model is Usuario:
+        return (i, f"Usuario {i}", f"user{i}@empresa.com", i % 50 + 1, i % 5 + 1, "$pbkdf2-sha256$29000$x", True)
+    if model is Setor:
+        return (i, f"Setor {i}", True)
+    if model is Indicador:
+        return (i, i % 50 + 1, f"IND{i:05d}", f"Indicador {i}", "numero", "%", "95", True, i % 300)
+    if model is Valor:
+        return (i, i % 1000, i % 50 + 1, i % 300, date(2024, i % 12 + 1, 1), f"{i % 997},5",
+                Decimal(f"{i % 997}.5000"), None, agora, agora, i.to_bytes(8, "big"))
+    return (i, i % 1000, i % 50 + 1, i % 300, date(2024, i % 12 + 1, 1), f"{i % 997},5",
+            Decimal(f"{i % 997}.5000"), None, "PENDENTE", agora, agora, None, None, None, None, None)
+
+
+def _como_dict(columns, rows) -> list[dict]:
+    """Mesma conversão de _rows_to_dicts (um dict por linha)."""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _memoria(fn) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn()
+        atual, _pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return atual, result
+
+
+def _tempo(fn, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = perf_counter()
+        fn()
+        tempos.append((perf_counter() - t0) * 1000)
+    return median(tempos)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de memória/tempo dos modelos de linha")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"linhas={args.linhas} por modelo (memória retida pela lista; tempos em mediana)")
+    print(f"{'modelo':<10} {'dict':>10} {'slots':>10} {'economia':>9} | "
+          f"{'new dict':>9} {'new slots':>9} | {'json dict':>9} {'json slots':>10}")
+    for model in (Usuario, Setor, Indicador, Valor, Draft):
+        rows = [_linha(model, i) for i in range(args.linhas)]
+        # só a estrutura por linha: os valores (strings, datas) são os mesmos nos dois casos
+        mem_dict, dicts = _memoria(lambda: _como_dict(model.COLUMNS, rows))
+        mem_slots, objs = _memoria(lambda: model.from_rows(rows))
+        ms_dict = _tempo(lambda: _como_dict(model.COLUMNS, rows), args.repeticoes)
+        ms_slots = _tempo(lambda: model.from_rows(rows), args.repeticoes)
+        js_dict = _tempo(lambda: json.dumps([{k: json_value(v) for k, v in d.items()} for d in dicts]),
+                         args.repeticoes)
+        js_slots = _tempo(lambda: json.dumps([o.to_json() for o in objs]), args.repeticoes)
+        print(f"{model.__name__:<10} {mem_dict / 2**20:8.1f}MB {mem_slots / 2**20:8.1f}MB "
+              f"{1 - mem_slots / mem_dict:8.0%} | {ms_dict:7.1f}ms {ms_slots:7.1f}ms | "
+              f"{js_dict:7.1f}ms {js_slots:8.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,10 @@
 import os
 
-from src.app import app
+from src.app import app, create_app
 
 if __name__ == '__main__':
     debug = (os.getenv("FLASK_DEBUG") or os.getenv("DEBUG") or "0").lower() in ("1", "true", "yes", "y")
     host = os.getenv("APP_HOST") or "127.0.0.1"
     port = int(os.getenv("APP_PORT") or "5000")
+    create_app()
     app.run(debug=debug, port=port, host=host, use_reloader=False)
@@ -0,0 +1,256 @@
+"""
+===========================================================
+MIGRAÇÕES VERSIONADAS (SQL Server)
+===========================================================
+
+`sql/schema.sql` cria a base inicial; toda alteração posterior vira um script
+numerado em `sql/migrations/NNNN_descricao.sql` (lotes separados por `GO`).
+As versões aplicadas ficam registradas em dbo.ZMG.
+
+Linhas `-- probe: nome | SELECT ...` no cabeçalho do script definem consultas
+de referência: o runner mede cada uma antes e depois de aplicar a migração
+e grava os tempos (ms) em ZMG_TEMPOS. Quando a forma da consulta muda com a
+migração (ex.: nova coluna), `-- probe-depois: nome | SELECT ...` define a
+versão medida depois.
+
+Cada migração roda em uma transação. Comandos que não podem rodar dentro de
+transação (ex.: ALTER DATABASE) exigem a linha `-- sem-transacao`: os lotes
+rodam em autocommit e só o registro em ZMG é transacional (o script precisa
+ser idempotente).
+
+Uso:
+    python -m sql.migrate                  # aplica todas as pendentes
+    python -m sql.migrate status           # lista aplicadas/pendentes
+    python -m sql.migrate up --target 1    # aplica até a versão 1
+    python -m sql.migrate up --dry-run     # só mostra o que seria aplicado
+    python -m sql.migrate up --no-probes   # não mede as consultas de referência
+===========================================================
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+_FILE_RE = re.compile(r"^(\d{4})_([\w\-]+)\.sql$")
+_GO_RE = re.compile(r"^\s*GO\s*;?\s*$", re.IGNORECASE | re.MULTILINE)
+_PROBE_RE = re.compile(r"^--\s*probe:\s*([\w\-]+)\s*\|\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+_PROBE_AFTER_RE = re.compile(r"^--\s*probe-depois:\s*([\w\-]+)\s*\|\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+_NO_TX_RE = re.compile(r"^--\s*sem-transacao\s*$", re.IGNORECASE | re.MULTILINE)
+
+PROBE_RUNS = 3
+
+_CREATE_ZMG = """
+IF OBJECT_ID('dbo.ZMG', 'U') IS NULL
+BEGIN
+    CREATE TABLE dbo.ZMG (
+        ZMG_VERSAO INT NOT NULL CONSTRAINT PK_ZMG PRIMARY KEY,
+        ZMG_NOME NVARCHAR(200) NOT NULL,
+        ZMG_CHECKSUM CHAR(64) NOT NULL,
+        ZMG_APLICADO_EM DATETIME2(0) NOT NULL CONSTRAINT DF_ZMG_APLICADO DEFAULT (SYSUTCDATETIME()),
+        ZMG_DURACAO_MS INT NOT NULL,
+        ZMG_TEMPOS NVARCHAR(MAX) NULL
+    );
+END;
+"""
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    path: Path
+    sql: str = field(repr=False)
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+    @property
+    def batches(self) -> list[str]:
+        return [b.strip() for b in _GO_RE.split(self.sql) if b.strip()]
+
+    @property
+    def transactional(self) -> bool:
+        return not _NO_TX_RE.search(self.sql)
+
+    @property
+    def probes(self) -> list[tuple[str, str, str]]:
+        """(nome, sql_antes, sql_depois) de cada consulta de referência."""
+        after = {m.group(1): m.group(2).strip() for m in _PROBE_AFTER_RE.finditer(self.sql)}
+        return [
+            (m.group(1), m.group(2).strip(), after.get(m.group(1), m.group(2).strip()))
+            for m in _PROBE_RE.finditer(self.sql)
+        ]
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    items = []
+    seen = set()
+    for path in sorted(directory.glob("*.sql")):
+        m = _FILE_RE.match(path.name)
+        if not m:
+            raise RuntimeError(f"Nome de migração inválido: {path.name} (use NNNN_descricao.sql)")
+        version = int(m.group(1))
+        if version in seen:
+            raise RuntimeError(f"Versão de migração duplicada: {version}")
+        seen.add(version)
+        items.append(Migration(version, m.group(2), path, path.read_text(encoding="utf-8-sig")))
+    return items
+
+
+def _ensure_version_table(conn):
+    cur = conn.cursor()
+    cur.execute(_CREATE_ZMG)
+    conn.commit()
+
+
+def applied_versions(conn) -> dict[int, str]:
+    cur = conn.cursor()
+    cur.execute("SELECT ZMG_VERSAO, ZMG_CHECKSUM FROM ZMG ORDER BY ZMG_VERSAO")
+    return {int(r[0]): (r[1] or "").strip() for r in cur.fetchall()}
+
+
+def _time_probe(conn, sql: str) -> float | None:
+    """Melhor tempo (ms) entre PROBE_RUNS execuções; None se a consulta falhar."""
+    cur = conn.cursor()
+    best = None
+    try:
+        for _ in range(PROBE_RUNS):
+            start = perf_counter()
+            cur.execute(sql)
+            cur.fetchall()
+            elapsed = (perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+    except Exception as e:
+        print(f"    probe falhou: {e}")
+        conn.rollback()
+        return None
+    conn.commit()
+    return round(best, 2)
+
+
+def apply_migration(conn, mig: Migration, probes: bool = True) -> dict:
+    timings = {}
+    if probes:
+        for name, sql_before, _ in mig.probes:
+            timings[name] = {"antes_ms": _time_probe(conn, sql_before)}
+
+    cur = conn.cursor()
+    start = perf_counter()
+    try:
+        conn.autocommit = not mig.transactional
+        try:
+            for batch in mig.batches:
+                cur.execute(batch)
+                while cur.nextset():
+                    pass
+        finally:
+            conn.autocommit = False
+        duration_ms = int((perf_counter() - start) * 1000)
+        cur.execute(
+            "INSERT INTO ZMG (ZMG_VERSAO, ZMG_NOME, ZMG_CHECKSUM, ZMG_DURACAO_MS) VALUES (?, ?, ?, ?)",
+            (mig.version, mig.name, mig.checksum, duration_ms)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if probes and timings:
+        for name, _, sql_after in mig.probes:
+            timings[name]["depois_ms"] = _time_probe(conn, sql_after)
+        cur.execute(
+            "UPDATE ZMG SET ZMG_TEMPOS = ? WHERE ZMG_VERSAO = ?",
+            (json.dumps(timings, ensure_ascii=False), mig.version)
+        )
+        conn.commit()
+
+    return {"duracao_ms": duration_ms, "tempos": timings}
+
+
+def _print_timings(timings: dict):
+    for name, t in timings.items():
+        before, after = t.get("antes_ms"), t.get("depois_ms")
+        print(f"    {name:<32} antes={before} ms  depois={after} ms")
+
+
+def cmd_status(conn, migrations: list[Migration]) -> int:
+    applied = applied_versions(conn)
+    for mig in migrations:
+        if mig.version in applied:
+            flag = "aplicada"
+            if applied[mig.version] != mig.checksum:
+                flag = "aplicada (ALTERADA desde a aplicação!)"
+        else:
+            flag = "pendente"
+        print(f"{mig.version:04d} {mig.name:<40} {flag}")
+    return 0
+
+
+def cmd_up(conn, migrations: list[Migration], target: int | None, dry_run: bool, probes: bool) -> int:
+    applied = applied_versions(conn)
+    for mig in migrations:
+        if mig.version in applied and applied[mig.version] != mig.checksum:
+            print(f"AVISO: migração {mig.version:04d} foi alterada depois de aplicada")
+
+    pending = [
+        m for m in migrations
+        if m.version not in applied and (target is None or m.version <= target)
+    ]
+    if not pending:
+        print("Nenhuma migração pendente.")
+        return 0
+
+    for mig in pending:
+        if dry_run:
+            no_tx = "" if mig.transactional else ", sem transação"
+            print(f"[dry-run] {mig.version:04d} {mig.name} ({len(mig.batches)} lotes, {len(mig.probes)} probes{no_tx})")
+            continue
+        print(f"Aplicando {mig.version:04d} {mig.name} ...")
+        result = apply_migration(conn, mig, probes=probes)
+        print(f"  ok em {result['duracao_ms']} ms")
+        _print_timings(result["tempos"])
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sql.migrate", description="Migrações versionadas do banco")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("status", help="lista migrações aplicadas/pendentes")
+    up = sub.add_parser("up", help="aplica migrações pendentes (padrão)")
+    up.add_argument("--target", type=int, default=None, help="aplica até esta versão")
+    up.add_argument("--dry-run", action="store_true", help="só mostra o que seria aplicado")
+    up.add_argument("--no-probes", action="store_true", help="não mede as consultas de referência")
+    args = parser.parse_args(argv)
+
+    # mesma configuração de conexão (.env / SQL_*) usada pelo app
+    from src.app import get_db_connection
+
+    migrations = load_migrations()
+    conn = get_db_connection()
+    try:
+        _ensure_version_table(conn)
+        if args.command == "status":
+            return cmd_status(conn, migrations)
+        return cmd_up(
+            conn,
+            migrations,
+            target=getattr(args, "target", None),
+            dry_run=getattr(args, "dry_run", False),
+            probes=not getattr(args, "no_probes", False),
+        )
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
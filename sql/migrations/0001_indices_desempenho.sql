@@ -0,0 +1,80 @@
+/* ============================================================
+   0001 - ÍNDICES PARA AS CONSULTAS QUENTES DO app.py
+   ============================================================ */
+-- probe: drafts_pendentes_todos | SELECT d.ZDR_ID, d.ZDR_INDICADOR_ID, i.ZIN_NOME, d.ZDR_SETOR_ID, s.ZSE_NOME, d.ZDR_FUNCIONARIO_ID, f.ZFU_NOME, d.ZDR_PERIODO, d.ZDR_VALOR, d.ZDR_STATUS, d.ZDR_CRIADO_EM FROM ZDR d INNER JOIN ZIN i ON i.ZIN_ID = d.ZDR_INDICADOR_ID INNER JOIN ZSE s ON s.ZSE_ID = d.ZDR_SETOR_ID LEFT JOIN ZFU f ON f.ZFU_ID = d.ZDR_FUNCIONARIO_ID WHERE d.ZDR_STATUS = 'PENDING' ORDER BY d.ZDR_CRIADO_EM DESC
+-- probe: drafts_pendentes_setor | SELECT d.ZDR_ID, d.ZDR_INDICADOR_ID, d.ZDR_PERIODO, d.ZDR_VALOR, d.ZDR_CRIADO_EM FROM ZDR d WHERE d.ZDR_STATUS = 'PENDING' AND d.ZDR_SETOR_ID = (SELECT MIN(ZSE_ID) FROM ZSE) ORDER BY d.ZDR_CRIADO_EM DESC
+-- probe: drafts_rejeitados_func | SELECT d.ZDR_ID, d.ZDR_INDICADOR_ID, d.ZDR_SETOR_ID, d.ZDR_PERIODO, d.ZDR_REJEITADO_MOTIVO, d.ZDR_REJEITADO_EM FROM ZDR d WHERE d.ZDR_STATUS = 'REJECTED' AND d.ZDR_FUNCIONARIO_ID = (SELECT MIN(ZFU_ID) FROM ZFU) ORDER BY d.ZDR_REJEITADO_EM DESC
+-- probe: setores_atribuidos | SELECT DISTINCT ZIN_SETOR_ID FROM ZIN WHERE ZIN_ATIVO = 1 AND ZIN_RESPONSAVEL_ID = (SELECT MIN(ZFU_ID) FROM ZFU)
+-- probe: valores_setor_periodo | SELECT ZIV_ID, ZIV_INDICADOR_ID, ZIV_SETOR_ID, ZIV_FUNCIONARIO_ID, ZIV_PERIODO, ZIV_VALOR, ZIV_CRIADO_EM, ZIV_ATUALIZADO_EM FROM ZIV WHERE ZIV_SETOR_ID = (SELECT MIN(ZSE_ID) FROM ZSE) AND ZIV_PERIODO = (SELECT MAX(ZIV_PERIODO) FROM ZIV) ORDER BY ZIV_INDICADOR_ID
+-- probe: funcionarios_setor | SELECT ZFU_ID, ZFU_NOME, ZFU_EMAIL, ZFU_SETOR_ID, ZFU_NIVEL, ZFU_ATIVO FROM ZFU WHERE ZFU_SETOR_ID = (SELECT MIN(ZSE_ID) FROM ZSE) AND ZFU_ATIVO = 1 ORDER BY ZFU_NOME
+
+-- api_listar_drafts_pendentes / api_approve_drafts: fila PENDING (com ou sem setor),
+-- ordenada por ZDR_CRIADO_EM. Índice filtrado: só contém as linhas pendentes.
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZDR_PENDENTES'
+)
+BEGIN
+    CREATE INDEX IX_ZDR_PENDENTES
+    ON dbo.ZDR (ZDR_SETOR_ID, ZDR_CRIADO_EM DESC)
+    INCLUDE (ZDR_INDICADOR_ID, ZDR_FUNCIONARIO_ID, ZDR_PERIODO, ZDR_VALOR, ZDR_STATUS)
+    WHERE ZDR_STATUS = 'PENDING';
+END;
+GO
+
+-- api_listar_drafts_rejeitados (ZDR_FUNCIONARIO_ID + ZDR_STATUS) e
+-- api_listar_drafts do editor (ZDR_FUNCIONARIO_ID).
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZDR_FUNCIONARIO_STATUS'
+)
+BEGIN
+    CREATE INDEX IX_ZDR_FUNCIONARIO_STATUS
+    ON dbo.ZDR (ZDR_FUNCIONARIO_ID, ZDR_STATUS, ZDR_REJEITADO_EM DESC)
+    INCLUDE (ZDR_INDICADOR_ID, ZDR_SETOR_ID, ZDR_PERIODO, ZDR_REJEITADO_MOTIVO);
+END;
+GO
+
+-- Setor/período/status (submit, approve, listagem por setor): um índice só,
+-- cobrindo as colunas lidas, no lugar do par IX_ZDR_SETOR_PERIODO_STATUS + IX_ZDR_SETOR_PERIODO.
+CREATE INDEX IX_ZDR_SETOR_PERIODO_STATUS
+ON dbo.ZDR (ZDR_SETOR_ID, ZDR_PERIODO, ZDR_STATUS)
+INCLUDE (ZDR_INDICADOR_ID, ZDR_FUNCIONARIO_ID, ZDR_VALOR, ZDR_CRIADO_EM)
+WITH (DROP_EXISTING = ON);
+GO
+
+IF EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZDR_SETOR_PERIODO' AND object_id = OBJECT_ID('dbo.ZDR')
+)
+BEGIN
+    DROP INDEX IX_ZDR_SETOR_PERIODO ON dbo.ZDR;
+END;
+GO
+
+-- _get_assigned_sector_ids / api_indicadores (filtro por responsável).
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZIN_RESPONSAVEL'
+)
+BEGIN
+    CREATE INDEX IX_ZIN_RESPONSAVEL
+    ON dbo.ZIN (ZIN_RESPONSAVEL_ID, ZIN_SETOR_ID)
+    WHERE ZIN_ATIVO = 1 AND ZIN_RESPONSAVEL_ID IS NOT NULL;
+END;
+GO
+
+-- api_listar_valores: cobre todas as colunas retornadas (evita key lookup por linha).
+CREATE INDEX IX_ZIV_SETOR_PERIODO
+ON dbo.ZIV (ZIV_SETOR_ID, ZIV_PERIODO)
+INCLUDE (ZIV_INDICADOR_ID, ZIV_VALOR, ZIV_FUNCIONARIO_ID, ZIV_CRIADO_EM, ZIV_ATUALIZADO_EM)
+WITH (DROP_EXISTING = ON);
+GO
+
+-- api_gestor_funcionarios: funcionários ativos do setor, ordenados por nome.
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZFU_SETOR_ATIVO'
+)
+BEGIN
+    CREATE INDEX IX_ZFU_SETOR_ATIVO
+    ON dbo.ZFU (ZFU_SETOR_ID, ZFU_NOME)
+    INCLUDE (ZFU_EMAIL, ZFU_NIVEL)
+    WHERE ZFU_ATIVO = 1;
+END;
+GO
@@ -0,0 +1,47 @@
+/* ============================================================
+   0002 - LOOKUP NORMALIZADO (EMAIL / NOME DO SETOR)
+   LOWER(coluna) = LOWER(?) não usa UX_ZFU_EMAIL / UX_ZSE_NOME.
+   Colunas computadas persistidas com a forma normalizada + índice único
+   permitem seek direto com o valor já normalizado pelo app.
+   ============================================================ */
+-- probe: login_por_email | SELECT ZFU_ID, ZFU_NOME, ZFU_EMAIL, ZFU_SETOR_ID, ZFU_NIVEL, ZFU_SENHA_HASH, ZFU_ATIVO FROM ZFU WHERE LOWER(ZFU_EMAIL) = LOWER((SELECT MAX(ZFU_EMAIL) FROM ZFU))
+-- probe-depois: login_por_email | SELECT ZFU_ID, ZFU_NOME, ZFU_EMAIL, ZFU_SETOR_ID, ZFU_NIVEL, ZFU_SENHA_HASH, ZFU_ATIVO FROM ZFU WHERE ZFU_EMAIL_NORM = (SELECT MAX(ZFU_EMAIL_NORM) FROM ZFU)
+-- probe: setor_por_nome | SELECT ZSE_ID FROM ZSE WHERE LOWER(ZSE_NOME) = LOWER((SELECT MAX(ZSE_NOME) FROM ZSE))
+-- probe-depois: setor_por_nome | SELECT ZSE_ID FROM ZSE WHERE ZSE_NOME_NORM = (SELECT MAX(ZSE_NOME_NORM) FROM ZSE)
+
+IF COL_LENGTH('dbo.ZFU', 'ZFU_EMAIL_NORM') IS NULL
+BEGIN
+    ALTER TABLE dbo.ZFU ADD ZFU_EMAIL_NORM AS LOWER(LTRIM(RTRIM(ZFU_EMAIL))) PERSISTED;
+END;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'UX_ZFU_EMAIL_NORM'
+)
+BEGIN
+    CREATE UNIQUE INDEX UX_ZFU_EMAIL_NORM
+    ON dbo.ZFU (ZFU_EMAIL_NORM)
+    INCLUDE (ZFU_NOME, ZFU_EMAIL, ZFU_SETOR_ID, ZFU_NIVEL, ZFU_SENHA_HASH, ZFU_ATIVO);
+END;
+GO
+
+IF COL_LENGTH('dbo.ZSE', 'ZSE_NOME_NORM') IS NULL
+BEGIN
+    ALTER TABLE dbo.ZSE ADD ZSE_NOME_NORM AS LOWER(LTRIM(RTRIM(ZSE_NOME))) PERSISTED;
+END;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'UX_ZSE_NOME_NORM'
+)
+BEGIN
+    CREATE UNIQUE INDEX UX_ZSE_NOME_NORM
+    ON dbo.ZSE (ZSE_NOME_NORM);
+END;
+GO
+
+-- Emails gravados daqui em diante já chegam normalizados; alinha os antigos.
+UPDATE dbo.ZFU
+SET ZFU_EMAIL = LOWER(LTRIM(RTRIM(ZFU_EMAIL)))
+WHERE ZFU_EMAIL <> LOWER(LTRIM(RTRIM(ZFU_EMAIL))) COLLATE Latin1_General_BIN2;
+GO
@@ -0,0 +1,51 @@
+/* ============================================================
+   0003 - JOBS EM SEGUNDO PLANO (ZJB)
+   Estado, progresso e resultado das operações longas (importação,
+   arquivamento, aprovações em massa) executadas fora da requisição.
+   O app consulta por id (PK), lista por usuário e limpa os finalizados
+   antigos por status + data de término.
+   ============================================================ */
+
+IF OBJECT_ID('dbo.ZJB', 'U') IS NULL
+BEGIN
+    CREATE TABLE dbo.ZJB (
+        ZJB_ID CHAR(32) NOT NULL CONSTRAINT PK_ZJB PRIMARY KEY,
+        ZJB_TIPO NVARCHAR(50) NOT NULL,
+        ZJB_STATUS NVARCHAR(20) NOT NULL,          -- QUEUED, RUNNING, DONE, FAILED, CANCELED
+        ZJB_FUNCIONARIO_ID INT NULL,
+        ZJB_PARAMS NVARCHAR(MAX) NULL,             -- JSON
+        ZJB_PROGRESSO TINYINT NULL,                -- 0..100 (NULL = indeterminado)
+        ZJB_MENSAGEM NVARCHAR(400) NULL,
+        ZJB_RESULTADO NVARCHAR(MAX) NULL,          -- JSON
+        ZJB_ERRO NVARCHAR(1000) NULL,
+        ZJB_CANCELAR BIT NOT NULL CONSTRAINT DF_ZJB_CANCELAR DEFAULT (0),
+        ZJB_WORKER NVARCHAR(100) NULL,             -- host:pid que executa
+        ZJB_CRIADO_EM DATETIME2(0) NOT NULL CONSTRAINT DF_ZJB_CRIADO DEFAULT (SYSUTCDATETIME()),
+        ZJB_INICIADO_EM DATETIME2(0) NULL,
+        ZJB_ATUALIZADO_EM DATETIME2(0) NULL,
+        ZJB_FINALIZADO_EM DATETIME2(0) NULL,
+        CONSTRAINT FK_ZJB_ZFU FOREIGN KEY (ZJB_FUNCIONARIO_ID) REFERENCES dbo.ZFU(ZFU_ID),
+        CONSTRAINT CK_ZJB_STATUS CHECK (ZJB_STATUS IN ('QUEUED','RUNNING','DONE','FAILED','CANCELED'))
+    );
+END;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZJB_FUNCIONARIO' AND object_id = OBJECT_ID('dbo.ZJB')
+)
+BEGIN
+    CREATE INDEX IX_ZJB_FUNCIONARIO
+    ON dbo.ZJB (ZJB_FUNCIONARIO_ID, ZJB_CRIADO_EM DESC)
+    INCLUDE (ZJB_TIPO, ZJB_STATUS, ZJB_PROGRESSO);
+END;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZJB_STATUS_FINALIZADO' AND object_id = OBJECT_ID('dbo.ZJB')
+)
+BEGIN
+    CREATE INDEX IX_ZJB_STATUS_FINALIZADO
+    ON dbo.ZJB (ZJB_STATUS, ZJB_FINALIZADO_EM)
+    INCLUDE (ZJB_ATUALIZADO_EM);
+END;
+GO
@@ -0,0 +1,37 @@
+/* ============================================================
+   0004 - CONCORRÊNCIA (SNAPSHOT + ROWVERSION)
+   - READ_COMMITTED_SNAPSHOT: leituras em READ COMMITTED usam versões de
+     linha e não bloqueiam (nem são bloqueadas por) aprovações em andamento.
+     Exige que nenhuma outra sessão esteja usando o banco no momento
+     (WITH ROLLBACK IMMEDIATE encerra transações abertas): aplicar em janela
+     de manutenção, com o app parado.
+   - ALLOW_SNAPSHOT_ISOLATION: permite SET TRANSACTION ISOLATION LEVEL SNAPSHOT
+     em relatórios/consultas longas.
+   - ZIV_VERSAO / ZDR_VERSAO (rowversion): concorrência otimista no app
+     (UPDATE ... WHERE VERSAO = ? -> 409 se outro usuário alterou antes).
+   ============================================================ */
+-- sem-transacao
+
+IF (SELECT snapshot_isolation_state FROM sys.databases WHERE database_id = DB_ID()) = 0
+BEGIN
+    ALTER DATABASE CURRENT SET ALLOW_SNAPSHOT_ISOLATION ON;
+END;
+GO
+
+IF (SELECT is_read_committed_snapshot_on FROM sys.databases WHERE database_id = DB_ID()) = 0
+BEGIN
+    ALTER DATABASE CURRENT SET READ_COMMITTED_SNAPSHOT ON WITH ROLLBACK IMMEDIATE;
+END;
+GO
+
+IF COL_LENGTH('dbo.ZIV', 'ZIV_VERSAO') IS NULL
+BEGIN
+    ALTER TABLE dbo.ZIV ADD ZIV_VERSAO ROWVERSION;
+END;
+GO
+
+IF COL_LENGTH('dbo.ZDR', 'ZDR_VERSAO') IS NULL
+BEGIN
+    ALTER TABLE dbo.ZDR ADD ZDR_VERSAO ROWVERSION;
+END;
+GO
@@ -0,0 +1,45 @@
+/* ============================================================
+   0005 - VALORES TIPADOS
+   - *_VALOR_NUM (DECIMAL) e *_VALOR_DATA (DATE) ao lado do texto em
+     ZIV, ZDR e ZDH; o app preenche na gravação conforme ZIN_UNIDADE.
+   - Linhas antigas: `flask backfill-valores` (ou job backfill-valores),
+     em lotes, depois de aplicar esta migração.
+   - IX_ZIV_INDICADOR_PERIODO_NUM: séries/agregações por indicador e
+     período lendo só o índice; IX_ZIV_INDICADOR_NUM: filtros por faixa
+     de valor.
+   ============================================================ */
+
+IF COL_LENGTH('dbo.ZIV', 'ZIV_VALOR_NUM') IS NULL
+BEGIN
+    ALTER TABLE dbo.ZIV ADD ZIV_VALOR_NUM DECIMAL(19,4) NULL, ZIV_VALOR_DATA DATE NULL;
+END;
+GO
+
+IF COL_LENGTH('dbo.ZDR', 'ZDR_VALOR_NUM') IS NULL
+BEGIN
+    ALTER TABLE dbo.ZDR ADD ZDR_VALOR_NUM DECIMAL(19,4) NULL, ZDR_VALOR_DATA DATE NULL;
+END;
+GO
+
+IF COL_LENGTH('dbo.ZDH', 'ZDH_VALOR_NUM') IS NULL
+BEGIN
+    ALTER TABLE dbo.ZDH ADD ZDH_VALOR_NUM DECIMAL(19,4) NULL, ZDH_VALOR_DATA DATE NULL;
+END;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_ZIV_INDICADOR_PERIODO_NUM' AND object_id = OBJECT_ID('dbo.ZIV'))
+BEGIN
+    CREATE INDEX IX_ZIV_INDICADOR_PERIODO_NUM
+    ON dbo.ZIV (ZIV_INDICADOR_ID, ZIV_PERIODO)
+    INCLUDE (ZIV_SETOR_ID, ZIV_VALOR_NUM);
+END;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_ZIV_INDICADOR_NUM' AND object_id = OBJECT_ID('dbo.ZIV'))
+BEGIN
+    CREATE INDEX IX_ZIV_INDICADOR_NUM
+    ON dbo.ZIV (ZIV_INDICADOR_ID, ZIV_VALOR_NUM)
+    INCLUDE (ZIV_SETOR_ID, ZIV_PERIODO)
+    WHERE ZIV_VALOR_NUM IS NOT NULL;
+END;
+GO
@@ -0,0 +1,33 @@
+/* ============================================================
+   0006 - CHAVES DE IDEMPOTÊNCIA (ZIK)
+   Primeira resposta de cada Idempotency-Key (por usuário) das
+   gravações de drafts/valores e aprovações; repetições recebem a
+   mesma resposta sem executar de novo. O app apaga as expiradas
+   (ZIK_EXPIRA_EM) em lotes.
+   ============================================================ */
+
+IF OBJECT_ID('dbo.ZIK', 'U') IS NULL
+BEGIN
+    CREATE TABLE dbo.ZIK (
+        ZIK_FUNCIONARIO_ID INT NOT NULL,
+        ZIK_CHAVE NVARCHAR(100) NOT NULL,
+        ZIK_ROTA NVARCHAR(100) NOT NULL,
+        ZIK_HASH CHAR(64) NOT NULL,                -- sha256 de método + rota + corpo
+        ZIK_STATUS NVARCHAR(20) NOT NULL,          -- PROCESSING, DONE
+        ZIK_HTTP_STATUS SMALLINT NULL,
+        ZIK_RESPOSTA NVARCHAR(MAX) NULL,           -- JSON devolvido na primeira execução
+        ZIK_CRIADO_EM DATETIME2(0) NOT NULL CONSTRAINT DF_ZIK_CRIADO DEFAULT (SYSUTCDATETIME()),
+        ZIK_EXPIRA_EM DATETIME2(0) NOT NULL,
+        CONSTRAINT PK_ZIK PRIMARY KEY (ZIK_FUNCIONARIO_ID, ZIK_CHAVE),
+        CONSTRAINT CK_ZIK_STATUS CHECK (ZIK_STATUS IN ('PROCESSING','DONE'))
+    );
+END;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZIK_EXPIRA' AND object_id = OBJECT_ID('dbo.ZIK')
+)
+BEGIN
+    CREATE INDEX IX_ZIK_EXPIRA ON dbo.ZIK (ZIK_EXPIRA_EM);
+END;
+GO
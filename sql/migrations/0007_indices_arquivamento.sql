@@ -0,0 +1,40 @@
+/* ============================================================
+   0007 - ÍNDICES DO ARQUIVAMENTO (ZDR -> ZDH)
+   archive_old_drafts filtra por status + data de resolução da
+   própria coluna (ZDR_APROVADO_EM / ZDR_REJEITADO_EM; ZDR_CRIADO_EM
+   para linhas antigas sem as duas). Um índice filtrado por ramo do
+   OR: o COUNT e cada DELETE TOP leem só as linhas elegíveis, em vez
+   de varrer a ZDR inteira.
+   ============================================================ */
+-- probe: arquivamento_candidatos | SELECT COUNT(1) FROM ZDR WHERE (ZDR_STATUS = 'APPROVED' AND ZDR_APROVADO_EM < DATEADD(DAY, -365, SYSUTCDATETIME())) OR (ZDR_STATUS = 'REJECTED' AND ZDR_REJEITADO_EM < DATEADD(DAY, -365, SYSUTCDATETIME())) OR (ZDR_STATUS IN ('APPROVED','REJECTED') AND ZDR_APROVADO_EM IS NULL AND ZDR_REJEITADO_EM IS NULL AND ZDR_CRIADO_EM < DATEADD(DAY, -365, SYSUTCDATETIME()))
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZDR_APROVADO_EM' AND object_id = OBJECT_ID('dbo.ZDR')
+)
+BEGIN
+    CREATE INDEX IX_ZDR_APROVADO_EM
+    ON dbo.ZDR (ZDR_APROVADO_EM)
+    WHERE ZDR_STATUS = 'APPROVED';
+END;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZDR_REJEITADO_EM' AND object_id = OBJECT_ID('dbo.ZDR')
+)
+BEGIN
+    CREATE INDEX IX_ZDR_REJEITADO_EM
+    ON dbo.ZDR (ZDR_REJEITADO_EM)
+    WHERE ZDR_STATUS = 'REJECTED';
+END;
+GO
+
+-- linhas resolvidas antes de ZDR_APROVADO_EM/ZDR_REJEITADO_EM existirem
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZDR_RESOLVIDO_SEM_DATA' AND object_id = OBJECT_ID('dbo.ZDR')
+)
+BEGIN
+    CREATE INDEX IX_ZDR_RESOLVIDO_SEM_DATA
+    ON dbo.ZDR (ZDR_CRIADO_EM)
+    WHERE ZDR_STATUS IN ('APPROVED','REJECTED') AND ZDR_APROVADO_EM IS NULL AND ZDR_REJEITADO_EM IS NULL;
+END;
+GO
@@ -1,5 +1,6 @@
 /* ============================================================
    CRIAÇÃO DO BANCO
+   Alterações posteriores ficam em sql/migrations (python -m sql.migrate)
    ============================================================ */
 CREATE DATABASE PRD_WEB_APP;
 GO
@@ -128,6 +129,38 @@ ON dbo.ZDR (ZDR_SETOR_ID, ZDR_PERIODO)
 INCLUDE (ZDR_INDICADOR_ID, ZDR_VALOR, ZDR_CRIADO_EM);
 GO
 
+/* ============================================================
+   ZDH - HISTÓRICO DE DRAFTS (ARQUIVO)
+   Recebe linhas APPROVED/REJECTED antigas de ZDR (job de arquivamento)
+   ============================================================ */
+CREATE TABLE dbo.ZDH (
+    ZDH_ID BIGINT NOT NULL CONSTRAINT PK_ZDH PRIMARY KEY, -- mesmo ZDR_ID de origem
+    ZDH_INDICADOR_ID INT NOT NULL,
+    ZDH_SETOR_ID INT NOT NULL,
+    ZDH_FUNCIONARIO_ID INT NULL,
+    ZDH_PERIODO DATE NOT NULL,
+    ZDH_VALOR NVARCHAR(200) NULL,
+    ZDH_STATUS NVARCHAR(20) NOT NULL,
+    ZDH_CRIADO_EM DATETIME2(0) NOT NULL,
+    ZDH_ENVIADO_EM DATETIME2(0) NULL,
+    ZDH_APROVADO_EM DATETIME2(0) NULL,
+    ZDH_APROVADO_POR INT NULL,
+    ZDH_REJEITADO_EM DATETIME2(0) NULL,
+    ZDH_REJEITADO_POR INT NULL,
+    ZDH_REJEITADO_MOTIVO NVARCHAR(500) NULL,
+    ZDH_ARQUIVADO_EM DATETIME2(0) NOT NULL CONSTRAINT DF_ZDH_ARQUIVADO DEFAULT (SYSUTCDATETIME())
+);
+GO
+
+CREATE INDEX IX_ZDH_SETOR_PERIODO
+ON dbo.ZDH (ZDH_SETOR_ID, ZDH_PERIODO)
+INCLUDE (ZDH_INDICADOR_ID, ZDH_STATUS);
+GO
+
+CREATE INDEX IX_ZDH_FUNCIONARIO_STATUS
+ON dbo.ZDH (ZDH_FUNCIONARIO_ID, ZDH_STATUS);
+GO
+
 
 -- Usuário ADM inicial é criado automaticamente pelo app.py se não existir (SEED_ADMIN_EMAIL/SEED_ADMIN_PASSWORD no .env)
 
@@ -281,6 +314,49 @@ BEGIN
     INCLUDE (ZDR_INDICADOR_ID, ZDR_VALOR, ZDR_CRIADO_EM);
 END;
 GO
+
+-- ZDH (histórico de drafts arquivados)
+IF OBJECT_ID('dbo.ZDH', 'U') IS NULL
+BEGIN
+    CREATE TABLE dbo.ZDH (
+        ZDH_ID BIGINT NOT NULL CONSTRAINT PK_ZDH PRIMARY KEY,
+        ZDH_INDICADOR_ID INT NOT NULL,
+        ZDH_SETOR_ID INT NOT NULL,
+        ZDH_FUNCIONARIO_ID INT NULL,
+        ZDH_PERIODO DATE NOT NULL,
+        ZDH_VALOR NVARCHAR(200) NULL,
+        ZDH_STATUS NVARCHAR(20) NOT NULL,
+        ZDH_CRIADO_EM DATETIME2(0) NOT NULL,
+        ZDH_ENVIADO_EM DATETIME2(0) NULL,
+        ZDH_APROVADO_EM DATETIME2(0) NULL,
+        ZDH_APROVADO_POR INT NULL,
+        ZDH_REJEITADO_EM DATETIME2(0) NULL,
+        ZDH_REJEITADO_POR INT NULL,
+        ZDH_REJEITADO_MOTIVO NVARCHAR(500) NULL,
+        ZDH_ARQUIVADO_EM DATETIME2(0) NOT NULL CONSTRAINT DF_ZDH_ARQUIVADO DEFAULT (SYSUTCDATETIME())
+    );
+END;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZDH_SETOR_PERIODO'
+)
+BEGIN
+    CREATE INDEX IX_ZDH_SETOR_PERIODO
+    ON dbo.ZDH (ZDH_SETOR_ID, ZDH_PERIODO)
+    INCLUDE (ZDH_INDICADOR_ID, ZDH_STATUS);
+END;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes WHERE name = 'IX_ZDH_FUNCIONARIO_STATUS'
+)
+BEGIN
+    CREATE INDEX IX_ZDH_FUNCIONARIO_STATUS
+    ON dbo.ZDH (ZDH_FUNCIONARIO_ID, ZDH_STATUS);
+END;
+GO
+
 IF COL_LENGTH('dbo.ZIN', 'ZIN_RESPONSAVEL_ID') IS NULL
 BEGIN
     ALTER TABLE dbo.ZIN ADD ZIN_RESPONSAVEL_ID INT NULL;
@@ -0,0 +1,121 @@
+"""
+===========================================================
+ANÁLISE DE ATINGIMENTO DE METAS (NumPy)
+===========================================================
+
+Compara os valores definitivos (ZIV_VALOR_NUM) com a meta do indicador
+(ZIN_META) por série indicador × setor, em uma grade mensal densa:
+
+- atingimento: valor / meta * 100;
+- variacao_mes: variação percentual sobre o mês anterior;
+- media_movel: média dos últimos `janela` meses com valor.
+
+Tudo é calculado em arrays (sem laço por linha/série): o app passa as
+colunas da consulta já como sequências e recebe listas prontas para JSON
+(NaN -> null). Meses sem valor ficam null e não entram na média móvel.
+
+O numpy é opcional: sem ele, `available()` é False e a rota responde 503.
+A consulta fica na rota GET /api/analytics/atingimento.
+===========================================================
+"""
+
+from __future__ import annotations
+
+from datetime import date
+
+try:  # opcional: pip install numpy
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+
+def available() -> bool:
+    return np is not None
+
+
+def month_index(d: date) -> int:
+    """Mês absoluto (ano * 12 + mês - 1): aritmética de meses com inteiros."""
+    return d.year * 12 + d.month - 1
+
+
+def month_label(idx: int) -> str:
+    return f"{idx // 12:04d}-{idx % 12 + 1:02d}"
+
+
+def _rolling_mean(m, janela: int):
+    """Média móvel por linha ignorando NaN (min. 1 valor na janela)."""
+    present = ~np.isnan(m)
+    values = np.where(present, m, 0.0)
+    pad = np.zeros((m.shape[0], 1))
+    csum = np.concatenate([pad, np.cumsum(values, axis=1)], axis=1)
+    ccount = np.concatenate([pad, np.cumsum(present, axis=1)], axis=1)
+    start = np.maximum(np.arange(m.shape[1]) + 1 - janela, 0)
+    end = np.arange(1, m.shape[1] + 1)
+    total = csum[:, end] - csum[:, start]
+    count = ccount[:, end] - ccount[:, start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def _to_json(a, decimals: int = 2) -> list:
+    """ndarray -> lista (por linha) com NaN/inf como None."""
+    rounded = np.round(a, decimals)
+    out = rounded.astype(object)
+    out[~np.isfinite(rounded)] = None
+    return out.tolist()
+
+
+def atingimento(indicadores, setores, meses, valores, metas, mes_de: int, mes_ate: int, janela: int = 3) -> dict:
+    """
+    indicadores/setores/meses/valores: colunas alinhadas (uma posição por linha de ZIV);
+    meses em month_index(); metas: {indicador_id: meta (float) ou None}.
+    Devolve {"periodos": [...], "series": [{indicador_id, setor_id, meta, valor, atingimento,
+    variacao_mes, media_movel}]} com uma posição por mês de mes_de a mes_ate.
+    """
+    n_meses = mes_ate - mes_de + 1
+    periodos = [month_label(m) for m in range(mes_de, mes_ate + 1)]
+    ind = np.asarray(indicadores, dtype=np.int64)
+    if ind.size == 0 or n_meses <= 0:
+        return {"periodos": periodos, "series": []}
+
+    setor = np.asarray(setores, dtype=np.int64)
+    col = np.asarray(meses, dtype=np.int64) - mes_de
+    val = np.asarray(valores, dtype=np.float64)
+    keep = (col >= 0) & (col < n_meses)
+    ind, setor, col, val = ind[keep], setor[keep], col[keep], val[keep]
+
+    # uma linha da grade por (indicador, setor): chave int64 única (ids cabem em 32 bits),
+    # bem mais rápido que np.unique(axis=0) sobre pares
+    chave, row = np.unique((ind << 32) | setor, return_inverse=True)
+    row = row.reshape(-1)
+    series = np.stack([chave >> 32, chave & 0xFFFFFFFF], axis=1)
+    grade = np.full((len(series), n_meses), np.nan)
+    grade[row, col] = val
+
+    meta = np.array([metas.get(int(i)) for i in series[:, 0]], dtype=np.float64)  # None -> nan
+    meta_ok = np.isfinite(meta) & (meta != 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ating = np.where(meta_ok[:, None], grade / meta[:, None] * 100, np.nan)
+        anterior = np.concatenate([np.full((len(series), 1), np.nan), grade[:, :-1]], axis=1)
+        variacao = np.where(anterior != 0, (grade - anterior) / np.abs(anterior) * 100, np.nan)
+    media = _rolling_mean(grade, max(int(janela), 1))
+
+    cols = {
+        "valor": _to_json(grade, 4),
+        "atingimento": _to_json(ating),
+        "variacao_mes": _to_json(variacao),
+        "media_movel": _to_json(media, 4),
+    }
+    metas_json = _to_json(meta[None, :], 4)[0]
+    return {
+        "periodos": periodos,
+        "series": [
+            {
+                "indicador_id": int(series[i, 0]),
+                "setor_id": int(series[i, 1]),
+                "meta": metas_json[i],
+                **{name: values[i] for name, values in cols.items()},
+            }
+            for i in range(len(series))
+        ],
+    }
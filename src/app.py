@@ -45,6 +45,9 @@ from __future__ import annotations
 # =========================
 # 0) BOOTSTRAP / ENV
 # =========================
+from time import perf_counter
+_BOOT_STARTED = perf_counter()  # medição do cold start (import + startup)
+
 from dotenv import load_dotenv
 from pathlib import Path
 _ROOT = Path(__file__).resolve().parent
@@ -54,30 +57,84 @@ load_dotenv(dotenv_path=_ENV, override=False)
 # =========================
 # 1) IMPORTS
 # =========================
+import mimetypes
 import os
-import traceback
+import random
+import re
 import secrets
+import shutil
+import tempfile
+import threading
 import uuid
-from datetime import datetime, timedelta, timezone
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import Context, ContextVar
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
 
+import click
 import pyodbc
 import jwt
 
-from flask import Flask, render_template, request, jsonify, redirect
+from flask import Flask, Request, g, has_request_context, render_template, request, jsonify, redirect, abort, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
+from dataclasses import dataclass
 from functools import wraps
 from passlib.context import CryptContext
-from time import time
+from time import monotonic, time, sleep
+import atexit
+import cProfile
+import gc
 import logging
-from logging.handlers import RotatingFileHandler
+import math
+import signal
+import sys
 from collections import defaultdict, deque
+from werkzeug.exceptions import HTTPException
 from werkzeug.middleware.proxy_fix import ProxyFix
 
+from src import analytics
+from src.assets import DIST_DIR, build_assets, load_manifest
+from src.breaker import CircuitBreaker, CircuitOpenError
+from src.cache import ResultCache
+from src.events import BusFull, EventBus
+from src.idempotency import KEY_MAX_LEN, IdempotencyStore, KeyBusy, KeyMismatch, fingerprint
+from src.importer import (
+    ImportErrorReport, ImportFormatError, chunked, cleanup_reports, format_valor,
+    iter_import_rows, parse_periodo, resolve_report,
+)
+from src.jobs import JobQueueFull, JobRunner
+from src.logs import LogPipeline
+from src.memdiag import TracemallocSession, approx_size, rss_bytes
+from src.models import Draft, Indicador, Model, Setor, Usuario, Valor
+from src.profiling import SqlRecorder, build_report, cleanup_profiles, resolve_profile, save_report
+from src.throttle import AdmissionGate, TokenBuckets
+from src.valores import parse_numero, valor_tipado
+
+try:  # brotli é opcional (pip install brotli); sem ele, só gzip
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
 # =========================
 # 2) APP / CONFIG
 # =========================
+class _JSONProvider(DefaultJSONProvider):
+    """jsonify aceita os modelos de src/models.py (linhas com __slots__) diretamente."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Model):
+            return o.to_json()
+        return DefaultJSONProvider.default(o)
+
 app = Flask(__name__)
+app.json = _JSONProvider(app)
 
 # =========================
 # 2.1) SEGURANÇA / CONFIG
@@ -96,6 +153,20 @@ MAX_CONTENT_MB = int(os.getenv("MAX_CONTENT_LENGTH_MB") or "2")
 app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_MB * 1024 * 1024
 app.config["DEBUG"] = DEBUG
 
+# Limite maior por endpoint (ex.: importação de planilhas); demais usam MAX_CONTENT_LENGTH
+IMPORT_MAX_MB = int(os.getenv("IMPORT_MAX_MB") or "50")
+_ENDPOINT_MAX_CONTENT = {
+    "api_import_valores": IMPORT_MAX_MB * 1024 * 1024,
+    "api_submit_job": IMPORT_MAX_MB * 1024 * 1024,  # import-valores em segundo plano
+}
+
+class _AppRequest(Request):
+    @property
+    def max_content_length(self) -> int | None:  # type: ignore[override]
+        return _ENDPOINT_MAX_CONTENT.get(self.endpoint) or super().max_content_length
+
+app.request_class = _AppRequest
+
 # CORS (por padrão: desativado, same-origin)
 cors_origins = [o.strip() for o in (os.getenv("CORS_ORIGINS") or "").split(",") if o.strip()]
 if cors_origins:
@@ -152,36 +223,248 @@ RATE_LIMIT_WINDOW_SEC = int(os.getenv("RATE_LIMIT_WINDOW_SEC") or "300")
 RATE_LIMIT_LOGIN_IP = int(os.getenv("RATE_LIMIT_LOGIN_IP") or "10")
 RATE_LIMIT_LOGIN_EMAIL = int(os.getenv("RATE_LIMIT_LOGIN_EMAIL") or "5")
 
+# Arquivamento de drafts antigos (ZDR -> ZDH)
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS") or "365")
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE") or "500")
+ARCHIVE_BATCH_PAUSE_MS = int(os.getenv("ARCHIVE_BATCH_PAUSE_MS") or "100")
+ARCHIVE_SCHEDULE_ENABLED = (os.getenv("ARCHIVE_SCHEDULE_ENABLED") or "false").lower() in ("1", "true", "yes", "y")
+ARCHIVE_INTERVAL_HOURS = int(os.getenv("ARCHIVE_INTERVAL_HOURS") or "24")
+# Acima de ~5000 locks o SQL Server escala para lock de tabela; mantém lotes bem abaixo disso
+ARCHIVE_MAX_BATCH_SIZE = 4000
+
+# Compressão de respostas (gzip / brotli se instalado)
+COMPRESS_ENABLED = (os.getenv("COMPRESS_ENABLED") or "true").lower() in ("1", "true", "yes", "y")
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES") or "1024")
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL") or "6")          # gzip 1..9
+COMPRESS_BR_QUALITY = int(os.getenv("COMPRESS_BR_QUALITY") or "5")  # brotli 0..11
+COMPRESS_MIMETYPES = {
+    m.strip().lower()
+    for m in (os.getenv("COMPRESS_MIMETYPES") or (
+        "application/json,text/html,text/css,text/plain,text/javascript,"
+        "application/javascript,image/svg+xml,text/event-stream"
+    )).split(",")
+    if m.strip()
+}
+
+# Assets estáticos com hash + pré-comprimidos (src/static/dist)
+ASSETS_ENABLED = (os.getenv("ASSETS_ENABLED") or ("false" if DEBUG else "true")).lower() in ("1", "true", "yes", "y")
+# build no import de cada worker: só para desenvolvimento; em produção, `flask build-assets` no deploy
+ASSETS_BUILD_ON_STARTUP = (os.getenv("ASSETS_BUILD_ON_STARTUP") or "false").lower() in ("1", "true", "yes", "y")
+ASSETS_MAX_AGE = int(os.getenv("ASSETS_MAX_AGE") or "31536000")  # 1 ano
+
+# POST /api/batch (várias leituras GET em uma requisição)
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS") or "20")
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS") or "4")  # <=1: sequencial
+
+# Cache de GET /api/valores por setor+período (resposta serializada, LRU por bytes). 0 desativa.
+VALORES_CACHE_MB = int(os.getenv("VALORES_CACHE_MB") or "32")
+# a invalidação só alcança o worker que gravou: o TTL é o atraso máximo visto nos demais
+VALORES_CACHE_TTL_SEC = int(os.getenv("VALORES_CACHE_TTL_SEC") or "20")
+
+# POST /api/import/valores (CSV/XLSX de histórico)
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE") or "1000")
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS") or "200000")
+IMPORT_REPORT_DIR = Path(os.getenv("IMPORT_REPORT_DIR") or (Path(tempfile.gettempdir()) / "indicadores_import"))
+IMPORT_REPORT_TTL_HOURS = int(os.getenv("IMPORT_REPORT_TTL_HOURS") or "24")
+
+# GET /api/analytics/atingimento (faixa máxima de meses e janela padrão da média móvel)
+ANALYTICS_MAX_MESES = int(os.getenv("ANALYTICS_MAX_MESES") or "120")
+ANALYTICS_JANELA = int(os.getenv("ANALYTICS_JANELA") or "3")
+
+# Perfil sob demanda (ADM): X-Profile: 1 ou ?_profile=1 roda a requisição sob cProfile + registro do SQL
+PROFILING_ENABLED = (os.getenv("PROFILING_ENABLED") or "true").lower() in ("1", "true", "yes", "y")
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR") or (Path(tempfile.gettempdir()) / "indicadores_profiles"))
+PROFILE_TTL_HOURS = int(os.getenv("PROFILE_TTL_HOURS") or "24")
+PROFILE_TOP = int(os.getenv("PROFILE_TOP") or "50")  # funções no relatório
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT") or "1")  # por processo
+
+# Diagnóstico de memória (ADM) e reciclagem do worker por RSS
+MEMORY_CHECK_SEC = int(os.getenv("MEMORY_CHECK_SEC") or "30")  # intervalo da verificação (após requisições)
+# Reciclagem por RSS: só sob gunicorn (detectado) ou MEMORY_RECYCLE_SUPERVISED=true. Com um processo
+# único (python run.py) o encerramento derruba o servidor inteiro: a opção é ignorada.
+MEMORY_RECYCLE_RSS_MB = int(os.getenv("MEMORY_RECYCLE_RSS_MB") or "0")  # 0 desativa
+MEMORY_RECYCLE_SUPERVISED = (os.getenv("MEMORY_RECYCLE_SUPERVISED") or "false").lower() in ("1", "true", "yes", "y")
+MEMORY_RECYCLE_DRAIN_SEC = int(os.getenv("MEMORY_RECYCLE_DRAIN_SEC") or "300")  # espera máx. por jobs/Idempotency-Key
+
+# flask backfill-valores / job backfill-valores (colunas tipadas de linhas antigas)
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE") or "2000")
+
+# Concorrência: LOCK_TIMEOUT por conexão + nova tentativa em deadlock/timeout
+DB_LOCK_TIMEOUT_MS = int(os.getenv("DB_LOCK_TIMEOUT_MS") or "5000")  # 0 = espera indefinida
+DB_RETRY_ATTEMPTS = int(os.getenv("DB_RETRY_ATTEMPTS") or "3")
+DB_RETRY_BASE_MS = int(os.getenv("DB_RETRY_BASE_MS") or "50")
+
+# Banco fora do ar: timeout de login curto + circuit breaker (falha imediata com 503)
+DB_CONNECT_TIMEOUT_SEC = int(os.getenv("DB_CONNECT_TIMEOUT_SEC") or "5")  # 0 = padrão do driver
+DB_BREAKER_ENABLED = (os.getenv("DB_BREAKER_ENABLED") or "true").lower() in ("1", "true", "yes", "y")
+DB_BREAKER_FAILURE_RATE = float(os.getenv("DB_BREAKER_FAILURE_RATE") or "0.5")
+DB_BREAKER_MIN_CALLS = int(os.getenv("DB_BREAKER_MIN_CALLS") or "5")
+DB_BREAKER_WINDOW_SEC = int(os.getenv("DB_BREAKER_WINDOW_SEC") or "30")
+DB_BREAKER_OPEN_SEC = int(os.getenv("DB_BREAKER_OPEN_SEC") or "10")
+DB_BREAKER_MAX_OPEN_SEC = int(os.getenv("DB_BREAKER_MAX_OPEN_SEC") or "120")
+
+# Réplica somente leitura (Always On, secundário legível): GETs vão para ApplicationIntent=ReadOnly
+DB_READ_REPLICA_ENABLED = (os.getenv("DB_READ_REPLICA_ENABLED") or "false").lower() in ("1", "true", "yes", "y")
+SQL_READ_SERVER = (os.getenv("SQL_READ_SERVER") or "").strip()      # vazio = SQL_SERVER (listener com read-only routing)
+SQL_READ_DATABASE = (os.getenv("SQL_READ_DATABASE") or "").strip()  # vazio = SQL_DATABASE
+DB_READ_AFTER_WRITE_SEC = int(os.getenv("DB_READ_AFTER_WRITE_SEC") or "10")  # leituras no primário após escrever
+
+# POST /api/drafts/bulk (aprovação/recusa em massa)
+DRAFTS_BULK_MAX_IDS = int(os.getenv("DRAFTS_BULK_MAX_IDS") or "5000")
+
+# GET /api/stream/pending (Server-Sent Events) - cada conexão ocupa uma thread do servidor
+SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS") or "50")
+SSE_HEARTBEAT_SEC = int(os.getenv("SSE_HEARTBEAT_SEC") or "15")
+SSE_MAX_DURATION_SEC = int(os.getenv("SSE_MAX_DURATION_SEC") or "300")  # o cliente reconecta sozinho
+
+# Jobs em segundo plano (ZJB) - pool de threads por processo
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS") or "2")
+JOBS_MAX_QUEUED = int(os.getenv("JOBS_MAX_QUEUED") or "20")
+JOBS_RETENTION_HOURS = int(os.getenv("JOBS_RETENTION_HOURS") or "72")
+JOBS_STALE_MINUTES = int(os.getenv("JOBS_STALE_MINUTES") or "30")
+JOBS_UPLOAD_DIR = Path(os.getenv("JOBS_UPLOAD_DIR") or (Path(tempfile.gettempdir()) / "indicadores_jobs"))
+
+# Cache do registro do usuário + escopo RBAC (por worker; cada acerto confere ZFU/ZIN). 0 desativa.
+USER_CACHE_TTL_SEC = int(os.getenv("USER_CACHE_TTL_SEC") or "30")
+USER_CACHE_MAX = int(os.getenv("USER_CACHE_MAX") or "2000")
+
+# Throttling das rotas autenticadas (require_level): cota por usuário e classe de rota
+# (read/write/bulk, fichas por minuto + rajada) e limite global de requisições simultâneas
+THROTTLE_ENABLED = (os.getenv("THROTTLE_ENABLED") or "true").lower() in ("1", "true", "yes", "y")
+THROTTLE_READ_PER_MIN = int(os.getenv("THROTTLE_READ_PER_MIN") or "300")
+THROTTLE_READ_BURST = int(os.getenv("THROTTLE_READ_BURST") or "60")
+THROTTLE_WRITE_PER_MIN = int(os.getenv("THROTTLE_WRITE_PER_MIN") or "60")
+THROTTLE_WRITE_BURST = int(os.getenv("THROTTLE_WRITE_BURST") or "20")
+THROTTLE_BULK_PER_MIN = int(os.getenv("THROTTLE_BULK_PER_MIN") or "6")
+THROTTLE_BULK_BURST = int(os.getenv("THROTTLE_BULK_BURST") or "3")
+THROTTLE_BULK_IDS_PER_TOKEN = int(os.getenv("THROTTLE_BULK_IDS_PER_TOKEN") or "50")  # /api/drafts/bulk com ids
+DB_MAX_INFLIGHT = int(os.getenv("DB_MAX_INFLIGHT") or "16")  # 0 desativa
+DB_INFLIGHT_QUEUE = int(os.getenv("DB_INFLIGHT_QUEUE") or "32")
+DB_INFLIGHT_WAIT_MS = int(os.getenv("DB_INFLIGHT_WAIT_MS") or "2000")
+
+# Idempotency-Key nas gravações de drafts/valores e aprovações (tabela ZIK)
+IDEMPOTENCY_ENABLED = (os.getenv("IDEMPOTENCY_ENABLED") or "true").lower() in ("1", "true", "yes", "y")
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS") or "24")
+IDEMPOTENCY_WAIT_MS = int(os.getenv("IDEMPOTENCY_WAIT_MS") or "3000")  # repetição simultânea espera a primeira
+IDEMPOTENCY_LOCK_SEC = int(os.getenv("IDEMPOTENCY_LOCK_SEC") or "120")  # PROCESSING sem renovação há mais = abandonado
+
 _rate_store: dict[str, deque] = defaultdict(deque)
-_seed_done = False
 LOG_LEVEL = (os.getenv("LOG_LEVEL") or "INFO").upper()
 LOG_FILE = (os.getenv("LOG_FILE") or "").strip()
-
-if LOG_FILE:
-    try:
-        handler = RotatingFileHandler(LOG_FILE, maxBytes=10_000_000, backupCount=5)
-        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
-        handler.setFormatter(formatter)
-        handler.setLevel(LOG_LEVEL)
-        app.logger.addHandler(handler)
-    except Exception:
-        pass
-
-app.logger.setLevel(LOG_LEVEL)
+LOG_FORMAT = (os.getenv("LOG_FORMAT") or "json").strip().lower()  # json | text
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX") or "10000")  # cheia: descarta (nunca bloqueia a requisição)
+LOG_DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE") or "0.1")  # fração dos DEBUG mantida
+LOG_SLOW_MS = int(os.getenv("LOG_SLOW_MS") or "1000")  # requisição acima disso: WARNING (senão DEBUG)
+
+def _log_context() -> dict:
+    """Campos de contexto de cada registro de log (thread da requisição)."""
+    if not has_request_context():
+        return {}
+    ctx = {"request_id": g.get("request_id"), "route": request.endpoint, "method": request.method}
+    state = _batch_state.get()
+    if state is not None:
+        ctx["request_id"] = ctx["request_id"] or state.get("request_id")
+    user = getattr(request, "current_user", None)
+    if user:
+        ctx["user_id"] = user["id"]
+    started = g.get("request_started")
+    if started is not None:
+        ctx["latency_ms"] = round((perf_counter() - started) * 1000, 1)
+    return ctx
+
+_log_pipeline = LogPipeline(
+    app.logger,
+    level=LOG_LEVEL,
+    fmt=LOG_FORMAT,
+    file=LOG_FILE,
+    queue_max=LOG_QUEUE_MAX,
+    debug_sample=LOG_DEBUG_SAMPLE,
+    context=_log_context,
+)
+_log_pipeline.start()
+atexit.register(_log_pipeline.stop)
 
 # =========================
 # 3) DB CONNECTION (SQL Server)
 # =========================
-def get_db_connection():
+# Estado de um POST /api/batch: usuário já autenticado + conexões compartilhadas
+# (uma por thread, pois conexões pyodbc não podem ser usadas por threads diferentes).
+_batch_state: ContextVar[dict | None] = ContextVar("batch_state", default=None)
+# SQL da requisição em perfil (X-Profile); None fora dele
+_sql_recorder: ContextVar[SqlRecorder | None] = ContextVar("sql_recorder", default=None)
+
+# Conta falhas de conexão com o banco; aberto, get_db_connection() falha na hora (CircuitOpenError)
+_db_breaker = CircuitBreaker(
+    "SQL Server",
+    failure_rate=DB_BREAKER_FAILURE_RATE,
+    min_calls=DB_BREAKER_MIN_CALLS,
+    window_sec=DB_BREAKER_WINDOW_SEC,
+    open_sec=DB_BREAKER_OPEN_SEC,
+    max_open_sec=DB_BREAKER_MAX_OPEN_SEC,
+    logger=app.logger,
+)
+_db_read_breaker = CircuitBreaker(
+    "SQL Server (réplica de leitura)",
+    failure_rate=DB_BREAKER_FAILURE_RATE,
+    min_calls=DB_BREAKER_MIN_CALLS,
+    window_sec=DB_BREAKER_WINDOW_SEC,
+    open_sec=DB_BREAKER_OPEN_SEC,
+    max_open_sec=DB_BREAKER_MAX_OPEN_SEC,
+    logger=app.logger,
+)
+
+def get_db_connection(read_only: bool | None = None):
+    """
+    Conexão com o SQL Server.
+    read_only=None decide pela requisição (_use_read_replica): GET sem escrita recente do
+    usuário vai para a réplica; o resto (e tudo fora de requisição, ex.: jobs) vai para o primário.
+    Dentro de um /api/batch, reaproveita a conexão da thread corrente (fechada ao fim do batch).
+    Em uma requisição com perfil ativo (X-Profile), a conexão registra cada comando SQL.
+    """
+    recorder = _sql_recorder.get()
+    if recorder is not None:
+        return recorder.wrap(_get_routed_connection(read_only))
+    return _get_routed_connection(read_only)
+
+def _get_routed_connection(read_only: bool | None):
+    if read_only is None:
+        read_only = _use_read_replica()
+    state = _batch_state.get()
+    if state is None:
+        return _open_routed_connection(read_only)
+    key = (threading.get_ident(), read_only)
+    conn = state["conns"].get(key)
+    if conn is None:
+        conn = _open_routed_connection(read_only)
+        with state["lock"]:
+            state["conns"][key] = conn
+    return conn
+
+def _open_routed_connection(read_only: bool):
+    if read_only:
+        try:
+            return _open_db_connection(read_only=True)
+        except CircuitOpenError:
+            pass  # réplica fora (circuito aberto): lê do primário sem esperar
+        except pyodbc.Error as e:
+            app.logger.warning("[DB] réplica de leitura indisponível, usando o primário: %s", e)
+    return _open_db_connection()
+
+def _open_db_connection(read_only: bool = False):
     """
     Abre conexão com SQL Server usando variáveis de ambiente padrão SQL_*.
     Suporta:
     - SQL_TRUSTED_CONNECTION=true (Windows Auth)
     - SQL_ENCRYPT / SQL_TRUST_CERT
+    - read_only: ApplicationIntent=ReadOnly em SQL_READ_SERVER/SQL_READ_DATABASE
+      (connection string diferente => pool ODBC próprio; circuit breaker próprio)
     """
     driver = os.getenv("SQL_DRIVER", "ODBC Driver 18 for SQL Server")
     server = os.getenv("SQL_SERVER", "")
     database = os.getenv("SQL_DATABASE", "")
+    if read_only:
+        server = SQL_READ_SERVER or server
+        database = SQL_READ_DATABASE or database
     user = os.getenv("SQL_USER", "")
     password = os.getenv("SQL_PASSWORD", "")
 
@@ -213,8 +496,148 @@ def get_db_connection():
             f"UID={user};PWD={password};"
             + enc_part + trust_part
         )
+    if read_only:
+        conn_str += "ApplicationIntent=ReadOnly;"
+
+    breaker = _db_read_breaker if read_only else _db_breaker
+    if DB_BREAKER_ENABLED:
+        breaker.before_call()
+    try:
+        conn = pyodbc.connect(conn_str, **({"timeout": DB_CONNECT_TIMEOUT_SEC} if DB_CONNECT_TIMEOUT_SEC > 0 else {}))
+        if DB_LOCK_TIMEOUT_MS > 0:
+            # bloqueio longo vira erro 1222 (repetido por _db_retry) em vez de prender o worker
+            conn.cursor().execute(f"SET LOCK_TIMEOUT {int(DB_LOCK_TIMEOUT_MS)}")
+    except pyodbc.Error as e:
+        if DB_BREAKER_ENABLED:
+            breaker.record_failure(e)
+            e.breaker_counted = True
+        raise
+    if DB_BREAKER_ENABLED:
+        breaker.record_success()
+    return conn
+
+# Roteamento leitura/escrita (DB_READ_REPLICA_ENABLED)
+# GETs que precisam do que outra thread/processo acabou de gravar (status de jobs)
+_PRIMARY_READ_ENDPOINTS = {"api_list_jobs", "api_get_job"}
+# POSTs que não gravam (batch de GETs, login, tracemalloc): não prendem as leituras do usuário no primário
+_READ_ONLY_POST_ENDPOINTS = {"api_batch", "api_auth_login", "api_admin_tracemalloc"}
+
+# read-your-writes: user_id -> instante até quando as leituras dele vão ao primário (por processo)
+_recent_writers: dict[int, float] = {}
+_recent_writers_lock = threading.Lock()
+
+def _request_user_id() -> int | None:
+    user = getattr(request, "current_user", None)
+    if user:
+        return int(user["id"])
+    state = _batch_state.get()
+    if state is not None:
+        return int(state["user"]["id"])
+    token = _get_bearer_token()
+    if not token:
+        return None
+    try:
+        return int(_decode_token(token)["sub"])
+    except Exception:
+        return None
 
-    return pyodbc.connect(conn_str)
+def _wrote_recently(user_id: int) -> bool:
+    until = _recent_writers.get(user_id)
+    return until is not None and until > time()
+
+def _mark_write(user_id: int):
+    now = time()
+    with _recent_writers_lock:
+        if len(_recent_writers) > 10000:
+            for uid in [u for u, until in _recent_writers.items() if until <= now]:
+                del _recent_writers[uid]
+        _recent_writers[user_id] = now + DB_READ_AFTER_WRITE_SEC
+
+def _use_read_replica() -> bool:
+    if not DB_READ_REPLICA_ENABLED or not has_request_context():
+        return False
+    if request.method not in ("GET", "HEAD") or request.endpoint in _PRIMARY_READ_ENDPOINTS:
+        return False
+    user_id = _request_user_id()
+    return user_id is None or not _wrote_recently(user_id)
+
+@app.after_request
+def _track_writes(response):
+    """Escrita bem-sucedida: as próximas leituras do usuário vão ao primário por DB_READ_AFTER_WRITE_SEC."""
+    if (DB_READ_REPLICA_ENABLED and request.method not in ("GET", "HEAD", "OPTIONS")
+            and response.status_code < 400 and request.endpoint not in _READ_ONLY_POST_ENDPOINTS):
+        user_id = _request_user_id()
+        if user_id is not None:
+            _mark_write(user_id)
+    return response
+
+def _is_db_connection_error(exc: Exception) -> bool:
+    """Conexão recusada/caída (SQLSTATE 08xxx) ou timeout de login - não é erro da consulta."""
+    if not isinstance(exc, pyodbc.Error) or not exc.args:
+        return False
+    sqlstate = str(exc.args[0])
+    return sqlstate.startswith("08") or getattr(exc, "breaker_counted", False)
+
+def _db_unavailable_response(exc: Exception):
+    """503 + Retry-After quando o banco está fora (circuito aberto ou conexão perdida)."""
+    if isinstance(exc, CircuitOpenError):
+        retry_after = exc.retry_after
+    else:
+        app.logger.warning("[DB] conexão indisponível: %s", exc)
+        if DB_BREAKER_ENABLED and not getattr(exc, "breaker_counted", False):
+            # conexão caiu no meio da consulta: também conta para abrir o circuito
+            _db_breaker.record_failure(exc)
+        retry_after = max(DB_BREAKER_OPEN_SEC, 1)
+    resp = jsonify({"ok": False, "error": "Banco de dados indisponível; tente novamente em instantes"})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = str(retry_after)
+    return resp
+
+# Deadlock (1205), lock timeout (1222), conflito de update em SNAPSHOT (3960)
+_RETRYABLE_SQL_ERRORS = ("(1205)", "(1222)", "(3960)")
+_RETRYABLE_SQLSTATES = ("40001", "HYT00")
+
+def _is_retryable_db_error(exc: Exception) -> bool:
+    if not isinstance(exc, pyodbc.Error) or not exc.args:
+        return False
+    if str(exc.args[0]) in _RETRYABLE_SQLSTATES:
+        return True
+    message = " ".join(str(a) for a in exc.args)
+    return any(code in message for code in _RETRYABLE_SQL_ERRORS)
+
+def _db_retry(fn):
+    """
+    Repete a função transacional (que abre a própria conexão/transação) quando o SQL Server
+    a escolhe como vítima de deadlock ou estoura LOCK_TIMEOUT: até DB_RETRY_ATTEMPTS
+    tentativas, com backoff exponencial + jitter.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        attempt = 1
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except pyodbc.Error as e:
+                if attempt >= DB_RETRY_ATTEMPTS or not _is_retryable_db_error(e):
+                    raise
+                delay_ms = DB_RETRY_BASE_MS * (2 ** (attempt - 1))
+                delay_ms = random.uniform(delay_ms / 2, delay_ms * 1.5)
+                app.logger.warning(
+                    "[DB] %s: %s; nova tentativa %s/%s em %.0f ms",
+                    fn.__name__, e.args[0], attempt + 1, DB_RETRY_ATTEMPTS, delay_ms
+                )
+                sleep(delay_ms / 1000)
+                attempt += 1
+    return wrapper
+
+def _parse_versao(value) -> bytes | None:
+    """rowversion enviado pelo cliente (hex, como devolvido em *_VERSAO); None se ausente."""
+    if value in (None, ""):
+        return None
+    try:
+        return bytes.fromhex(str(value).strip().removeprefix("0x"))
+    except ValueError:
+        raise ValueError("versao inválida") from None
 
 def _rows_to_dicts(cur, rows):
     """Converte cursor rows em lista de dicts (JSON friendly)."""
@@ -226,10 +649,37 @@ def _rows_to_dicts(cur, rows):
             v = r[i]
             if hasattr(v, "isoformat"):
                 v = v.isoformat()
+            elif isinstance(v, (bytes, bytearray)):
+                v = v.hex()  # rowversion
+            elif isinstance(v, Decimal):
+                v = float(v)  # *_VALOR_NUM como número no JSON (jsonify serializa Decimal como texto)
             d[col] = v
         out.append(d)
     return out
 
+# Colunas de ZDR; ZDH (histórico) tem as mesmas com prefixo ZDH_
+_ZDR_COLS = Draft.COLUMNS
+
+def _drafts_source(incluir_arquivados: bool = False) -> str:
+    """
+    Fonte de drafts para o FROM.
+    Com incluir_arquivados, une ZDR ao histórico (ZDH) com os mesmos nomes de coluna
+    e uma coluna extra ZDR_ARQUIVADO (0/1). Os filtros externos são empurrados
+    para os dois lados do UNION ALL pelo otimizador, então os índices continuam valendo.
+    """
+    if not incluir_arquivados:
+        return "ZDR"
+    cols = ", ".join(_ZDR_COLS)
+    hist_cols = ", ".join(f"{c.replace('ZDR_', 'ZDH_', 1)} AS {c}" for c in _ZDR_COLS)
+    return (
+        f"(SELECT {cols}, 0 AS ZDR_ARQUIVADO FROM ZDR "
+        f"UNION ALL SELECT {hist_cols}, 1 AS ZDR_ARQUIVADO FROM ZDH)"
+    )
+
+def _arg_flag(name: str) -> bool:
+    """Lê flag booleana da query string (?x=1/true/sim)."""
+    return (request.args.get(name) or "").strip().lower() in ("1", "true", "yes", "y", "sim", "s")
+
 # =========================
 # 3.1) HELPERS DE SEGURANÇA
 # =========================
@@ -251,6 +701,52 @@ def _rate_allow(bucket: str, key: str, limit: int, window_sec: int) -> tuple[boo
     q.append(now)
     return True, 0
 
+# Classe de throttling por endpoint; demais: GET = read, outros métodos = write.
+# None = fora do throttling (SSE fica aberto por minutos e tem limite próprio).
+# /api/batch e /api/drafts/bulk com ids são cobrados pelo tamanho (_throttle_charge).
+_THROTTLE_CLASS = {
+    "api_import_valores": "bulk",
+    "api_approve_drafts": "bulk",
+    "api_submit_job": "bulk",
+    "api_stream_pending": None,
+}
+_throttle_buckets = {
+    "read": TokenBuckets(THROTTLE_READ_PER_MIN / 60, THROTTLE_READ_BURST),
+    "write": TokenBuckets(THROTTLE_WRITE_PER_MIN / 60, THROTTLE_WRITE_BURST),
+    "bulk": TokenBuckets(THROTTLE_BULK_PER_MIN / 60, THROTTLE_BULK_BURST),
+}
+_admission = AdmissionGate(DB_MAX_INFLIGHT, DB_INFLIGHT_QUEUE, DB_INFLIGHT_WAIT_MS / 1000)
+
+def _throttle_class() -> str | None:
+    if request.endpoint in _THROTTLE_CLASS:
+        return _THROTTLE_CLASS[request.endpoint]
+    return "read" if request.method in ("GET", "HEAD") else "write"
+
+def _throttle_charge() -> tuple[str | None, float]:
+    """
+    (classe, fichas) da requisição.
+    - /api/batch: uma leitura por item (a tela que carrega 4 listas gasta 4 leituras).
+    - /api/drafts/bulk com ids: gravação, 1 ficha a cada THROTTLE_BULK_IDS_PER_TOKEN ids
+      (aprovar uma linha custa o mesmo que a rota do item); por filtro: bulk.
+    """
+    if request.endpoint == "api_batch":
+        payload = request.get_json(force=True, silent=True) or {}
+        items = payload.get("requests") or payload.get("items") if isinstance(payload, dict) else None
+        return "read", max(len(items) if isinstance(items, list) else 1, 1)
+    if request.endpoint == "api_drafts_bulk":
+        payload = request.get_json(force=True, silent=True) or {}
+        ids = payload.get("ids") if isinstance(payload, dict) else None
+        if isinstance(ids, list) and ids and not payload.get("filtro"):
+            return "write", max(math.ceil(len(ids) / max(THROTTLE_BULK_IDS_PER_TOKEN, 1)), 1)
+        return "bulk", 1
+    return _throttle_class(), 1
+
+def _throttle_response(status: int, message: str, retry_after: float):
+    resp = jsonify({"ok": False, "error": message})
+    resp.status_code = status
+    resp.headers["Retry-After"] = str(max(int(retry_after + 0.999), 1))
+    return resp
+
 def _password_is_strong(password: str) -> bool:
     if not password or len(password) < PASSWORD_MIN_LENGTH:
         return False
@@ -266,10 +762,39 @@ def _safe_error_message(exc: Exception | None, fallback: str = "Erro interno") -
     return fallback
 
 def _error_response(status: int = 500, message: str = "Erro interno", exc: Exception | None = None):
+    if exc is not None and (isinstance(exc, CircuitOpenError) or _is_db_connection_error(exc)):
+        return _db_unavailable_response(exc)
     if exc:
         app.logger.exception("Erro inesperado", exc_info=exc)
     return jsonify({"ok": False, "error": _safe_error_message(exc, message)}), status
 
+@app.errorhandler(CircuitOpenError)
+def _handle_circuit_open(e):
+    return _db_unavailable_response(e)
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+@app.before_request
+def _start_request_log():
+    g.request_started = perf_counter()
+    incoming = request.headers.get("X-Request-ID") or ""
+    g.request_id = incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex[:16]
+
+@app.after_request
+def _log_request(response):
+    response.headers.setdefault("X-Request-ID", g.get("request_id") or "")
+    started = g.get("request_started")
+    if started is None:
+        return response
+    latency_ms = round((perf_counter() - started) * 1000, 1)
+    extra = {"status": response.status_code, "latency_ms": latency_ms}
+    if latency_ms >= LOG_SLOW_MS:
+        app.logger.warning("[REQ] lenta: %s %s -> %s (%.0f ms)", request.method, request.path,
+                           response.status_code, latency_ms, extra=extra)
+    elif app.logger.isEnabledFor(logging.DEBUG):
+        app.logger.debug("[REQ] %s %s -> %s", request.method, request.path, response.status_code, extra=extra)
+    return response
+
 @app.before_request
 def _enforce_https():
     if FORCE_HTTPS and not request.is_secure:
@@ -292,6 +817,198 @@ def _set_security_headers(response):
         response.headers.setdefault("Pragma", "no-cache")
     return response
 
+# =========================
+# 3.2) COMPRESSÃO DE RESPOSTAS
+# =========================
+def _negotiate_encoding(available: list[str] | None = None) -> str | None:
+    """
+    Escolhe 'br' ou 'gzip' conforme Accept-Encoding (respeita q=0).
+    available: codificações possíveis (padrão: as que este processo consegue gerar).
+    """
+    header = request.headers.get("Accept-Encoding", "")
+    if not header:
+        return None
+    prefs = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        prefs[token.strip().lower()] = q
+
+    if available is None:
+        available = (["br"] if brotli is not None else []) + ["gzip"]
+    candidates = available
+    best, best_q = None, 0.0
+    for enc in candidates:
+        q = prefs.get(enc, prefs.get("*", 0.0))
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+def _compress_bytes(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BR_QUALITY)
+    comp = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = formato gzip
+    return comp.compress(data) + comp.flush()
+
+def _compress_stream(chunks, encoding: str, flush_each: bool):
+    """
+    Comprime um iterável de chunks sob demanda.
+    flush_each: descarrega a cada chunk (respostas geradas aos poucos, ex.: SSE),
+    para o cliente receber cada parte sem esperar o fim do stream.
+    """
+    if encoding == "br":
+        comp = brotli.Compressor(quality=COMPRESS_BR_QUALITY)
+        compress, flush, finish = comp.process, comp.flush, comp.finish
+    else:
+        comp = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+        compress, flush, finish = comp.compress, (lambda: comp.flush(zlib.Z_SYNC_FLUSH)), comp.flush
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        out = compress(chunk)
+        if flush_each:
+            out += flush()
+        if out:
+            yield out
+    tail = finish()
+    if tail:
+        yield tail
+
+@app.after_request
+def _compress_response(response):
+    """
+    Comprime respostas de mimetypes textuais acima de COMPRESS_MIN_BYTES.
+    Respostas em stream (sem tamanho conhecido) são comprimidas chunk a chunk.
+    Flask roda after_request na ordem inversa do registro: os hooks registrados
+    depois deste (_json_etag, _check_worker_memory) veem o corpo original; os
+    registrados antes (_track_writes, _log_request, _set_security_headers) rodam
+    depois da compressão e só devem olhar status/cabeçalhos, nunca o corpo.
+    """
+    if not COMPRESS_ENABLED:
+        return response
+    if (response.mimetype or "").lower() not in COMPRESS_MIMETYPES:
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    if request.method == "HEAD" or response.status_code < 200 or response.status_code in (204, 206, 304):
+        return response
+    if "Content-Encoding" in response.headers:
+        return response
+    if "no-transform" in (response.headers.get("Cache-Control") or ""):
+        return response
+
+    encoding = _negotiate_encoding()
+    if not encoding:
+        return response
+
+    if response.is_streamed or response.direct_passthrough:
+        length = response.content_length
+        if length is not None and length < COMPRESS_MIN_BYTES:
+            return response
+        original = response.response
+        response.response = _compress_stream(original, encoding, flush_each=not response.direct_passthrough)
+        if hasattr(original, "close"):
+            response.call_on_close(original.close)
+        response.direct_passthrough = False
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        response.set_data(_compress_bytes(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        # mesmo conteúdo lógico, bytes diferentes: ETag fraco
+        response.headers["ETag"] = "W/" + etag
+    return response
+
+@app.after_request
+def _json_etag(response):
+    """
+    ETag nos GETs JSON: o front (apiGet) revalida com If-None-Match e recebe 304
+    sem corpo quando nada mudou. Registrado depois da compressão => roda antes dela.
+    """
+    if request.method != "GET" or response.status_code != 200:
+        return response
+    if response.mimetype != "application/json" or response.is_streamed or response.direct_passthrough:
+        return response
+    response.add_etag()
+    return response.make_conditional(request)
+
+# =========================
+# 3.3) ASSETS ESTÁTICOS (hash + pré-compressão)
+# =========================
+_asset_manifest: dict[str, str] = {}
+_asset_variants: dict[str, dict[str, Path]] = {}
+
+def _load_assets(build: bool = False):
+    """Carrega manifest + variantes .br/.gz do dist (gerado antes por `flask build-assets`; build=True gera aqui)."""
+    global _asset_manifest, _asset_variants
+    manifest = build_assets(log=lambda msg: app.logger.info("[ASSETS] %s", msg)) if build else load_manifest()
+    variants = {}
+    for hashed in manifest.values():
+        found = {"identity": DIST_DIR / hashed}
+        for enc, ext in (("br", ".br"), ("gzip", ".gz")):
+            path = DIST_DIR / (hashed + ext)
+            if path.exists():
+                found[enc] = path
+        variants[hashed] = found
+    _asset_manifest, _asset_variants = manifest, variants
+
+def asset_url(name: str) -> str:
+    """URL do asset para o template: versão com hash quando houver build, senão /static/<name>."""
+    hashed = _asset_manifest.get(name) if ASSETS_ENABLED else None
+    if hashed:
+        return f"/assets/{hashed}"
+    return f"/static/{name}"
+
+app.jinja_env.globals["asset_url"] = asset_url
+
+@app.route("/assets/<path:filename>")
+def static_asset(filename: str):
+    """Serve o asset com hash (cache imutável), já pré-comprimido conforme Accept-Encoding."""
+    variants = _asset_variants.get(filename)
+    if not variants:
+        abort(404)
+
+    encoding = _negotiate_encoding([e for e in ("br", "gzip") if e in variants])
+    path = variants[encoding] if encoding else variants["identity"]
+
+    response = send_file(
+        path,
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        conditional=True,
+        max_age=ASSETS_MAX_AGE,
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = f"public, max-age={ASSETS_MAX_AGE}, immutable"
+    return response
+
+@app.cli.command("build-assets")
+def cli_build_assets():
+    """Minifica, aplica hash e pré-comprime os assets em src/static/dist."""
+    manifest = build_assets(log=click.echo)
+    for name, hashed in sorted(manifest.items()):
+        click.echo(f"{name} -> /assets/{hashed}")
+
+if ASSETS_ENABLED:
+    try:
+        _load_assets(build=ASSETS_BUILD_ON_STARTUP)
+    except Exception as e:
+        app.logger.exception("[ASSETS] falha ao gerar assets; usando /static", exc_info=e)
+
 # =========================
 # 4) AUTH / JWT / RBAC
 # =========================
@@ -304,6 +1021,15 @@ def verify_password(plain: str, hashed: str) -> bool:
     except Exception:
         return False
 
+_dummy_hash: str | None = None
+
+def _dummy_password_hash() -> str:
+    """Hash bcrypt descartável (gerado no warm-up) para comparar quando o usuário não existe."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(secrets.token_urlsafe(16))
+    return _dummy_hash
+
 def _jwt_secret():
     if not JWT_SECRET:
         raise RuntimeError("JWT_SECRET não configurado no .env")
@@ -363,20 +1089,19 @@ def get_current_user(optional: bool = False):
         if optional:
             return None
         raise PermissionError("Token ausente")
+
+    state = _batch_state.get()
+    if state is not None and state["token"] == token:
+        # sub-requisição de /api/batch: token já validado uma vez
+        return state["user"]
+
     try:
         data = _decode_token(token)
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-            db_user = _fetch_user_by_id(cur, int(data["sub"]))
-            if not db_user or not db_user.get("ativo"):
-                raise PermissionError("Usuario inativo")
-            return {
-                "id": int(db_user["id"]),
-                "nivel": int(db_user["nivel"]),
-                "setor_id": db_user.get("setor_id"),
-                "nome": db_user.get("nome"),
-                "email": db_user.get("email"),
-            }
+        record = _load_user_record(int(data["sub"]))
+        if not record or not record.ativo:
+            raise PermissionError("Usuario inativo")
+        # o registro em cache é compartilhado entre requisições: as rotas só leem
+        return record
     except jwt.ExpiredSignatureError as e:
         app.logger.warning("[AUTH] token expirado: %s", e)
         if optional:
@@ -391,13 +1116,16 @@ def get_current_user(optional: bool = False):
         if optional:
             return None
         raise
+    except CircuitOpenError:
+        raise  # banco fora: 503, não 401 (o cliente não deve descartar o token)
     except Exception as e:
+        if _is_db_connection_error(e):
+            raise
         app.logger.exception("[AUTH] erro ao validar token", exc_info=e)
         if optional:
             return None
         raise PermissionError("Token invalido/expirado")
 
-
 def require_level(min_level: int):
     def deco(fn):
         @wraps(fn)
@@ -413,68 +1141,339 @@ def require_level(min_level: int):
                 return jsonify({"ok": False, "error": f"Permissão insuficiente (requer nível >= {min_level})"}), 403
 
             request.current_user = user
-            return fn(*args, **kwargs)
+            view = _profiled(fn) if PROFILING_ENABLED and _profile_requested(user) else fn
+            # sub-requisições de /api/batch já foram contadas (e a vaga é do batch)
+            klass, cost = _throttle_charge() if THROTTLE_ENABLED and _batch_state.get() is None else (None, 0)
+            if klass is None:
+                return view(*args, **kwargs)
+
+            wait = _throttle_buckets[klass].take(int(user["id"]), cost)
+            if wait:
+                app.logger.warning("[THROTTLE] usuario=%s classe=%s rota=%s", user["id"], klass, request.endpoint)
+                return _throttle_response(429, "Muitas requisições; aguarde e tente novamente", wait)
+            if not _admission.acquire():
+                app.logger.warning("[THROTTLE] sobrecarga: %s", _admission.snapshot())
+                return _throttle_response(503, "Servidor ocupado; tente novamente em instantes", 1)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                _admission.release()
         return wrapper
     return deco
 
+_profile_slots = threading.BoundedSemaphore(max(PROFILE_MAX_CONCURRENT, 1))
+
+def _profile_requested(user) -> bool:
+    if int(user["nivel"]) < 5 or _batch_state.get() is not None:
+        return False
+    flag = request.headers.get("X-Profile") or request.args.get("_profile") or ""
+    return flag.strip().lower() in ("1", "true", "yes", "y", "sim", "s")
+
+def _profiled(fn):
+    """
+    Executa a rota sob cProfile, registrando o SQL da requisição; o relatório vai
+    para PROFILE_DIR e o id volta em X-Profile-Id (GET /api/admin/profiles/<id>).
+    Com PROFILE_MAX_CONCURRENT perfis já em andamento, executa sem perfil (X-Profile: busy).
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _profile_slots.acquire(blocking=False):
+            resp = app.make_response(fn(*args, **kwargs))
+            resp.headers["X-Profile"] = "busy"
+            return resp
+        recorder = SqlRecorder()
+        profiler = cProfile.Profile()
+        token = _sql_recorder.set(recorder)
+        started = perf_counter()
+        status, erro = 500, None
+        try:
+            resp = app.make_response(profiler.runcall(fn, *args, **kwargs))
+            status = resp.status_code
+            return resp
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"[:500]
+            raise
+        finally:
+            _sql_recorder.reset(token)
+            _profile_slots.release()
+            meta = {
+                "criado_em": datetime.utcnow().isoformat(timespec="seconds"),
+                "usuario_id": int(request.current_user["id"]),
+                "rota": request.endpoint,
+                "metodo": request.method,
+                "path": request.full_path.rstrip("?"),
+                "status": status,
+                "erro": erro,
+                "duracao_ms": round((perf_counter() - started) * 1000, 3),
+            }
+            try:
+                cleanup_profiles(PROFILE_DIR, PROFILE_TTL_HOURS * 3600)
+                report = build_report(profiler, recorder, meta, top=PROFILE_TOP)
+                profile_id = save_report(PROFILE_DIR, meta["usuario_id"], report, profiler)
+                if erro is None:
+                    resp.headers["X-Profile-Id"] = profile_id
+                app.logger.info("[PROFILE] %s %s -> %s (%s ms, %s comandos SQL)", meta["metodo"], meta["path"],
+                                profile_id, meta["duracao_ms"], report["sql"]["total"])
+            except Exception as e:
+                app.logger.warning("[PROFILE] falha ao gravar o perfil: %s", e)
+    return wrapper
+
+_idempotency = IdempotencyStore(
+    connect=lambda: get_db_connection(read_only=False),
+    ttl_hours=IDEMPOTENCY_TTL_HOURS,
+    lock_sec=IDEMPOTENCY_LOCK_SEC,
+    wait_sec=IDEMPOTENCY_WAIT_MS / 1000,
+    logger=app.logger,
+)
+
+def idempotent(fn):
+    """
+    Idempotency-Key (usar abaixo de @require_level): a primeira resposta da chave é
+    gravada e devolvida às repetições (Idempotent-Replayed: true) sem executar a rota.
+    Sem o cabeçalho, a rota executa normalmente.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (request.headers.get("Idempotency-Key") or "").strip()
+        if not IDEMPOTENCY_ENABLED or not key:
+            return fn(*args, **kwargs)
+        if len(key) > KEY_MAX_LEN or not key.isprintable():
+            return jsonify({"ok": False, "error": f"Idempotency-Key inválida (até {KEY_MAX_LEN} caracteres)"}), 400
+
+        user_id = int(request.current_user["id"])
+        digest = fingerprint(request.method, request.path, request.get_data())
+        try:
+            replay = _idempotency.begin(user_id, key, request.endpoint or request.path, digest)
+        except KeyMismatch as e:
+            return jsonify({"ok": False, "error": str(e)}), 422
+        except KeyBusy as e:
+            resp = jsonify({"ok": False, "error": str(e)})
+            resp.status_code = 409
+            resp.headers["Retry-After"] = "1"
+            return resp
+        except Exception as e:
+            return _error_response(500, "Erro interno", e)
+        if replay is not None:
+            resp = app.response_class(replay.body, status=replay.status, mimetype="application/json")
+            resp.headers["Idempotent-Replayed"] = "true"
+            return resp
+
+        try:
+            with _idempotency.running(user_id, key):  # renova a chave: rota longa não vira "abandonada"
+                resp = app.make_response(fn(*args, **kwargs))
+        except BaseException:
+            _release_idempotency_key(user_id, key)
+            raise
+        try:
+            # com o banco falhando, o resultado fica com a thread de fundo (que segue renovando a chave)
+            _idempotency.finish(user_id, key, resp.status_code, resp.get_data(as_text=True))
+        except Exception as e:
+            app.logger.error("[IDEMPOTENCIA] falha ao gravar resultado: %s", e)
+        return resp
+    return wrapper
+
+def _release_idempotency_key(user_id: int, key: str):
+    try:
+        _idempotency.release(user_id, key)
+    except Exception as e:
+        app.logger.warning("[IDEMPOTENCIA] falha ao liberar chave: %s", e)
+
 def _is_gestao_or_admin(user: dict) -> bool:
     return int(user["nivel"]) >= 4
 
-def _enforce_setor_access(user: dict, setor_id: int):
-    """Gestão/ADM vê tudo; abaixo disso só acessa o próprio setor."""
-    if _is_gestao_or_admin(user):
-        return
-    if user.get("setor_id") is None:
-        raise PermissionError("Usuário sem setor associado")
-    if int(user["setor_id"]) != int(setor_id):
+def _enforce_setor_access(user: dict, setor_id: int, allow_assigned: bool = False):
+    """
+    Gestão/ADM vê tudo; abaixo disso só acessa o próprio setor
+    (ou, com allow_assigned, setores onde é responsável por indicador).
+    """
+    user["scope"].check_setor(setor_id, allow_assigned=allow_assigned)
+
+@dataclass(frozen=True)
+class AccessScope:
+    """
+    Escopo RBAC de um usuário, calculado uma vez junto com o registro (ZFU)
+    e reaproveitado por todas as rotas, sem novas consultas.
+    """
+    user_id: int
+    nivel: int
+    setor_id: int | None
+    assigned_setor_ids: frozenset = frozenset()
+    responsible_indicator_ids: frozenset = frozenset()
+
+    @property
+    def is_global(self) -> bool:
+        return self.nivel >= 4
+
+    @property
+    def visible_setor_ids(self) -> frozenset | None:
+        """Setores visíveis; None = todos (Gestão/ADM)."""
+        if self.is_global:
+            return None
+        ids = set(self.assigned_setor_ids) if self.nivel in (2, 3) else set()
+        if self.setor_id is not None:
+            ids.add(self.setor_id)
+        return frozenset(ids)
+
+    def setor_mode(self, setor_id: int) -> str | None:
+        """'all' (Gestão/ADM), 'own' (setor do usuário), 'assigned' (responsável) ou None."""
+        if self.is_global:
+            return "all"
+        if self.setor_id is not None and self.setor_id == int(setor_id):
+            return "own"
+        if self.nivel in (2, 3) and int(setor_id) in self.assigned_setor_ids:
+            return "assigned"
+        return None
+
+    def check_setor(self, setor_id: int, allow_assigned: bool = False):
+        mode = self.setor_mode(setor_id)
+        if mode in ("all", "own") or (allow_assigned and mode == "assigned"):
+            return
+        if self.setor_id is None:
+            raise PermissionError("Usuário sem setor associado")
         raise PermissionError("Acesso negado a este setor")
 
-def _fetch_user_by_email(cur, email: str):
+    def can_fill(self, indicador_setor_id: int, responsavel_id: int | None) -> bool:
+        if self.nivel >= 4:
+            return True
+        if self.nivel == 3:
+            if self.setor_id is not None and self.setor_id == int(indicador_setor_id):
+                return responsavel_id is None or int(responsavel_id) == self.user_id
+            return responsavel_id is not None and int(responsavel_id) == self.user_id
+        if self.nivel == 2:
+            if self.setor_id is None or self.setor_id != int(indicador_setor_id):
+                return False
+            return responsavel_id is None or int(responsavel_id) == self.user_id
+        return False
+
+    def indicator_filter(self, setor_id: int) -> tuple[list[str], list]:
+        """
+        Filtros SQL (ZIN) para listar indicadores de um setor.
+        Levanta PermissionError se o setor não é visível.
+        """
+        mode = self.setor_mode(setor_id)
+        if mode is None:
+            raise PermissionError("Acesso negado a este setor")
+        where, params = ["ZIN_SETOR_ID = ?"], [int(setor_id)]
+        if mode == "assigned":
+            where.append("ZIN_RESPONSAVEL_ID = ?")
+            params.append(self.user_id)
+        elif mode == "own" and self.nivel == 2:
+            where.append("(ZIN_RESPONSAVEL_ID IS NULL OR ZIN_RESPONSAVEL_ID = ?)")
+            params.append(self.user_id)
+        return where, params
+
+    def read_only(self, responsavel_id: int | None) -> bool | None:
+        """Flag read_only exibida na UI (None = não se aplica ao nível)."""
+        if self.nivel == 1:
+            return True
+        if self.nivel == 3:
+            return responsavel_id is not None and int(responsavel_id) != self.user_id
+        return None
+
+def _normalize_email(email) -> str:
+    """Forma canônica do email (mesma regra da coluna computada ZFU_EMAIL_NORM)."""
+    return (email or "").strip().lower()
+
+def _normalize_nome(nome) -> str:
+    """Forma de busca do nome do setor (mesma regra de ZSE_NOME_NORM)."""
+    return (nome or "").strip().lower()
+
+def _fetch_user_by_email(cur, email: str) -> Usuario | None:
     cur.execute(
-        "SELECT ZFU_ID, ZFU_NOME, ZFU_EMAIL, ZFU_SETOR_ID, ZFU_NIVEL, ZFU_SENHA_HASH, ZFU_ATIVO "
-        "FROM ZFU WHERE LOWER(ZFU_EMAIL) = LOWER(?)",
-        (email,)
+        f"SELECT {Usuario.select_list()} FROM ZFU WHERE ZFU_EMAIL_NORM = ?",
+        (_normalize_email(email),)
     )
     row = cur.fetchone()
-    if not row:
-        return None
-    return {
-        "id": int(row[0]),
-        "nome": row[1],
-        "email": row[2],
-        "setor_id": row[3],
-        "nivel": int(row[4] or 1),
-        "senha_hash": row[5],
-        "ativo": bool(row[6]),
-    }
+    return Usuario.from_row(row) if row else None
 
-def _fetch_user_by_id(cur, user_id: int):
+def _fetch_user_by_id(cur, user_id: int) -> Usuario | None:
     cur.execute(
-        "SELECT ZFU_ID, ZFU_NOME, ZFU_EMAIL, ZFU_SETOR_ID, ZFU_NIVEL, ZFU_SENHA_HASH, ZFU_ATIVO "
-        "FROM ZFU WHERE ZFU_ID = ?",
+        f"SELECT {Usuario.select_list()} FROM ZFU WHERE ZFU_ID = ?",
         (int(user_id),)
     )
     row = cur.fetchone()
-    if not row:
-        return None
-    return {
-        "id": int(row[0]),
-        "nome": row[1],
-        "email": row[2],
-        "setor_id": row[3],
-        "nivel": int(row[4] or 1),
-        "senha_hash": row[5],
-        "ativo": bool(row[6]),
-    }
+    return Usuario.from_row(row) if row else None
+
+
+def _load_access_scope(cur, db_user: Usuario) -> AccessScope:
+    """Uma consulta (só níveis 2/3): indicadores sob responsabilidade do usuário e seus setores."""
+    nivel = int(db_user["nivel"])
+    setor_id = int(db_user["setor_id"]) if db_user.get("setor_id") is not None else None
+    assigned, responsible = set(), set()
+    if nivel in (2, 3):
+        cur.execute(
+            "SELECT ZIN_ID, ZIN_SETOR_ID FROM ZIN WHERE ZIN_ATIVO = 1 AND ZIN_RESPONSAVEL_ID = ?",
+            (int(db_user["id"]),)
+        )
+        for ind_id, ind_setor_id in cur.fetchall():
+            responsible.add(int(ind_id))
+            if ind_setor_id is not None:
+                assigned.add(int(ind_setor_id))
+    return AccessScope(
+        user_id=int(db_user["id"]),
+        nivel=nivel,
+        setor_id=setor_id,
+        assigned_setor_ids=frozenset(assigned),
+        responsible_indicator_ids=frozenset(responsible),
+    )
 
+_user_cache: dict[int, tuple[float, Usuario, tuple]] = {}
+_user_cache_lock = threading.Lock()
 
-def _get_assigned_sector_ids(cur, user_id: int) -> list[int]:
+def _access_stamp(cur, user_id: int) -> tuple | None:
+    """Assinatura barata do que define o acesso (ativo, nível, setor e indicadores sob responsabilidade).
+
+    Só lê ZFU pela PK e IX_ZIN_RESPONSAVEL; None se o usuário não existe.
+    """
     cur.execute(
-        "SELECT DISTINCT ZIN_SETOR_ID FROM ZIN WHERE ZIN_ATIVO = 1 AND ZIN_RESPONSAVEL_ID = ?",
+        "SELECT ZFU_ATIVO, ZFU_NIVEL, ZFU_SETOR_ID, "
+        "(SELECT COUNT(*) FROM ZIN WHERE ZIN_ATIVO = 1 AND ZIN_RESPONSAVEL_ID = ZFU_ID), "
+        "(SELECT CHECKSUM_AGG(CHECKSUM(ZIN_ID, ZIN_SETOR_ID)) FROM ZIN "
+        "WHERE ZIN_ATIVO = 1 AND ZIN_RESPONSAVEL_ID = ZFU_ID) "
+        "FROM ZFU WHERE ZFU_ID = ?",
         (int(user_id),)
     )
-    rows = cur.fetchall()
-    return [int(r[0]) for r in rows if r and r[0] is not None]
+    row = cur.fetchone()
+    return tuple(row) if row else None
+
+def _load_user_record(user_id: int) -> Usuario | None:
+    """Registro do usuário + AccessScope, com cache por worker (USER_CACHE_TTL_SEC).
+
+    O cache é por processo e a invalidação só alcança o worker que fez a
+    mudança; por isso cada acerto é conferido com _access_stamp (uma
+    consulta por índice) e o registro é recarregado se o usuário foi
+    desativado ou mudou de nível/setor/responsabilidades em outro worker.
+    """
+    now = time()
+    cached = _user_cache.get(user_id)
+
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        stamp = _access_stamp(cur, user_id)
+        if stamp is None:
+            _invalidate_user_cache(user_id)
+            return None
+        if cached and cached[0] > now and cached[2] == stamp:
+            return cached[1]
+        db_user = _fetch_user_by_id(cur, user_id)
+        if not db_user:
+            return None
+        record = db_user.for_session(_load_access_scope(cur, db_user))
+
+    if USER_CACHE_TTL_SEC > 0:
+        with _user_cache_lock:
+            if len(_user_cache) >= USER_CACHE_MAX:
+                _user_cache.pop(next(iter(_user_cache)), None)
+            _user_cache[user_id] = (now + USER_CACHE_TTL_SEC, record, stamp)
+    return record
+
+def _invalidate_user_cache(user_id: int | None = None):
+    """Descarta o registro em cache (um usuário ou todos, ex.: mudança de responsável em ZIN)."""
+    with _user_cache_lock:
+        if user_id is None:
+            _user_cache.clear()
+        else:
+            _user_cache.pop(int(user_id), None)
 
 def _get_indicator_access(cur, indicador_id: int):
     cur.execute(
@@ -488,37 +1487,18 @@ def _get_indicator_access(cur, indicador_id: int):
     responsavel_id = int(row[1]) if row[1] is not None else None
     return setor_id, responsavel_id
 
-def _can_user_fill_indicator(user: dict, indicador_setor_id: int, responsavel_id: int | None) -> bool:
-    nivel = int(user.get("nivel") or 1)
-    user_id = int(user.get("id"))
-    user_setor_id = user.get("setor_id")
-    if nivel >= 5:
-        return True
-    if nivel >= 4:
-        return True
-    if nivel == 3:
-        if user_setor_id is not None and int(user_setor_id) == int(indicador_setor_id):
-            return responsavel_id is None or int(responsavel_id) == user_id
-        return responsavel_id is not None and int(responsavel_id) == user_id
-    if nivel == 2:
-        if user_setor_id is None:
-            return False
-        if int(user_setor_id) != int(indicador_setor_id):
-            return False
-        return responsavel_id is None or int(responsavel_id) == user_id
-    return False
-
 def _log_action(user: dict | None, action: str, details: str | None = None):
-    who = f"user_id={user.get('id')}" if user else "user_id=none"
-    when = datetime.utcnow().isoformat()
-    extra = f" details={details}" if details else ""
-    print(f"[AUDIT] {when} action={action} {who}{extra}")
+    app.logger.info(
+        "[AUDIT] action=%s", action,
+        extra={"audit": True, "action": action, "user_id": user.get("id") if user else None, "details": details},
+    )
 
-def ensure_seed_admin():
+def ensure_seed_admin(force: bool = False):
     """
-    Cria um ADM inicial quando habilitado via SEED_ADMIN_ENABLED.
+    Cria um ADM inicial quando habilitado via SEED_ADMIN_ENABLED (ou force=True, comando `seed`).
+    Executado uma vez no startup (create_app) - não a cada requisição.
     """
-    if not SEED_ADMIN_ENABLED:
+    if not SEED_ADMIN_ENABLED and not force:
         return
 
     if not SEED_ADMIN_EMAIL or not SEED_ADMIN_PASSWORD:
@@ -538,7 +1518,8 @@ def ensure_seed_admin():
         has_admin = int(cur.fetchone()[0] or 0)
 
         def _ensure_user(email: str, password: str, nome: str):
-            cur.execute("SELECT ZFU_ID FROM ZFU WHERE LOWER(ZFU_EMAIL) = LOWER(?)", (email,))
+            email = _normalize_email(email)
+            cur.execute("SELECT ZFU_ID FROM ZFU WHERE ZFU_EMAIL_NORM = ?", (email,))
             row = cur.fetchone()
             if row and row[0]:
                 return
@@ -556,17 +1537,6 @@ def ensure_seed_admin():
 
         conn.commit()
 
-@app.before_request
-def _seed_admin_once():
-    global _seed_done
-    if _seed_done or not SEED_ADMIN_ENABLED:
-        return
-    try:
-        ensure_seed_admin()
-    except Exception as e:
-        app.logger.exception("Falha ao executar seed admin", exc_info=e)
-    _seed_done = True
-
 # =========================
 # 5) HELPERS DE UPSERT (Setor / Funcionário / Indicador)
 # =========================
@@ -591,7 +1561,7 @@ def _get_or_create_setor(cur, setor_id, setor_nome):
     if not nome:
         raise ValueError("Setor nao informado")
 
-    cur.execute("SELECT ZSE_ID FROM ZSE WHERE LOWER(ZSE_NOME) = LOWER(?)", (nome,))
+    cur.execute("SELECT ZSE_ID FROM ZSE WHERE ZSE_NOME_NORM = ?", (_normalize_nome(nome),))
     row = cur.fetchone()
     if row and row[0]:
         return int(row[0])
@@ -608,11 +1578,11 @@ def _get_or_create_funcionario(cur, funcionario_id, funcionario_email, funcionar
             return int(row[0])
         raise ValueError("Funcionario informado nao existe")
 
-    email = (funcionario_email or "").strip()
+    email = _normalize_email(funcionario_email)
     nome = (funcionario_nome or "").strip() or email
 
     if email:
-        cur.execute("SELECT ZFU_ID FROM ZFU WHERE LOWER(ZFU_EMAIL) = LOWER(?)", (email,))
+        cur.execute("SELECT ZFU_ID FROM ZFU WHERE ZFU_EMAIL_NORM = ?", (email,))
         row = cur.fetchone()
         if row and row[0]:
             return int(row[0])
@@ -666,6 +1636,52 @@ def _get_or_create_indicador(cur, indicador_id, setor_id, codigo, nome, tipo=Non
     cur.execute("SELECT SCOPE_IDENTITY()")
     return int(cur.fetchone()[0])
 
+def _load_setor_indicadores(cur, setor_id: int) -> dict:
+    """
+    Catálogo de indicadores do setor em uma consulta:
+    {"by_id": {id: (setor_id, responsavel_id)}, "by_codigo": {codigo: id}, "unidades": {id: unidade}}.
+    """
+    cur.execute(
+        "SELECT ZIN_ID, ZIN_CODIGO, ZIN_RESPONSAVEL_ID, ZIN_UNIDADE FROM ZIN WHERE ZIN_SETOR_ID = ?",
+        (int(setor_id),)
+    )
+    by_id, by_codigo, unidades = {}, {}, {}
+    for ind_id, codigo, resp_id, unidade in cur.fetchall():
+        by_id[int(ind_id)] = (int(setor_id), int(resp_id) if resp_id is not None else None)
+        by_codigo[str(codigo)] = int(ind_id)
+        unidades[int(ind_id)] = unidade
+    return {"by_id": by_id, "by_codigo": by_codigo, "unidades": unidades}
+
+def _catalog_valor_tipado(cur, catalog: dict, ind_id: int, valor) -> tuple:
+    """(numero, data) de `valor` conforme a unidade do indicador (ZIN_UNIDADE)."""
+    unidades = catalog["unidades"]
+    if ind_id not in unidades:
+        # indicador de outro setor ou recém-criado: fora do catálogo carregado
+        cur.execute("SELECT ZIN_UNIDADE FROM ZIN WHERE ZIN_ID = ?", (int(ind_id),))
+        row = cur.fetchone()
+        unidades[ind_id] = row[0] if row else None
+    return valor_tipado(valor, unidades[ind_id])
+
+def _resolve_indicador(cur, catalog: dict, indicador_id, setor_id, codigo, nome, tipo=None, unidade=None, meta=None):
+    """
+    Resolve (id, setor_id, responsavel_id) do indicador usando o catálogo do setor;
+    só consulta/cria no banco quando o item não está no catálogo.
+    """
+    if indicador_id and int(indicador_id) in catalog["by_id"]:
+        ind_id = int(indicador_id)
+        return (ind_id,) + catalog["by_id"][ind_id]
+    if not indicador_id and codigo is not None and str(codigo) in catalog["by_codigo"]:
+        ind_id = catalog["by_codigo"][str(codigo)]
+        return (ind_id,) + catalog["by_id"][ind_id]
+
+    ind_id = _get_or_create_indicador(cur, indicador_id, setor_id, codigo, nome, tipo=tipo, unidade=unidade, meta=meta)
+    ind_setor_id, resp_id = _get_indicator_access(cur, ind_id)
+    if ind_setor_id is not None and int(ind_setor_id) == int(setor_id):
+        catalog["by_id"][ind_id] = (ind_setor_id, resp_id)
+        if codigo is not None:
+            catalog["by_codigo"][str(codigo)] = ind_id
+    return ind_id, ind_setor_id, resp_id
+
 
 
 # ===========================================================
@@ -675,6 +1691,44 @@ def _get_or_create_indicador(cur, indicador_id, setor_id, codigo, nome, tipo=Non
 def index():
     return render_template("index.html")
 
+@app.route("/api/health", methods=["GET"])
+def api_health():
+    """
+    Health check (sem autenticação, não abre conexão).
+    db.state: CLOSED (normal), OPEN (banco indisponível; requisições recebem 503) ou HALF_OPEN.
+    O texto do último erro do banco (servidor, driver, login) fica fora: ver /api/admin/db.
+    """
+    db = _db_breaker.snapshot() if DB_BREAKER_ENABLED else {"state": "DISABLED"}
+    ok = db["state"] != "OPEN"
+    body = {"ok": ok, "ready": _startup["ready"], "db": db}
+    if DB_READ_REPLICA_ENABLED and DB_BREAKER_ENABLED:
+        # réplica fora não derruba o health: as leituras voltam para o primário
+        body["db_leitura"] = _db_read_breaker.snapshot()
+    if _valores_cache.enabled:
+        body["cache_valores"] = _valores_cache.stats()
+    if THROTTLE_ENABLED and _admission.enabled:
+        body["admissao"] = _admission.snapshot()
+    body["logs"] = _log_pipeline.stats()
+    if _memory_state["recycling"]:
+        # informativo: o status segue o nó (os demais workers atendem; este sai sozinho)
+        body["reciclando"] = True
+    resp = jsonify(body)
+    resp.status_code = 200 if ok else 503
+    if not ok and db.get("retry_after"):
+        resp.headers["Retry-After"] = str(db["retry_after"])
+    return resp
+
+@app.route("/api/admin/db", methods=["GET"])
+@require_level(5)
+def api_admin_db():
+    """Circuit breakers do banco com o último erro de conexão (por worker)."""
+    if not DB_BREAKER_ENABLED:
+        return jsonify({"ok": True, "db": {"state": "DISABLED"}})
+    body = {"ok": True, "db": _db_breaker.snapshot(include_error=True)}
+    if DB_READ_REPLICA_ENABLED:
+        body["db_leitura"] = _db_read_breaker.snapshot(include_error=True)
+    return jsonify(body)
+
 # =========================
 # 7) AUTH ROUTES
 # =========================
@@ -717,6 +1771,8 @@ def api_auth_login():
             cur = conn.cursor()
             user = _fetch_user_by_email(cur, email)
             if not user or not user["ativo"]:
+                # mesmo custo de bcrypt de um usuário existente (não revela quais emails existem)
+                verify_password(senha, _dummy_password_hash())
                 return jsonify({"ok": False, "error": "Usuário/senha inválidos"}), 401
             if not user.get("senha_hash") or not verify_password(senha, user["senha_hash"]):
                 return jsonify({"ok": False, "error": "Usuário/senha inválidos"}), 401
@@ -779,26 +1835,19 @@ def api_setores():
         cur = conn.cursor()
 
         if user and not _is_gestao_or_admin(user):
-            setor_ids = set()
-            if user.get("setor_id") is not None:
-                setor_ids.add(int(user["setor_id"]))
-
-            if int(user.get("nivel") or 1) in (2, 3):
-                setor_ids.update(_get_assigned_sector_ids(cur, int(user["id"])))
-
+            setor_ids = user["scope"].visible_setor_ids
             if not setor_ids:
                 return jsonify([])
 
             placeholders = ",".join(["?"] * len(setor_ids))
             cur.execute(
-                f"SELECT ZSE_ID, ZSE_NOME, ZSE_ATIVO FROM ZSE WHERE ZSE_ATIVO = 1 AND ZSE_ID IN ({placeholders}) ORDER BY ZSE_NOME",
+                f"SELECT {Setor.select_list()} FROM ZSE WHERE ZSE_ATIVO = 1 AND ZSE_ID IN ({placeholders}) ORDER BY ZSE_NOME",
                 tuple(setor_ids)
             )
         else:
-            cur.execute("SELECT ZSE_ID, ZSE_NOME, ZSE_ATIVO FROM ZSE WHERE ZSE_ATIVO = 1 ORDER BY ZSE_NOME")
+            cur.execute(f"SELECT {Setor.select_list()} FROM ZSE WHERE ZSE_ATIVO = 1 ORDER BY ZSE_NOME")
 
-        rows = cur.fetchall()
-        return jsonify(_rows_to_dicts(cur, rows))
+        return jsonify(Setor.from_rows(cur.fetchall()))
 
 @app.route("/api/gestor/funcionarios", methods=["GET"])
 @require_level(3)
@@ -841,7 +1890,7 @@ def api_create_setor():
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT 1 FROM ZSE WHERE LOWER(ZSE_NOME) = LOWER(?)", (nome,))
+            cur.execute("SELECT 1 FROM ZSE WHERE ZSE_NOME_NORM = ?", (_normalize_nome(nome),))
             if cur.fetchone():
                 return jsonify({"ok": False, "error": "Setor ja existe"}), 409
 
@@ -882,6 +1931,14 @@ def api_update_setor(setor_id: int):
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
+            if "nome" in payload:
+                cur.execute(
+                    "SELECT 1 FROM ZSE WHERE ZSE_NOME_NORM = ? AND ZSE_ID <> ?",
+                    (_normalize_nome(payload.get("nome")), setor_id)
+                )
+                if cur.fetchone():
+                    return jsonify({"ok": False, "error": "Setor ja existe"}), 409
+
             cur.execute(
                 f"UPDATE ZSE SET {', '.join(fields)} WHERE ZSE_ID = ?",
                 params
@@ -904,82 +1961,72 @@ def api_indicadores():
     if not user and not ALLOW_PUBLIC_READS:
         return jsonify({"ok": False, "error": "Token ausente"}), 401
     setor_id = request.args.get("setorId") or request.args.get("setor_id")
+    scope = user["scope"] if user else None
 
-    with get_db_connection() as conn:
-        cur = conn.cursor()
-
-        if setor_id:
-            setor_id_int = int(setor_id)
-            filter_mode = "all"
-
-            if user and not _is_gestao_or_admin(user):
-                allowed = False
-                if user.get("setor_id") is not None and int(user["setor_id"]) == setor_id_int:
-                    allowed = True
-                    filter_mode = "own"
-                elif int(user.get("nivel") or 1) in (2, 3):
-                    assigned = _get_assigned_sector_ids(cur, int(user["id"]))
-                    if setor_id_int in assigned:
-                        allowed = True
-                        filter_mode = "assigned"
-
-                if not allowed:
-                    return jsonify({"ok": False, "error": "Acesso negado a este setor"}), 403
-
-            if user and not _is_gestao_or_admin(user):
-                if filter_mode == "assigned":
-                    cur.execute(
-                        "SELECT ZIN_ID, ZIN_SETOR_ID, ZIN_CODIGO, ZIN_NOME, ZIN_TIPO, ZIN_UNIDADE, ZIN_META, ZIN_ATIVO, ZIN_RESPONSAVEL_ID "
-                        "FROM ZIN WHERE ZIN_ATIVO = 1 AND ZIN_SETOR_ID = ? AND ZIN_RESPONSAVEL_ID = ? ORDER BY ZIN_CODIGO",
-                        (setor_id_int, int(user["id"]))
-                    )
-                else:
-                    if int(user.get("nivel") or 1) == 2:
-                        cur.execute(
-                            "SELECT ZIN_ID, ZIN_SETOR_ID, ZIN_CODIGO, ZIN_NOME, ZIN_TIPO, ZIN_UNIDADE, ZIN_META, ZIN_ATIVO, ZIN_RESPONSAVEL_ID "
-                            "FROM ZIN WHERE ZIN_ATIVO = 1 AND ZIN_SETOR_ID = ? AND (ZIN_RESPONSAVEL_ID IS NULL OR ZIN_RESPONSAVEL_ID = ?) ORDER BY ZIN_CODIGO",
-                            (setor_id_int, int(user["id"]))
-                        )
-                    else:
-                        cur.execute(
-                            "SELECT ZIN_ID, ZIN_SETOR_ID, ZIN_CODIGO, ZIN_NOME, ZIN_TIPO, ZIN_UNIDADE, ZIN_META, ZIN_ATIVO, ZIN_RESPONSAVEL_ID "
-                            "FROM ZIN WHERE ZIN_ATIVO = 1 AND ZIN_SETOR_ID = ? ORDER BY ZIN_CODIGO",
-                            (setor_id_int,)
-                        )
-            else:
-                cur.execute(
-                    "SELECT ZIN_ID, ZIN_SETOR_ID, ZIN_CODIGO, ZIN_NOME, ZIN_TIPO, ZIN_UNIDADE, ZIN_META, ZIN_ATIVO, ZIN_RESPONSAVEL_ID "
-                    "FROM ZIN WHERE ZIN_ATIVO = 1 AND ZIN_SETOR_ID = ? ORDER BY ZIN_CODIGO",
-                    (setor_id_int,)
-                )
+    where, params = ["ZIN_ATIVO = 1"], []
+    if setor_id:
+        if scope:
+            try:
+                setor_where, setor_params = scope.indicator_filter(int(setor_id))
+            except PermissionError as e:
+                return jsonify({"ok": False, "error": str(e)}), 403
         else:
-            # para nao expor sem setorId
-            if user and not _is_gestao_or_admin(user):
-                return jsonify({"ok": False, "error": "Informe setorId/setor_id"}), 400
+            setor_where, setor_params = ["ZIN_SETOR_ID = ?"], [int(setor_id)]
+        where += setor_where
+        params += setor_params
+        order_by = "ZIN_CODIGO"
+    else:
+        # para nao expor sem setorId
+        if scope and not scope.is_global:
+            return jsonify({"ok": False, "error": "Informe setorId/setor_id"}), 400
+        order_by = "ZIN_SETOR_ID, ZIN_CODIGO"
 
-            cur.execute(
-                "SELECT ZIN_ID, ZIN_SETOR_ID, ZIN_CODIGO, ZIN_NOME, ZIN_TIPO, ZIN_UNIDADE, ZIN_META, ZIN_ATIVO, ZIN_RESPONSAVEL_ID "
-                "FROM ZIN WHERE ZIN_ATIVO = 1 ORDER BY ZIN_SETOR_ID, ZIN_CODIGO"
-            )
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT {Indicador.select_list()} FROM ZIN WHERE {' AND '.join(where)} ORDER BY {order_by}",
+            params
+        )
+        items = Indicador.from_rows(cur.fetchall())
 
-        rows = cur.fetchall()
-        items = _rows_to_dicts(cur, rows)
-        if user and int(user.get("nivel") or 1) == 3:
-            for item in items:
-                resp = item.get("ZIN_RESPONSAVEL_ID")
-                if resp is not None and int(resp) != int(user["id"]):
-                    item["read_only"] = True
-                else:
-                    item["read_only"] = False
-        if user and int(user.get("nivel") or 1) == 1:
-            for item in items:
-                item["read_only"] = True
+    if scope and scope.nivel in (1, 3):
+        for item in items:
+            item.read_only = scope.read_only(item.responsavel_id)
 
-        return jsonify(items)
+    return jsonify(items)
 
 # =========================
 # 9) VALORES (DEFINITIVO) - GET/POST
 # =========================
+# Resposta de GET /api/valores por (setor, período). Toda escrita em ZIV chama
+# _invalidate_valores com os pares afetados, depois do commit.
+_valores_cache = ResultCache(VALORES_CACHE_MB * 1024 * 1024, ttl_sec=VALORES_CACHE_TTL_SEC)
+
+def _valores_cache_key(setor_id, periodo) -> tuple[int, str] | None:
+    try:
+        if not isinstance(periodo, date):
+            periodo = datetime.strptime(str(periodo)[:10], "%Y-%m-%d").date()
+        return int(setor_id), periodo.isoformat()
+    except (TypeError, ValueError):
+        return None
+
+def _invalidate_valores(pares):
+    """pares: iterável de (setor_id, periodo) cujos valores definitivos mudaram."""
+    keys = {k for k in (_valores_cache_key(s, p) for s, p in pares) if k is not None}
+    if keys:
+        _valores_cache.invalidate(keys)
+
+def _cache_bypass_requested() -> bool:
+    """X-Cache-Bypass: 1 ou Cache-Control: no-cache ignoram o cache (depuração)."""
+    if (request.headers.get("X-Cache-Bypass") or "").strip().lower() in ("1", "true", "yes", "y"):
+        return True
+    return "no-cache" in (request.headers.get("Cache-Control") or "").lower()
+
+def _cached_json_response(data: bytes, status: str):
+    response = app.response_class(data, mimetype="application/json")
+    response.headers["X-Cache"] = status
+    return response
+
 @app.route("/api/valores", methods=["GET"])
 @require_level(1)
 def api_listar_valores():
@@ -990,39 +2037,52 @@ def api_listar_valores():
     if not setor_id or not periodo:
         return jsonify({"ok": False, "error": "Informe setor_id e periodo"}), 400
 
-    setor_id = int(setor_id)
     try:
-        _enforce_setor_access(user, setor_id)
+        setor_id = int(setor_id)
+    except ValueError:
+        return jsonify({"ok": False, "error": "setor_id deve ser inteiro"}), 400
+    try:
+        _enforce_setor_access(user, setor_id, allow_assigned=True)
     except PermissionError:
-        allowed = False
-        if int(user.get("nivel") or 1) in (2, 3):
-            with get_db_connection() as conn:
-                cur = conn.cursor()
-                assigned = _get_assigned_sector_ids(cur, int(user["id"]))
-                if int(setor_id) in assigned:
-                    allowed = True
-        if not allowed:
-            return jsonify({"ok": False, "error": "Acesso negado a este setor"}), 403
+        return jsonify({"ok": False, "error": "Acesso negado a este setor"}), 403
 
     p = str(periodo)
     if len(p) == 7:
         p = p + "-01"
 
+    # acesso já validado acima: o conteúdo só depende de setor+período
+    key = _valores_cache_key(setor_id, p)
+    bypass = key is None or not _valores_cache.enabled or _cache_bypass_requested()
+    if not bypass:
+        cached = _valores_cache.get(key)
+        if cached is not None:
+            return _cached_json_response(cached, "HIT")
+        generation = _valores_cache.generation(key)
+        from_replica = _use_read_replica()
+
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
             cur.execute(
-                "SELECT ZIV_ID, ZIV_INDICADOR_ID, ZIV_SETOR_ID, ZIV_FUNCIONARIO_ID, ZIV_PERIODO, ZIV_VALOR, ZIV_CRIADO_EM, ZIV_ATUALIZADO_EM "
-                "FROM ZIV WHERE ZIV_SETOR_ID = ? AND ZIV_PERIODO = ? ORDER BY ZIV_INDICADOR_ID",
+                f"SELECT {Valor.select_list()} FROM ZIV WHERE ZIV_SETOR_ID = ? AND ZIV_PERIODO = ? ORDER BY ZIV_INDICADOR_ID",
                 (setor_id, p)
             )
-            rows = cur.fetchall()
-            return jsonify(_rows_to_dicts(cur, rows))
+            response = jsonify(Valor.from_rows(cur.fetchall()))
     except Exception as e:
         return _error_response(500, "Erro interno", e)
 
+    if bypass:
+        response.headers["X-Cache"] = "BYPASS"
+        return response
+    # logo após uma escrita a réplica pode não ter o valor novo: não guarda o que leu dela
+    if not (from_replica and _valores_cache.invalidated_within(key, DB_READ_AFTER_WRITE_SEC)):
+        _valores_cache.put(key, response.get_data(), generation)
+    response.headers["X-Cache"] = "MISS"
+    return response
+
 @app.route("/api/valores", methods=["POST"])
 @require_level(3)
+@idempotent
 def api_salvar_valores_definitivos():
     """
     Somente nível 3+ (LIDER) salva definitivo.
@@ -1063,30 +2123,30 @@ def api_salvar_valores_definitivos():
 
     now = datetime.utcnow()
 
-    try:
+    # deadlock/timeout de lock com outra gravação do mesmo setor/período: a transação
+    # inteira é refeita (o MERGE é idempotente)
+    afetados = set()
+
+    @_db_retry
+    def _gravar():
         with get_db_connection() as conn:
             cur = conn.cursor()
 
             setor_id_db = _get_or_create_setor(cur, setor_id, setor_nome)
+            afetados.add((setor_id_db, periodo_date))
 
             # RBAC setor (permite setor atribuido para nivel 2/3)
             try:
-                _enforce_setor_access(user, int(setor_id_db))
+                _enforce_setor_access(user, int(setor_id_db), allow_assigned=True)
             except PermissionError:
-                allowed = False
-                if int(user.get("nivel") or 1) in (2, 3):
-                    assigned = _get_assigned_sector_ids(cur, int(user["id"]))
-                    if int(setor_id_db) in assigned:
-                        allowed = True
-                if not allowed:
-                    return jsonify({'ok': False, 'error': 'Acesso negado a este setor'}), 403
+                return jsonify({'ok': False, 'error': 'Acesso negado a este setor'}), 403
 
             funcionario_id_db = _get_or_create_funcionario(
                 cur, funcionario_id, funcionario_email, funcionario_nome,
                 setor_id=setor_id_db
             )
 
-            status = "PENDING" if int(user.get("nivel") or 1) == 2 else "DRAFT"
+            catalog = _load_setor_indicadores(cur, setor_id_db)
 
             for item in valores:
                 if not isinstance(item, dict):
@@ -1103,50 +2163,52 @@ def api_salvar_valores_definitivos():
                 if not ind_id and ind_codigo is None:
                     continue
 
-                ind_id_db = _get_or_create_indicador(
-                    cur, ind_id, setor_id_db, ind_codigo,
+                ind_id_db, ind_setor_id, resp_id = _resolve_indicador(
+                    cur, catalog, ind_id, setor_id_db, ind_codigo,
                     ind_nome or f"Indicador {ind_codigo}",
                     tipo=ind_tipo, unidade=ind_unidade, meta=ind_meta
                 )
-
-                ind_setor_id, resp_id = _get_indicator_access(cur, ind_id_db)
                 if ind_setor_id is None:
                     return jsonify({"ok": False, "error": "Indicador nao encontrado"}), 400
-                if int(user.get("nivel") or 1) < 4:
-                    if not _can_user_fill_indicator(user, ind_setor_id, resp_id):
-                        return jsonify({"ok": False, "error": "Sem permissao para preencher este indicador"}), 403
+                if not user["scope"].can_fill(ind_setor_id, resp_id):
+                    return jsonify({"ok": False, "error": "Sem permissao para preencher este indicador"}), 403
 
+                valor_num, valor_data = _catalog_valor_tipado(cur, catalog, ind_id_db, valor)
                 cur.execute("""
-                    MERGE ZIV AS tgt
+                    MERGE ZIV WITH (HOLDLOCK) AS tgt
                     USING (SELECT ? AS ZIV_INDICADOR_ID, ? AS ZIV_SETOR_ID, ? AS ZIV_PERIODO) AS src
                     ON tgt.ZIV_INDICADOR_ID = src.ZIV_INDICADOR_ID AND tgt.ZIV_SETOR_ID = src.ZIV_SETOR_ID AND tgt.ZIV_PERIODO = src.ZIV_PERIODO
                     WHEN MATCHED THEN
-                        UPDATE SET ZIV_VALOR = ?, ZIV_ATUALIZADO_EM = ?, ZIV_FUNCIONARIO_ID = ?
+                        UPDATE SET ZIV_VALOR = ?, ZIV_VALOR_NUM = ?, ZIV_VALOR_DATA = ?, ZIV_ATUALIZADO_EM = ?, ZIV_FUNCIONARIO_ID = ?
                     WHEN NOT MATCHED THEN
-                        INSERT (ZIV_INDICADOR_ID, ZIV_SETOR_ID, ZIV_FUNCIONARIO_ID, ZIV_PERIODO, ZIV_VALOR, ZIV_CRIADO_EM, ZIV_ATUALIZADO_EM)
-                        VALUES (?, ?, ?, ?, ?, ?, ?);
+                        INSERT (ZIV_INDICADOR_ID, ZIV_SETOR_ID, ZIV_FUNCIONARIO_ID, ZIV_PERIODO, ZIV_VALOR, ZIV_VALOR_NUM, ZIV_VALOR_DATA, ZIV_CRIADO_EM, ZIV_ATUALIZADO_EM)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
                 """,
                 ind_id_db, setor_id_db, periodo_date,
-                str(valor) if valor is not None else None, now, funcionario_id_db,
+                str(valor) if valor is not None else None, valor_num, valor_data, now, funcionario_id_db,
                 ind_id_db, setor_id_db, funcionario_id_db, periodo_date,
-                str(valor) if valor is not None else None, now, now)
+                str(valor) if valor is not None else None, valor_num, valor_data, now, now)
 
             conn.commit()
 
         return jsonify({"ok": True})
+
+    try:
+        return _gravar()
     except ValueError as e:
         return jsonify({"ok": False, "error": str(e)}), 400
     except Exception as e:
-        print("[ERRO] /api/valores:", str(e))
-        print(traceback.format_exc())
         return _error_response(500, "Erro interno", e)
+    finally:
+        # também nas saídas 400/403 no meio do loop: o que já foi gravado é commitado
+        _invalidate_valores(afetados)
 
 @app.route("/api/valores/<int:valor_id>", methods=["PUT"])
 @require_level(4)
 def api_update_valor(valor_id: int):
     """
     Edicao de valor definitivo (somente Gestao/ADM).
-    Body: { valor, funcionario_id? }
+    Body: { valor, funcionario_id?, versao? } (versao também aceita via If-Match)
     """
     user = request.current_user
     payload = request.get_json(force=True, silent=True) or {}
@@ -1162,38 +2224,358 @@ def api_update_valor(valor_id: int):
         funcionario_id = int(funcionario_id)
 
     try:
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "SELECT ZIV_ID, ZIV_SETOR_ID, ZIV_FUNCIONARIO_ID FROM ZIV WHERE ZIV_ID = ?",
-                (int(valor_id),)
-            )
-            row = cur.fetchone()
-            if not row:
-                return jsonify({"ok": False, "error": "Valor nao encontrado"}), 404
-
-            _, setor_id, func_id_current = row
-            _enforce_setor_access(user, int(setor_id))
-
-            func_id_to_set = func_id_current if funcionario_id is None else funcionario_id
-
-            cur.execute(
-                "UPDATE ZIV SET ZIV_VALOR = ?, ZIV_FUNCIONARIO_ID = ?, ZIV_ATUALIZADO_EM = SYSUTCDATETIME() WHERE ZIV_ID = ?",
-                (str(valor) if valor is not None else None, func_id_to_set, int(valor_id))
-            )
-            conn.commit()
-            _log_action(request.current_user, "valor_atualizar", f"valor_id={valor_id}")
-            return jsonify({"ok": True})
+        versao = _parse_versao(payload.get("versao") or request.headers.get("If-Match", "").strip('"'))
+        return _update_valor(user, valor_id, valor, funcionario_id, versao)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
     except PermissionError as e:
         return jsonify({"ok": False, "error": str(e)}), 403
     except Exception as e:
         return _error_response(500, "Erro interno", e)
 
+@_db_retry
+def _update_valor(user: dict, valor_id: int, valor, funcionario_id: int | None, versao: bytes | None):
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT v.ZIV_ID, v.ZIV_SETOR_ID, v.ZIV_FUNCIONARIO_ID, v.ZIV_VERSAO, v.ZIV_PERIODO, i.ZIN_UNIDADE "
+            "FROM ZIV v INNER JOIN ZIN i ON i.ZIN_ID = v.ZIV_INDICADOR_ID WHERE v.ZIV_ID = ?",
+            (int(valor_id),)
+        )
+        row = cur.fetchone()
+        if not row:
+            return jsonify({"ok": False, "error": "Valor nao encontrado"}), 404
+
+        _, setor_id, func_id_current, atual, periodo, unidade = row
+        _enforce_setor_access(user, int(setor_id))
+        if versao is not None and bytes(atual) != versao:
+            return jsonify({"ok": False, "error": "Valor alterado por outro usuario; recarregue"}), 409
+
+        func_id_to_set = func_id_current if funcionario_id is None else funcionario_id
+        valor_num, valor_data = valor_tipado(valor, unidade)
+
+        # ZIV_VERSAO no WHERE: se outra transação gravou entre o SELECT e aqui, nada é sobrescrito
+        cur.execute(
+            "UPDATE ZIV SET ZIV_VALOR = ?, ZIV_VALOR_NUM = ?, ZIV_VALOR_DATA = ?, ZIV_FUNCIONARIO_ID = ?, "
+            "ZIV_ATUALIZADO_EM = SYSUTCDATETIME() "
+            "OUTPUT INSERTED.ZIV_VERSAO WHERE ZIV_ID = ? AND ZIV_VERSAO = ?",
+            (str(valor) if valor is not None else None, valor_num, valor_data, func_id_to_set, int(valor_id), atual)
+        )
+        nova = cur.fetchone()
+        if not nova:
+            conn.rollback()
+            return jsonify({"ok": False, "error": "Valor alterado por outro usuario; recarregue"}), 409
+        conn.commit()
+    _invalidate_valores([(setor_id, periodo)])
+    _log_action(user, "valor_atualizar", f"valor_id={valor_id}")
+    return jsonify({"ok": True, "versao": bytes(nova[0]).hex()})
+
+# =========================
+# 9.1) IMPORTAÇÃO DE VALORES (CSV/XLSX)
+# =========================
+_IMPORT_STAGING_SQL = """
+IF OBJECT_ID('tempdb..#ZIV_IMPORT') IS NOT NULL DROP TABLE #ZIV_IMPORT;
+CREATE TABLE #ZIV_IMPORT (
+    INDICADOR_ID INT NOT NULL,
+    SETOR_ID INT NOT NULL,
+    PERIODO DATE NOT NULL,
+    VALOR NVARCHAR(200) NULL,
+    VALOR_NUM DECIMAL(19,4) NULL,
+    VALOR_DATA DATE NULL,
+    PRIMARY KEY (INDICADOR_ID, SETOR_ID, PERIODO)
+);
+"""
+
+_IMPORT_MERGE_SQL = """
+SET NOCOUNT ON;
+DECLARE @acoes TABLE (ACAO NVARCHAR(10));
+MERGE ZIV WITH (HOLDLOCK) AS tgt
+USING #ZIV_IMPORT AS src
+ON tgt.ZIV_INDICADOR_ID = src.INDICADOR_ID AND tgt.ZIV_SETOR_ID = src.SETOR_ID AND tgt.ZIV_PERIODO = src.PERIODO
+WHEN MATCHED THEN
+    UPDATE SET ZIV_VALOR = src.VALOR, ZIV_VALOR_NUM = src.VALOR_NUM, ZIV_VALOR_DATA = src.VALOR_DATA,
+               ZIV_ATUALIZADO_EM = ?, ZIV_FUNCIONARIO_ID = ?
+WHEN NOT MATCHED THEN
+    INSERT (ZIV_INDICADOR_ID, ZIV_SETOR_ID, ZIV_FUNCIONARIO_ID, ZIV_PERIODO, ZIV_VALOR, ZIV_VALOR_NUM, ZIV_VALOR_DATA, ZIV_CRIADO_EM, ZIV_ATUALIZADO_EM)
+    VALUES (src.INDICADOR_ID, src.SETOR_ID, ?, src.PERIODO, src.VALOR, src.VALOR_NUM, src.VALOR_DATA, ?, ?)
+OUTPUT $action INTO @acoes;
+SELECT
+    SUM(CASE WHEN ACAO = 'INSERT' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN ACAO = 'UPDATE' THEN 1 ELSE 0 END)
+FROM @acoes;
+"""
+
+def _import_resolve_setor(cur, state: dict, raw) -> int:
+    """Setor por id (numérico) ou nome; RBAC verificado uma vez por setor."""
+    key = str(raw).strip() if raw is not None else ""
+    if not key:
+        raise ValueError("setor vazio")
+    if isinstance(raw, float) and raw.is_integer():
+        key = str(int(raw))
+
+    cached = state["setores"].get(key)
+    if cached is None:
+        if key.isdigit():
+            cur.execute("SELECT ZSE_ID FROM ZSE WHERE ZSE_ID = ?", (int(key),))
+        else:
+            cur.execute("SELECT ZSE_ID FROM ZSE WHERE ZSE_NOME_NORM = ?", (_normalize_nome(key),))
+        row = cur.fetchone()
+        if not row:
+            cached = "setor nao encontrado"
+        else:
+            setor_id = int(row[0])
+            try:
+                state["scope"].check_setor(setor_id, allow_assigned=True)
+                cached = setor_id
+            except PermissionError:
+                cached = "acesso negado a este setor"
+        state["setores"][key] = cached
+
+    if isinstance(cached, str):
+        raise ValueError(cached)
+    return cached
+
+def _import_resolve_indicador(cur, state: dict, setor_id: int, row: dict) -> int:
+    """Indicador pelo catálogo do setor (não cria indicadores) + permissão de preenchimento."""
+    catalog = state["catalogos"].get(setor_id)
+    if catalog is None:
+        catalog = state["catalogos"][setor_id] = _load_setor_indicadores(cur, setor_id)
+
+    raw_id = row.get("indicador_id")
+    raw_codigo = row.get("indicador")
+    ind_id = None
+    if raw_id not in (None, ""):
+        try:
+            ind_id = int(float(raw_id))
+        except (TypeError, ValueError):
+            raise ValueError("indicador_id inválido") from None
+        if ind_id not in catalog["by_id"]:
+            raise ValueError("indicador nao pertence ao setor")
+    else:
+        codigo = str(int(raw_codigo)) if isinstance(raw_codigo, float) and raw_codigo.is_integer() else str(raw_codigo or "").strip()
+        if not codigo:
+            raise ValueError("indicador vazio")
+        ind_id = catalog["by_codigo"].get(codigo)
+        if ind_id is None:
+            raise ValueError("indicador nao encontrado no setor")
+
+    ind_setor_id, resp_id = catalog["by_id"][ind_id]
+    if not state["scope"].can_fill(ind_setor_id, resp_id):
+        raise ValueError("sem permissao para preencher este indicador")
+    return ind_id
+
+def _import_valores_chunk(cur, state: dict, chunk: list, report: ImportErrorReport) -> dict:
+    """Valida um lote e devolve {(indicador, setor, periodo): (valor, numero, data)} (última linha vence)."""
+    valid = {}
+    for linha, row in chunk:
+        try:
+            setor_id = _import_resolve_setor(cur, state, row.get("setor"))
+            ind_id = _import_resolve_indicador(cur, state, setor_id, row)
+            periodo = parse_periodo(row.get("periodo"))
+            valor = format_valor(row.get("valor"))
+            if valor is None:
+                raise ValueError("valor vazio")
+            if len(valor) > 200:
+                raise ValueError("valor excede 200 caracteres")
+        except ValueError as e:
+            report.add(linha, str(e), row)
+            continue
+
+        key = (ind_id, setor_id, periodo)
+        if key in valid:
+            state["stats"]["duplicadas"] += 1
+        unidade = state["catalogos"][setor_id]["unidades"].get(ind_id)
+        valid[key] = (valor, *valor_tipado(valor, unidade))
+    return valid
+
+def import_valores(user: dict, stream, filename: str | None = None, content_type: str | None = None,
+                   dry_run: bool = False, on_batch=None) -> dict:
+    """
+    Importa valores definitivos (ZIV) de um CSV/XLSX lido em streaming.
+    Lotes de IMPORT_BATCH_SIZE: validação contra o catálogo/RBAC, carga em #ZIV_IMPORT
+    (executemany) e um MERGE por lote, com commit por lote (reimportar o mesmo
+    arquivo é idempotente). Linhas inválidas vão para um relatório CSV.
+    Levanta ImportFormatError para arquivo ilegível/sem colunas.
+    `on_batch(stats)` é chamado após cada lote (progresso/cancelamento dos jobs).
+    """
+    cleanup_reports(IMPORT_REPORT_DIR, IMPORT_REPORT_TTL_HOURS * 3600)
+    report = ImportErrorReport(IMPORT_REPORT_DIR, user["id"])
+    stats = {"linhas": 0, "validas": 0, "inseridas": 0, "atualizadas": 0, "duplicadas": 0, "lotes": 0}
+    state = {"scope": user["scope"], "setores": {}, "catalogos": {}, "stats": stats}
+    started = time()
+
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            if not dry_run:
+                cur.execute(_IMPORT_STAGING_SQL)
+
+            for chunk in chunked(iter_import_rows(stream, filename, content_type), IMPORT_BATCH_SIZE):
+                stats["linhas"] += len(chunk)
+                if IMPORT_MAX_ROWS and stats["linhas"] > IMPORT_MAX_ROWS:
+                    raise ImportFormatError(f"Arquivo excede {IMPORT_MAX_ROWS} linhas")
+
+                valid = _import_valores_chunk(cur, state, chunk, report)
+                stats["validas"] += len(valid)
+                stats["lotes"] += 1
+                if not dry_run and valid:
+                    now = datetime.utcnow()
+                    cur.execute("TRUNCATE TABLE #ZIV_IMPORT")
+                    cur.fast_executemany = True
+                    cur.executemany(
+                        "INSERT INTO #ZIV_IMPORT (INDICADOR_ID, SETOR_ID, PERIODO, VALOR, VALOR_NUM, VALOR_DATA) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        [key + tipado for key, tipado in valid.items()]
+                    )
+                    cur.fast_executemany = False
+                    cur.execute(_IMPORT_MERGE_SQL, now, user["id"], user["id"], now, now)
+                    counts = cur.fetchone()
+                    if counts:
+                        stats["inseridas"] += int(counts[0] or 0)
+                        stats["atualizadas"] += int(counts[1] or 0)
+                    conn.commit()
+                    _invalidate_valores({(setor_id, periodo) for _, setor_id, periodo in valid})
+                if on_batch:
+                    on_batch(stats)
+
+            if not dry_run:
+                cur.execute("DROP TABLE #ZIV_IMPORT")
+    finally:
+        report.close()
+
+    _log_action(
+        user, "valores_importar",
+        f"linhas={stats['linhas']} validas={stats['validas']} erros={report.count} dry_run={int(dry_run)}"
+    )
+    return {
+        "ok": True,
+        "dry_run": dry_run,
+        **stats,
+        "erros": report.count,
+        "erros_amostra": report.sample,
+        "relatorio_erros": f"/api/import/valores/erros/{report.report_id}" if report.has_file else None,
+        "duracao_ms": int((time() - started) * 1000),
+    }
+
+def _import_upload():
+    """(stream, filename, content_type) do upload: multipart "arquivo" ou corpo cru."""
+    upload = request.files.get("arquivo") or request.files.get("file")
+    if upload is not None:
+        return upload.stream, upload.filename, upload.mimetype
+    if request.mimetype in ("text/csv", "text/plain", "application/octet-stream",
+                            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"):
+        return request.stream, request.args.get("filename"), request.mimetype
+    return None
+
+@app.route("/api/import/valores", methods=["POST"])
+@require_level(3)
+def api_import_valores():
+    """
+    Importação de histórico de valores definitivos (ZIV) a partir de CSV/XLSX.
+    Envio: multipart (campo "arquivo") ou corpo cru (Content-Type text/csv).
+    Colunas: setor (id ou nome), indicador (código) ou indicador_id, periodo, valor.
+    Query: dry_run=1 só valida.
+    Para arquivos grandes, prefira POST /api/jobs/import-valores (em segundo plano).
+    """
+    upload = _import_upload()
+    if upload is None:
+        return jsonify({"ok": False, "error": "Envie o arquivo CSV/XLSX no campo 'arquivo'"}), 400
+
+    try:
+        return jsonify(import_valores(request.current_user, *upload, dry_run=_arg_flag("dry_run")))
+    except ImportFormatError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception as e:
+        return _error_response(500, "Erro interno", e)
+
+@app.route("/api/import/valores/erros/<report_id>", methods=["GET"])
+@require_level(3)
+def api_import_valores_erros(report_id: str):
+    """Relatório CSV de linhas rejeitadas de uma importação (dono ou Gestão/ADM)."""
+    user = request.current_user
+    found = resolve_report(IMPORT_REPORT_DIR, report_id)
+    if not found:
+        return jsonify({"ok": False, "error": "Relatorio nao encontrado"}), 404
+    owner_id, path = found
+    if owner_id != int(user["id"]) and int(user["nivel"]) < 4:
+        return jsonify({"ok": False, "error": "Relatorio nao encontrado"}), 404
+    return send_file(path, mimetype="text/csv", as_attachment=True, download_name=f"erros_importacao_{report_id[-8:]}.csv")
+
+# =========================
+# 9.2) VALORES TIPADOS (BACKFILL)
+# =========================
+def backfill_valores_tipados(batch_size: int | None = None, max_batches: int | None = None,
+                             progress=None, tabelas=("ZIV", "ZDR", "ZDH")) -> dict:
+    """
+    Preenche *_VALOR_NUM/*_VALOR_DATA das linhas gravadas antes da migração 0005.
+    - Percorre cada tabela pelo id (keyset), um lote por transação, com a mesma
+      conversão da gravação (valor_tipado + ZIN_UNIDADE).
+    - Só lê linhas com as duas colunas NULL: pode ser interrompido e repetido.
+    - O UPDATE confere o texto: se a linha foi regravada no meio, fica como está.
+    """
+    batch_size = min(max(int(batch_size or BACKFILL_BATCH_SIZE), 1), ARCHIVE_MAX_BATCH_SIZE)
+    report = progress or (lambda msg: app.logger.info("[BACKFILL] %s", msg))
+    result = {"ok": True, "lidas": 0, "atualizadas": 0, "lotes": 0}
+
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        for t in tabelas:
+            ultimo = 0
+            while max_batches is None or result["lotes"] < int(max_batches):
+                cur.execute(
+                    f"SELECT TOP (?) t.{t}_ID, t.{t}_SETOR_ID, t.{t}_PERIODO, t.{t}_VALOR, i.ZIN_UNIDADE "
+                    f"FROM {t} t INNER JOIN ZIN i ON i.ZIN_ID = t.{t}_INDICADOR_ID "
+                    f"WHERE t.{t}_ID > ? AND t.{t}_VALOR IS NOT NULL "
+                    f"AND t.{t}_VALOR_NUM IS NULL AND t.{t}_VALOR_DATA IS NULL "
+                    f"ORDER BY t.{t}_ID",
+                    (batch_size, ultimo)
+                )
+                rows = cur.fetchall()
+                if not rows:
+                    break
+                ultimo = int(rows[-1][0])
+
+                updates, pares = [], set()
+                for row_id, setor_id, periodo, valor, unidade in rows:
+                    valor_num, valor_data = valor_tipado(valor, unidade)
+                    if valor_num is not None or valor_data is not None:
+                        updates.append((valor_num, valor_data, row_id, valor))
+                        pares.add((setor_id, periodo))
+                if updates:
+                    cur.fast_executemany = True
+                    cur.executemany(
+                        f"UPDATE {t} SET {t}_VALOR_NUM = ?, {t}_VALOR_DATA = ? WHERE {t}_ID = ? AND {t}_VALOR = ?",
+                        updates
+                    )
+                    cur.fast_executemany = False
+                conn.commit()
+                if t == "ZIV":
+                    _invalidate_valores(pares)
+
+                result["lotes"] += 1
+                result["lidas"] += len(rows)
+                result["atualizadas"] += len(updates)
+                report(f"{t} lote {result['lotes']}: {len(updates)}/{len(rows)} convertidas (ate id {ultimo})")
+                if len(rows) < batch_size:
+                    break
+
+    _log_action(None, "valores_backfill", f"lidas={result['lidas']} atualizadas={result['atualizadas']}")
+    return result
+
+@app.cli.command("backfill-valores")
+@click.option("--batch-size", type=int, default=None, help="Linhas por transacao (padrao: BACKFILL_BATCH_SIZE).")
+@click.option("--max-batches", type=int, default=None, help="Limita a quantidade de lotes nesta execucao.")
+def cli_backfill_valores(batch_size, max_batches):
+    """Preenche *_VALOR_NUM e *_VALOR_DATA (ZIV, ZDR e ZDH) de valores gravados antes da migracao 0005."""
+    result = backfill_valores_tipados(batch_size=batch_size, max_batches=max_batches, progress=click.echo)
+    click.echo(f"lidas={result['lidas']} atualizadas={result['atualizadas']} lotes={result['lotes']}")
+
 # =========================
 # 10) DRAFTS (rascunhos) - POST/GET/SUBMIT/APPROVE
 # =========================
 @app.route("/api/drafts", methods=["POST"])
 @require_level(2)
+@idempotent
 def api_salvar_draft():
     """
     Nível 2+: salva rascunhos.
@@ -1249,6 +2631,10 @@ def api_salvar_draft():
                 cur, funcionario_id, funcionario_email, funcionario_nome,
                 setor_id=setor_id_db
             )
+            # editor envia direto para aprovação; demais níveis gravam rascunho
+            status = "PENDING" if int(user.get("nivel") or 1) == 2 else "DRAFT"
+            catalog = _load_setor_indicadores(cur, setor_id_db)
+            inseridos = []
 
             for item in valores:
                 if not isinstance(item, dict):
@@ -1265,36 +2651,37 @@ def api_salvar_draft():
                 if not ind_id and ind_codigo is None:
                     continue
 
-                ind_id_db = _get_or_create_indicador(
-                    cur, ind_id, setor_id_db, ind_codigo,
+                ind_id_db, ind_setor_id, resp_id = _resolve_indicador(
+                    cur, catalog, ind_id, setor_id_db, ind_codigo,
                     ind_nome or f"Indicador {ind_codigo}",
                     tipo=ind_tipo, unidade=ind_unidade, meta=ind_meta
                 )
-
-                ind_setor_id, resp_id = _get_indicator_access(cur, ind_id_db)
                 if ind_setor_id is None:
                     return jsonify({"ok": False, "error": "Indicador nao encontrado"}), 400
-                if int(user.get("nivel") or 1) < 4:
-                    if not _can_user_fill_indicator(user, ind_setor_id, resp_id):
-                        return jsonify({"ok": False, "error": "Sem permissao para preencher este indicador"}), 403
+                if not user["scope"].can_fill(ind_setor_id, resp_id):
+                    return jsonify({"ok": False, "error": "Sem permissao para preencher este indicador"}), 403
 
+                valor_num, valor_data = _catalog_valor_tipado(cur, catalog, ind_id_db, valor)
                 cur.execute(
                     """
-                    INSERT INTO ZDR (ZDR_INDICADOR_ID, ZDR_SETOR_ID, ZDR_FUNCIONARIO_ID, ZDR_PERIODO, ZDR_VALOR, ZDR_STATUS, ZDR_CRIADO_EM)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    INSERT INTO ZDR (ZDR_INDICADOR_ID, ZDR_SETOR_ID, ZDR_FUNCIONARIO_ID, ZDR_PERIODO, ZDR_VALOR,
+                                     ZDR_VALOR_NUM, ZDR_VALOR_DATA, ZDR_STATUS, ZDR_CRIADO_EM)
+                    OUTPUT INSERTED.ZDR_ID
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """,
                     (ind_id_db, setor_id_db, funcionario_id_db, periodo_date,
-                     str(valor) if valor is not None else None, status, now)
+                     str(valor) if valor is not None else None, valor_num, valor_data, status, now)
                 )
+                inseridos.append(int(cur.fetchone()[0]))
 
             conn.commit()
+            if status == "PENDING":
+                _publish_pending_added(cur, setor_id_db, inseridos)
 
         return jsonify({"ok": True})
     except ValueError as e:
         return jsonify({"ok": False, "error": str(e)}), 400
     except Exception as e:
-        print("[ERRO] /api/drafts:", str(e))
-        print(traceback.format_exc())
         return _error_response(500, "Erro interno", e)
 
 @app.route("/api/drafts", methods=["GET"])
@@ -1309,6 +2696,7 @@ def api_listar_drafts():
     user = request.current_user
     setor_id = request.args.get("setorId") or request.args.get("setor_id")
     periodo = request.args.get("periodo")
+    incluir_arquivados = _arg_flag("incluir_arquivados")
 
     with get_db_connection() as conn:
         cur = conn.cursor()
@@ -1338,19 +2726,15 @@ def api_listar_drafts():
                 else:
                     where.append("1=0")
 
+        cols = ", ".join(_ZDR_COLS) + (", ZDR_ARQUIVADO" if incluir_arquivados else "")
         sql = f"""
-            SELECT
-                ZDR_ID, ZDR_INDICADOR_ID, ZDR_SETOR_ID, ZDR_FUNCIONARIO_ID,
-                ZDR_PERIODO, ZDR_VALOR, ZDR_STATUS,
-                ZDR_CRIADO_EM, ZDR_ENVIADO_EM, ZDR_APROVADO_EM, ZDR_APROVADO_POR,
-                ZDR_REJEITADO_EM, ZDR_REJEITADO_POR, ZDR_REJEITADO_MOTIVO
-            FROM ZDR
+            SELECT {cols}
+            FROM {_drafts_source(incluir_arquivados)} AS ZDR
             WHERE {' AND '.join(where)}
             ORDER BY ZDR_CRIADO_EM DESC
         """
         cur.execute(sql, params)
-        rows = cur.fetchall()
-        return jsonify(_rows_to_dicts(cur, rows))
+        return jsonify(Draft.from_rows(cur.fetchall()))
 
 @app.route("/api/drafts/rejected", methods=["GET"])
 @require_level(2)
@@ -1358,6 +2742,8 @@ def api_listar_drafts_rejeitados():
     user = request.current_user
     setor_id = request.args.get("setorId") or request.args.get("setor_id")
 
+    incluir_arquivados = _arg_flag("incluir_arquivados")
+
     where = ["d.ZDR_STATUS = 'REJECTED'", "d.ZDR_FUNCIONARIO_ID = ?"]
     params = [int(user["id"])]
 
@@ -1377,8 +2763,8 @@ def api_listar_drafts_rejeitados():
                     d.ZDR_SETOR_ID,
                     d.ZDR_PERIODO,
                     d.ZDR_REJEITADO_MOTIVO,
-                    d.ZDR_REJEITADO_EM
-                FROM ZDR d
+                    d.ZDR_REJEITADO_EM{", d.ZDR_ARQUIVADO" if incluir_arquivados else ""}
+                FROM {_drafts_source(incluir_arquivados)} d
                 INNER JOIN ZIN i ON i.ZIN_ID = d.ZDR_INDICADOR_ID
                 WHERE {' AND '.join(where)}
                 ORDER BY d.ZDR_REJEITADO_EM DESC
@@ -1390,6 +2776,27 @@ def api_listar_drafts_rejeitados():
     except Exception as e:
         return _error_response(500, "Erro interno", e)
 
+# Linha da fila de aprovação (listagem e eventos SSE usam as mesmas colunas)
+_PENDING_SELECT = """
+    SELECT
+        d.ZDR_ID,
+        d.ZDR_INDICADOR_ID,
+        i.ZIN_NOME AS INDICADOR_NOME,
+        d.ZDR_SETOR_ID,
+        s.ZSE_NOME AS SETOR_NOME,
+        d.ZDR_FUNCIONARIO_ID,
+        f.ZFU_NOME AS FUNCIONARIO_NOME,
+        d.ZDR_PERIODO,
+        d.ZDR_VALOR,
+        d.ZDR_STATUS,
+        d.ZDR_CRIADO_EM,
+        d.ZDR_VERSAO
+    FROM ZDR d
+    INNER JOIN ZIN i ON i.ZIN_ID = d.ZDR_INDICADOR_ID
+    INNER JOIN ZSE s ON s.ZSE_ID = d.ZDR_SETOR_ID
+    LEFT JOIN ZFU f ON f.ZFU_ID = d.ZDR_FUNCIONARIO_ID
+"""
+
 @app.route("/api/drafts/pending", methods=["GET"])
 @require_level(3)
 def api_listar_drafts_pendentes():
@@ -1405,56 +2812,98 @@ def api_listar_drafts_pendentes():
             cur = conn.cursor()
             if setor_id:
                 cur.execute(
-                    """
-                    SELECT
-                        d.ZDR_ID,
-                        d.ZDR_INDICADOR_ID,
-                        i.ZIN_NOME AS INDICADOR_NOME,
-                        d.ZDR_SETOR_ID,
-                        s.ZSE_NOME AS SETOR_NOME,
-                        d.ZDR_FUNCIONARIO_ID,
-                        f.ZFU_NOME AS FUNCIONARIO_NOME,
-                        d.ZDR_PERIODO,
-                        d.ZDR_VALOR,
-                        d.ZDR_STATUS,
-                        d.ZDR_CRIADO_EM
-                    FROM ZDR d
-                    INNER JOIN ZIN i ON i.ZIN_ID = d.ZDR_INDICADOR_ID
-                    INNER JOIN ZSE s ON s.ZSE_ID = d.ZDR_SETOR_ID
-                    LEFT JOIN ZFU f ON f.ZFU_ID = d.ZDR_FUNCIONARIO_ID
-                    WHERE d.ZDR_STATUS = 'PENDING' AND d.ZDR_SETOR_ID = ?
-                    ORDER BY d.ZDR_CRIADO_EM DESC
-                    """,
+                    _PENDING_SELECT + " WHERE d.ZDR_STATUS = 'PENDING' AND d.ZDR_SETOR_ID = ? ORDER BY d.ZDR_CRIADO_EM DESC",
                     (int(setor_id),)
                 )
             else:
-                cur.execute(
-                    """
-                    SELECT
-                        d.ZDR_ID,
-                        d.ZDR_INDICADOR_ID,
-                        i.ZIN_NOME AS INDICADOR_NOME,
-                        d.ZDR_SETOR_ID,
-                        s.ZSE_NOME AS SETOR_NOME,
-                        d.ZDR_FUNCIONARIO_ID,
-                        f.ZFU_NOME AS FUNCIONARIO_NOME,
-                        d.ZDR_PERIODO,
-                        d.ZDR_VALOR,
-                        d.ZDR_STATUS,
-                        d.ZDR_CRIADO_EM
-                    FROM ZDR d
-                    INNER JOIN ZIN i ON i.ZIN_ID = d.ZDR_INDICADOR_ID
-                    INNER JOIN ZSE s ON s.ZSE_ID = d.ZDR_SETOR_ID
-                    LEFT JOIN ZFU f ON f.ZFU_ID = d.ZDR_FUNCIONARIO_ID
-                    WHERE d.ZDR_STATUS = 'PENDING'
-                    ORDER BY d.ZDR_CRIADO_EM DESC
-                    """
-                )
+                cur.execute(_PENDING_SELECT + " WHERE d.ZDR_STATUS = 'PENDING' ORDER BY d.ZDR_CRIADO_EM DESC")
             rows = cur.fetchall()
             return jsonify(_rows_to_dicts(cur, rows))
     except Exception as e:
         return _error_response(500, "Erro interno", e)
 
+# =========================
+# 10.1) FILA DE PENDENTES EM TEMPO REAL (SSE)
+# =========================
+# submit/salvar (PENDING) publicam "pending" com as linhas novas; aprovar/recusar publicam
+# "removed" com os ids. O líder carrega a lista uma vez e aplica os eventos do seu setor.
+pending_events = EventBus(max_subscribers=SSE_MAX_CLIENTS)
+
+def _publish_pending_added(cur, setor_id: int, draft_ids: list[int]):
+    """Após o commit: linhas dos drafts que ficaram PENDING (join só se alguém está conectado)."""
+    if not draft_ids:
+        return
+
+    def build():
+        rows = []
+        for i in range(0, len(draft_ids), 1000):
+            chunk = draft_ids[i:i + 1000]
+            cur.execute(
+                _PENDING_SELECT + f" WHERE d.ZDR_STATUS = 'PENDING' AND d.ZDR_ID IN ({', '.join('?' for _ in chunk)})",
+                tuple(chunk)
+            )
+            rows.extend(_rows_to_dicts(cur, cur.fetchall()))
+        return {"items": rows} if rows else None
+
+    try:
+        pending_events.publish_lazy("pending", build, setor_id=int(setor_id))
+    except Exception as e:
+        # a escrita já foi confirmada; quem está conectado recarrega na próxima reconexão
+        app.logger.warning("[SSE] falha ao publicar pendentes: %s", e)
+
+def _publish_pending_removed(removidos: dict[int, list[int]], status: str):
+    """removidos: {setor_id: [draft_id, ...]} que saíram de PENDING (APPROVED/REJECTED)."""
+    for setor_id, ids in removidos.items():
+        if ids:
+            pending_events.publish("removed", {"ids": sorted(ids), "status": status}, setor_id=int(setor_id))
+
+def _sse_stream(sub, retry_ms: int):
+    started = time()
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        while time() - started < SSE_MAX_DURATION_SEC:
+            ev = sub.get(timeout=SSE_HEARTBEAT_SEC)
+            # comentário SSE mantém a conexão viva em proxies que cortam conexões ociosas
+            yield ev.to_sse() if ev is not None else ": ping\n\n"
+    finally:
+        sub.close()
+
+@app.route("/api/stream/pending", methods=["GET"])
+@require_level(3)
+def api_stream_pending():
+    """
+    Server-Sent Events da fila de aprovação (mesmo escopo de /api/drafts/pending).
+    Eventos: pending {items}, removed {ids, status}, reset {} (recarregar a lista).
+    Reconexão com Last-Event-ID reenvia o que foi perdido.
+    """
+    user = request.current_user
+    setor_id = request.args.get("setorId") or request.args.get("setor_id")
+    if not _is_gestao_or_admin(user):
+        setor_id = user.get("setor_id")
+        if not setor_id:
+            return jsonify({"ok": False, "error": "Usuário sem setor associado"}), 403
+    try:
+        setor_id = int(setor_id) if setor_id else None
+    except ValueError:
+        return jsonify({"ok": False, "error": "setor_id deve ser inteiro"}), 400
+
+    def match(ev):
+        return setor_id is None or ev.setor_id is None or ev.setor_id == setor_id
+
+    try:
+        sub = pending_events.subscribe(match, request.headers.get("Last-Event-ID"))
+    except BusFull as e:
+        resp = jsonify({"ok": False, "error": str(e)})
+        resp.status_code = 503
+        resp.headers["Retry-After"] = "30"
+        return resp
+
+    resp = app.response_class(_sse_stream(sub, retry_ms=5000), mimetype="text/event-stream")
+    resp.call_on_close(sub.close)  # também libera a vaga se o gerador nem chegou a iniciar
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"  # Nginx: não bufferizar o stream
+    return resp
+
 @app.route("/api/drafts/submit", methods=["POST"])
 @require_level(2)
 def api_submit_drafts():
@@ -1494,21 +2943,24 @@ def api_submit_drafts():
                 params.append(int(user["id"]))
 
             cur.execute(
-                f"UPDATE ZDR SET ZDR_STATUS='PENDING', ZDR_ENVIADO_EM = SYSUTCDATETIME() WHERE {where}",
+                f"UPDATE ZDR SET ZDR_STATUS='PENDING', ZDR_ENVIADO_EM = SYSUTCDATETIME() OUTPUT INSERTED.ZDR_ID WHERE {where}",
                 params
             )
+            enviados = [int(r[0]) for r in cur.fetchall()]
             conn.commit()
             _log_action(
                 request.current_user,
                 'drafts_submit',
                 f"setor_id={setor_id} periodo={p} user_id={user.get('id')}"
             )
+            _publish_pending_added(cur, setor_id, enviados)
             return jsonify({"ok": True})
     except Exception as e:
         return _error_response(500, "Erro interno", e)
 
 @app.route("/api/drafts/approve", methods=["POST"])
 @require_level(3)
+@idempotent
 def api_approve_drafts():
     """
     Aprova drafts PENDING e grava em definitivo (ZIV).
@@ -1532,104 +2984,125 @@ def api_approve_drafts():
         p = p + "-01"
 
     try:
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-
-            cur.execute(
-                "SELECT ZDR_INDICADOR_ID, ZDR_VALOR, ZDR_FUNCIONARIO_ID "
-                "FROM ZDR WHERE ZDR_SETOR_ID = ? AND ZDR_PERIODO = ? AND ZDR_STATUS = 'PENDING'",
-                (setor_id, p)
-            )
-            items = cur.fetchall()
-
-            if not items:
-                return jsonify({"ok": False, "error": "Não há rascunhos PENDING para aprovar"}), 400
-
-            for ind_id, valor, func_id in items:
-                cur.execute(
-                    "SELECT ZIV_ID FROM ZIV WHERE ZIV_INDICADOR_ID = ? AND ZIV_SETOR_ID = ? AND ZIV_PERIODO = ?",
-                    (ind_id, setor_id, p)
-                )
-                row = cur.fetchone()
-                if row:
-                    cur.execute(
-                        "UPDATE ZIV SET ZIV_VALOR = ?, ZIV_FUNCIONARIO_ID = ?, ZIV_ATUALIZADO_EM = SYSUTCDATETIME() WHERE ZIV_ID = ?",
-                        (valor, func_id, row[0])
-                    )
-                else:
-                    cur.execute(
-                        "INSERT INTO ZIV (ZIV_INDICADOR_ID, ZIV_SETOR_ID, ZIV_FUNCIONARIO_ID, ZIV_PERIODO, ZIV_VALOR, ZIV_CRIADO_EM, ZIV_ATUALIZADO_EM) "
-                        "VALUES (?, ?, ?, ?, ?, SYSUTCDATETIME(), SYSUTCDATETIME())",
-                        (ind_id, setor_id, func_id, p, valor)
-                    )
-
-            cur.execute(
-                "UPDATE ZDR SET ZDR_STATUS='APPROVED', ZDR_APROVADO_EM = SYSUTCDATETIME(), ZDR_APROVADO_POR = ? "
-                "WHERE ZDR_SETOR_ID = ? AND ZDR_PERIODO = ? AND ZDR_STATUS = 'PENDING'",
-                (int(user["id"]), setor_id, p)
-            )
-
-            conn.commit()
-            _log_action(request.current_user, 'drafts_aprovar', f"setor_id={setor_id} periodo={p} qtd={len(items)}")
-            return jsonify({"ok": True, "aprovados": len(items)})
+        # mesmo caminho set-based de /api/drafts/bulk (UPDATE ... OUTPUT + MERGE, com retry)
+        result = apply_drafts_bulk(user, {
+            "acao": "APPROVED", "motivo": None, "ids": None,
+            "filtro": {"setor_ids": [setor_id], "periodo": p},
+        })
+        if not result["aplicados"]:
+            return jsonify({"ok": False, "error": "Não há rascunhos PENDING para aprovar"}), 400
+        return jsonify({"ok": True, "aprovados": result["aplicados"]})
+    except PermissionError as e:
+        return jsonify({"ok": False, "error": str(e)}), 403
     except Exception as e:
         return _error_response(500, "Erro interno", e)
 
+def _read_pending_draft_version(cur, user: dict, draft_id: int, versao: bytes | None):
+    """
+    Valida o draft (existe, PENDING, setor do usuário) e devolve (resposta_erro, versao_atual).
+    Só lê (sem UPDLOCK): a escrita seguinte usa ZDR_VERSAO na cláusula WHERE
+    (concorrência otimista) e responde 409 se o draft mudou entre a leitura e o UPDATE.
+    """
+    cur.execute("SELECT ZDR_SETOR_ID, ZDR_STATUS, ZDR_VERSAO FROM ZDR WHERE ZDR_ID = ?", (int(draft_id),))
+    row = cur.fetchone()
+    if not row:
+        return (jsonify({"ok": False, "error": "Draft nao encontrado"}), 404), None
+    setor_id, status, atual = row
+    if status != "PENDING":
+        return (jsonify({"ok": False, "error": "Draft nao esta pendente"}), 400), None
+    _enforce_setor_access(user, int(setor_id))
+    if versao is not None and bytes(atual) != versao:
+        return _draft_changed_response(), None
+    return None, atual
+
+def _draft_changed_response():
+    return jsonify({"ok": False, "error": "Draft alterado por outro usuario; recarregue"}), 409
+
+@_db_retry
+def _approve_draft_item(user: dict, draft_id: int, versao: bytes | None):
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        error, atual = _read_pending_draft_version(cur, user, draft_id, versao)
+        if error:
+            return error
+
+        cur.execute(
+            "UPDATE ZDR SET ZDR_STATUS='APPROVED', ZDR_APROVADO_EM = SYSUTCDATETIME(), ZDR_APROVADO_POR = ? "
+            "OUTPUT INSERTED.ZDR_INDICADOR_ID, INSERTED.ZDR_SETOR_ID, INSERTED.ZDR_FUNCIONARIO_ID, "
+            "INSERTED.ZDR_PERIODO, INSERTED.ZDR_VALOR, INSERTED.ZDR_VALOR_NUM, INSERTED.ZDR_VALOR_DATA "
+            "WHERE ZDR_ID = ? AND ZDR_STATUS = 'PENDING' AND ZDR_VERSAO = ?",
+            (int(user["id"]), int(draft_id), atual)
+        )
+        row = cur.fetchone()
+        if not row:
+            conn.rollback()
+            return _draft_changed_response()
+
+        ind_id, setor_id, func_id, periodo, valor, valor_num, valor_data = row
+        now = datetime.utcnow()
+        cur.execute("""
+            MERGE ZIV WITH (HOLDLOCK) AS tgt
+            USING (SELECT ? AS ZIV_INDICADOR_ID, ? AS ZIV_SETOR_ID, ? AS ZIV_PERIODO) AS src
+            ON tgt.ZIV_INDICADOR_ID = src.ZIV_INDICADOR_ID AND tgt.ZIV_SETOR_ID = src.ZIV_SETOR_ID AND tgt.ZIV_PERIODO = src.ZIV_PERIODO
+            WHEN MATCHED THEN
+                UPDATE SET ZIV_VALOR = ?, ZIV_VALOR_NUM = ?, ZIV_VALOR_DATA = ?, ZIV_ATUALIZADO_EM = ?, ZIV_FUNCIONARIO_ID = ?
+            WHEN NOT MATCHED THEN
+                INSERT (ZIV_INDICADOR_ID, ZIV_SETOR_ID, ZIV_FUNCIONARIO_ID, ZIV_PERIODO, ZIV_VALOR, ZIV_VALOR_NUM, ZIV_VALOR_DATA, ZIV_CRIADO_EM, ZIV_ATUALIZADO_EM)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+        """,
+        ind_id, setor_id, periodo,
+        valor, valor_num, valor_data, now, func_id,
+        ind_id, setor_id, func_id, periodo, valor, valor_num, valor_data, now, now)
+
+        conn.commit()
+    _invalidate_valores([(setor_id, periodo)])
+    _log_action(user, 'draft_aprovar', f"draft_id={draft_id}")
+    _publish_pending_removed({setor_id: [int(draft_id)]}, "APPROVED")
+    return jsonify({"ok": True})
+
 @app.route("/api/drafts/<int:draft_id>/approve", methods=["POST"])
 @require_level(3)
+@idempotent
 def api_approve_draft_item(draft_id: int):
-    user = request.current_user
+    """Body opcional: { versao } (ZDR_VERSAO lido pelo cliente) -> 409 se o draft mudou."""
+    payload = request.get_json(force=True, silent=True) or {}
     try:
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "SELECT ZDR_INDICADOR_ID, ZDR_SETOR_ID, ZDR_FUNCIONARIO_ID, ZDR_PERIODO, ZDR_VALOR, ZDR_STATUS "
-                "FROM ZDR WHERE ZDR_ID = ?",
-                (int(draft_id),)
-            )
-            row = cur.fetchone()
-            if not row:
-                return jsonify({"ok": False, "error": "Draft nao encontrado"}), 404
-
-            ind_id, setor_id, func_id, periodo, valor, status = row
-            if status != "PENDING":
-                return jsonify({"ok": False, "error": "Draft nao esta pendente"}), 400
-
-            _enforce_setor_access(user, int(setor_id))
-
-            now = datetime.utcnow()
-            cur.execute("""
-                MERGE ZIV AS tgt
-                USING (SELECT ? AS ZIV_INDICADOR_ID, ? AS ZIV_SETOR_ID, ? AS ZIV_PERIODO) AS src
-                ON tgt.ZIV_INDICADOR_ID = src.ZIV_INDICADOR_ID AND tgt.ZIV_SETOR_ID = src.ZIV_SETOR_ID AND tgt.ZIV_PERIODO = src.ZIV_PERIODO
-                WHEN MATCHED THEN
-                    UPDATE SET ZIV_VALOR = ?, ZIV_ATUALIZADO_EM = ?, ZIV_FUNCIONARIO_ID = ?
-                WHEN NOT MATCHED THEN
-                    INSERT (ZIV_INDICADOR_ID, ZIV_SETOR_ID, ZIV_FUNCIONARIO_ID, ZIV_PERIODO, ZIV_VALOR, ZIV_CRIADO_EM, ZIV_ATUALIZADO_EM)
-                    VALUES (?, ?, ?, ?, ?, ?, ?);
-            """,
-            ind_id, setor_id, periodo,
-            valor, now, func_id,
-            ind_id, setor_id, func_id, periodo, valor, now, now)
-
-            cur.execute(
-                "UPDATE ZDR SET ZDR_STATUS='APPROVED', ZDR_APROVADO_EM = SYSUTCDATETIME(), ZDR_APROVADO_POR = ? "
-                "WHERE ZDR_ID = ?",
-                (int(user["id"]), int(draft_id))
-            )
-
-            conn.commit()
-            _log_action(request.current_user, 'draft_aprovar', f"draft_id={draft_id}")
-            return jsonify({"ok": True})
+        return _approve_draft_item(request.current_user, draft_id, _parse_versao(payload.get("versao")))
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
     except PermissionError as e:
         return jsonify({"ok": False, "error": str(e)}), 403
     except Exception as e:
         return _error_response(500, "Erro interno", e)
 
+@_db_retry
+def _reject_draft_item(user: dict, draft_id: int, motivo: str, versao: bytes | None):
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        error, atual = _read_pending_draft_version(cur, user, draft_id, versao)
+        if error:
+            return error
+
+        cur.execute(
+            "UPDATE ZDR SET ZDR_STATUS='REJECTED', ZDR_REJEITADO_EM = SYSUTCDATETIME(), "
+            "ZDR_REJEITADO_POR = ?, ZDR_REJEITADO_MOTIVO = ? "
+            "OUTPUT INSERTED.ZDR_SETOR_ID "
+            "WHERE ZDR_ID = ? AND ZDR_STATUS = 'PENDING' AND ZDR_VERSAO = ?",
+            (int(user["id"]), motivo, int(draft_id), atual)
+        )
+        row = cur.fetchone()
+        if not row:
+            conn.rollback()
+            return _draft_changed_response()
+        conn.commit()
+    _log_action(user, 'draft_rejeitar', f"draft_id={draft_id}")
+    _publish_pending_removed({row[0]: [int(draft_id)]}, "REJECTED")
+    return jsonify({"ok": True})
+
 @app.route("/api/drafts/<int:draft_id>/reject", methods=["POST"])
 @require_level(3)
+@idempotent
 def api_reject_draft_item(draft_id: int):
-    user = request.current_user
     payload = request.get_json(force=True, silent=True) or {}
     motivo = (payload.get("motivo") or "").strip()
 
@@ -1637,35 +3110,331 @@ def api_reject_draft_item(draft_id: int):
         return jsonify({"ok": False, "error": "Informe o motivo"}), 400
 
     try:
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "SELECT ZDR_SETOR_ID, ZDR_STATUS FROM ZDR WHERE ZDR_ID = ?",
-                (int(draft_id),)
-            )
-            row = cur.fetchone()
-            if not row:
-                return jsonify({"ok": False, "error": "Draft nao encontrado"}), 404
+        return _reject_draft_item(request.current_user, draft_id, motivo, _parse_versao(payload.get("versao")))
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except PermissionError as e:
+        return jsonify({"ok": False, "error": str(e)}), 403
+    except Exception as e:
+        return _error_response(500, "Erro interno", e)
+
+_BULK_ACTIONS = {"approve": "APPROVED", "aprovar": "APPROVED", "reject": "REJECTED", "rejeitar": "REJECTED", "recusar": "REJECTED"}
+
+_BULK_APPROVE_SQL = """
+SET NOCOUNT ON;
+IF OBJECT_ID('tempdb..#ZDR_APLICADOS') IS NOT NULL DROP TABLE #ZDR_APLICADOS;
+CREATE TABLE #ZDR_APLICADOS (
+    ZDR_ID BIGINT NOT NULL PRIMARY KEY,
+    INDICADOR_ID INT NOT NULL,
+    SETOR_ID INT NOT NULL,
+    FUNCIONARIO_ID INT NULL,
+    PERIODO DATE NOT NULL,
+    VALOR NVARCHAR(200) NULL,
+    VALOR_NUM DECIMAL(19,4) NULL,
+    VALOR_DATA DATE NULL
+);
+
+UPDATE d
+SET ZDR_STATUS = 'APPROVED', ZDR_APROVADO_EM = SYSUTCDATETIME(), ZDR_APROVADO_POR = ?
+OUTPUT INSERTED.ZDR_ID, INSERTED.ZDR_INDICADOR_ID, INSERTED.ZDR_SETOR_ID, INSERTED.ZDR_FUNCIONARIO_ID,
+       INSERTED.ZDR_PERIODO, INSERTED.ZDR_VALOR, INSERTED.ZDR_VALOR_NUM, INSERTED.ZDR_VALOR_DATA
+INTO #ZDR_APLICADOS
+FROM ZDR d
+INNER JOIN #ZDR_BULK b ON b.ZDR_ID = d.ZDR_ID
+WHERE d.ZDR_STATUS = 'PENDING';
+
+-- mais de um draft para o mesmo indicador/setor/período: vale o mais recente
+MERGE ZIV WITH (HOLDLOCK) AS tgt
+USING (
+    SELECT INDICADOR_ID, SETOR_ID, FUNCIONARIO_ID, PERIODO, VALOR, VALOR_NUM, VALOR_DATA
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY INDICADOR_ID, SETOR_ID, PERIODO ORDER BY ZDR_ID DESC) AS RN
+        FROM #ZDR_APLICADOS
+    ) x
+    WHERE RN = 1
+) AS src
+ON tgt.ZIV_INDICADOR_ID = src.INDICADOR_ID AND tgt.ZIV_SETOR_ID = src.SETOR_ID AND tgt.ZIV_PERIODO = src.PERIODO
+WHEN MATCHED THEN
+    UPDATE SET ZIV_VALOR = src.VALOR, ZIV_VALOR_NUM = src.VALOR_NUM, ZIV_VALOR_DATA = src.VALOR_DATA,
+               ZIV_FUNCIONARIO_ID = src.FUNCIONARIO_ID, ZIV_ATUALIZADO_EM = SYSUTCDATETIME()
+WHEN NOT MATCHED THEN
+    INSERT (ZIV_INDICADOR_ID, ZIV_SETOR_ID, ZIV_FUNCIONARIO_ID, ZIV_PERIODO, ZIV_VALOR, ZIV_VALOR_NUM, ZIV_VALOR_DATA, ZIV_CRIADO_EM, ZIV_ATUALIZADO_EM)
+    VALUES (src.INDICADOR_ID, src.SETOR_ID, src.FUNCIONARIO_ID, src.PERIODO, src.VALOR, src.VALOR_NUM, src.VALOR_DATA, SYSUTCDATETIME(), SYSUTCDATETIME());
+
+SELECT ZDR_ID, SETOR_ID, PERIODO FROM #ZDR_APLICADOS;
+"""
+
+_BULK_REJECT_SQL = """
+SET NOCOUNT ON;
+UPDATE d
+SET ZDR_STATUS = 'REJECTED', ZDR_REJEITADO_EM = SYSUTCDATETIME(), ZDR_REJEITADO_POR = ?, ZDR_REJEITADO_MOTIVO = ?
+OUTPUT INSERTED.ZDR_ID, INSERTED.ZDR_SETOR_ID
+FROM ZDR d
+INNER JOIN #ZDR_BULK b ON b.ZDR_ID = d.ZDR_ID
+WHERE d.ZDR_STATUS = 'PENDING';
+"""
 
-            setor_id, status = row
-            if status != "PENDING":
-                return jsonify({"ok": False, "error": "Draft nao esta pendente"}), 400
+def _parse_bulk_request(payload: dict) -> dict:
+    """Valida o corpo de /api/drafts/bulk (também usado pelo job drafts-bulk). Levanta ValueError."""
+    acao = _BULK_ACTIONS.get(str(payload.get("acao") or payload.get("action") or "").strip().lower())
+    if not acao:
+        raise ValueError("Informe acao: approve ou reject")
+    motivo = (payload.get("motivo") or "").strip()
+    if acao == "REJECTED" and not motivo:
+        raise ValueError("Informe o motivo")
+
+    ids = payload.get("ids") or payload.get("draft_ids")
+    filtro = payload.get("filtro") or payload.get("filter")
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise ValueError("ids precisa ser uma lista não vazia")
+        try:
+            ids = list(dict.fromkeys(int(i) for i in ids))
+        except (TypeError, ValueError):
+            raise ValueError("ids inválidos") from None
+        if len(ids) > DRAFTS_BULK_MAX_IDS:
+            raise ValueError(f"Maximo de {DRAFTS_BULK_MAX_IDS} ids por requisicao")
+        return {"acao": acao, "motivo": motivo or None, "ids": ids, "filtro": None}
+
+    if not isinstance(filtro, dict):
+        raise ValueError("Envie ids ou filtro {setor_ids, periodo | periodo_de/periodo_ate}")
+
+    setor_ids = filtro.get("setor_ids") or filtro.get("setorIds")
+    if setor_ids is None and (filtro.get("setor_id") or filtro.get("setorId")):
+        setor_ids = [filtro.get("setor_id") or filtro.get("setorId")]
+    try:
+        setor_ids = sorted({int(x) for x in setor_ids}) if setor_ids else None
+    except (TypeError, ValueError):
+        raise ValueError("setor_ids inválidos") from None
+
+    periodos = {}
+    for key in ("periodo", "periodo_de", "periodo_ate"):
+        if filtro.get(key):
+            periodos[key] = parse_periodo(filtro[key]).isoformat()
+    if not setor_ids and not periodos:
+        raise ValueError("Filtro vazio: informe setor_ids e/ou periodo")
+    return {"acao": acao, "motivo": motivo or None, "ids": None, "filtro": {"setor_ids": setor_ids, **periodos}}
+
+@_db_retry
+def apply_drafts_bulk(user: dict, req: dict) -> dict:
+    """
+    Aprova/recusa drafts PENDING em massa, em uma transação:
+    - por ids: uma consulta valida existência/status/setor de todos;
+    - por filtro: seleciona os PENDING dos setores permitidos (pode cruzar setores).
+    Aplica com UPDATE ... OUTPUT (+ MERGE em ZIV na aprovação) a partir de #ZDR_BULK.
+    Devolve o resultado por id.
+    """
+    scope = user["scope"]
+    acao, ids, filtro = req["acao"], req["ids"], req["filtro"]
+    resultados: dict[int, str] = {}
 
-            _enforce_setor_access(user, int(setor_id))
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "IF OBJECT_ID('tempdb..#ZDR_BULK') IS NOT NULL DROP TABLE #ZDR_BULK; "
+            "CREATE TABLE #ZDR_BULK (ZDR_ID BIGINT NOT NULL PRIMARY KEY);"
+        )
 
+        if ids is not None:
+            cur.fast_executemany = True
+            cur.executemany("INSERT INTO #ZDR_BULK (ZDR_ID) VALUES (?)", [(i,) for i in ids])
             cur.execute(
-                "UPDATE ZDR SET ZDR_STATUS='REJECTED', ZDR_REJEITADO_EM = SYSUTCDATETIME(), "
-                "ZDR_REJEITADO_POR = ?, ZDR_REJEITADO_MOTIVO = ? WHERE ZDR_ID = ?",
-                (int(user["id"]), motivo, int(draft_id))
+                "SELECT b.ZDR_ID, d.ZDR_SETOR_ID, d.ZDR_STATUS "
+                "FROM #ZDR_BULK b LEFT JOIN ZDR d ON d.ZDR_ID = b.ZDR_ID"
             )
-            conn.commit()
-            _log_action(request.current_user, 'draft_rejeitar', f"draft_id={draft_id}")
-            return jsonify({"ok": True})
+            validos = []
+            for draft_id, setor_id, status in cur.fetchall():
+                draft_id = int(draft_id)
+                if setor_id is None:
+                    resultados[draft_id] = "nao_encontrado"
+                elif scope.setor_mode(int(setor_id)) not in ("all", "own"):
+                    resultados[draft_id] = "acesso_negado"
+                elif status != "PENDING":
+                    resultados[draft_id] = "nao_pendente"
+                else:
+                    validos.append((draft_id,))
+            if len(validos) < len(ids):
+                cur.execute("TRUNCATE TABLE #ZDR_BULK")
+                if validos:
+                    cur.executemany("INSERT INTO #ZDR_BULK (ZDR_ID) VALUES (?)", validos)
+            cur.fast_executemany = False
+        else:
+            where, params = ["ZDR_STATUS = 'PENDING'"], []
+            setor_ids = filtro.get("setor_ids")
+            if setor_ids:
+                for setor_id in setor_ids:
+                    scope.check_setor(setor_id)
+                where.append(f"ZDR_SETOR_ID IN ({', '.join('?' for _ in setor_ids)})")
+                params.extend(setor_ids)
+            elif not scope.is_global:
+                if scope.setor_id is None:
+                    raise PermissionError("Usuário sem setor associado")
+                where.append("ZDR_SETOR_ID = ?")
+                params.append(scope.setor_id)
+            if filtro.get("periodo"):
+                where.append("ZDR_PERIODO = ?")
+                params.append(filtro["periodo"])
+            if filtro.get("periodo_de"):
+                where.append("ZDR_PERIODO >= ?")
+                params.append(filtro["periodo_de"])
+            if filtro.get("periodo_ate"):
+                where.append("ZDR_PERIODO <= ?")
+                params.append(filtro["periodo_ate"])
+            cur.execute(
+                f"INSERT INTO #ZDR_BULK (ZDR_ID) SELECT TOP (?) ZDR_ID FROM ZDR WHERE {' AND '.join(where)}",
+                (DRAFTS_BULK_MAX_IDS, *params)
+            )
+
+        if acao == "APPROVED":
+            cur.execute(_BULK_APPROVE_SQL, (int(user["id"]),))
+        else:
+            cur.execute(_BULK_REJECT_SQL, (int(user["id"]), req["motivo"]))
+        rows = cur.fetchall()
+        aplicados = {int(r[0]): int(r[1]) for r in rows}  # draft -> setor
+        # aprovação devolve também o período (valores definitivos alterados)
+        valores_alterados = {(r[1], r[2]) for r in rows} if acao == "APPROVED" else set()
+
+        for draft_id in aplicados:
+            resultados[draft_id] = "ok"
+        for draft_id in ids or ():
+            # validado, mas outro usuário resolveu antes do UPDATE
+            resultados.setdefault(draft_id, "nao_pendente")
+
+        cur.execute(
+            "DROP TABLE #ZDR_BULK; "
+            "IF OBJECT_ID('tempdb..#ZDR_APLICADOS') IS NOT NULL DROP TABLE #ZDR_APLICADOS;"
+        )
+        conn.commit()
+
+    _invalidate_valores(valores_alterados)
+    _log_action(
+        user, "drafts_bulk",
+        f"acao={acao} solicitados={len(ids) if ids is not None else 'filtro'} aplicados={len(aplicados)}"
+    )
+    removidos: dict[int, list[int]] = defaultdict(list)
+    for draft_id, setor_id in aplicados.items():
+        removidos[setor_id].append(draft_id)
+    _publish_pending_removed(removidos, acao)
+    ordem = ids if ids is not None else sorted(aplicados)
+    return {
+        "ok": True,
+        "acao": "approve" if acao == "APPROVED" else "reject",
+        "solicitados": len(ordem),
+        "aplicados": len(aplicados),
+        "resultados": [{"id": i, "status": resultados[i]} for i in ordem],
+    }
+
+@app.route("/api/drafts/bulk", methods=["POST"])
+@require_level(3)
+@idempotent
+def api_drafts_bulk():
+    """
+    Aprovação/recusa em massa.
+    Body: { acao: "approve"|"reject", motivo?, ids: [..] }
+       ou { acao, motivo?, filtro: { setor_ids?: [..], periodo? | periodo_de?, periodo_ate? } }
+    Resultado por id: ok | nao_encontrado | nao_pendente | acesso_negado.
+    Para volumes grandes, POST /api/jobs/drafts-bulk com o mesmo corpo.
+    """
+    try:
+        req = _parse_bulk_request(request.get_json(force=True, silent=True) or {})
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    try:
+        return jsonify(apply_drafts_bulk(request.current_user, req))
     except PermissionError as e:
         return jsonify({"ok": False, "error": str(e)}), 403
     except Exception as e:
         return _error_response(500, "Erro interno", e)
 
+# =========================
+# 10.2) ANÁLISES - ATINGIMENTO DE METAS
+# =========================
+_ATINGIMENTO_SQL = (
+    "SELECT v.ZIV_INDICADOR_ID, v.ZIV_SETOR_ID, YEAR(v.ZIV_PERIODO) * 12 + MONTH(v.ZIV_PERIODO) - 1, "
+    "CAST(v.ZIV_VALOR_NUM AS FLOAT), i.ZIN_META "
+    "FROM ZIV v INNER JOIN ZIN i ON i.ZIN_ID = v.ZIV_INDICADOR_ID "
+    "WHERE v.ZIV_PERIODO >= ? AND v.ZIV_PERIODO <= ? AND v.ZIV_VALOR_NUM IS NOT NULL"
+)
+
+@app.route("/api/analytics/atingimento", methods=["GET"])
+@require_level(3)
+def api_analytics_atingimento():
+    """
+    Atingimento da meta por indicador × setor, mês a mês.
+    Query: de, ate (YYYY-MM; padrão: últimos 12 meses), setor_id?, indicador_id?, janela? (média móvel).
+    Líder vê só os próprios setores. Usa ZIV_VALOR_NUM (valores não numéricos ficam de fora).
+    """
+    if not analytics.available():
+        return jsonify({"ok": False, "error": "Analise indisponivel: instale o pacote numpy"}), 503
+
+    user = request.current_user
+    scope = user["scope"]
+    try:
+        ate = parse_periodo(request.args.get("ate")) if request.args.get("ate") else datetime.utcnow().date().replace(day=1)
+        mes_ate = analytics.month_index(ate)
+        mes_de = analytics.month_index(parse_periodo(request.args.get("de"))) if request.args.get("de") else mes_ate - 11
+        janela = int(request.args.get("janela") or ANALYTICS_JANELA)
+        setor_id = request.args.get("setor_id") or request.args.get("setorId")
+        indicador_id = request.args.get("indicador_id") or request.args.get("indicadorId")
+        setor_id = int(setor_id) if setor_id else None
+        indicador_id = int(indicador_id) if indicador_id else None
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    if mes_de > mes_ate:
+        return jsonify({"ok": False, "error": "de deve ser anterior a ate"}), 400
+    if mes_ate - mes_de + 1 > ANALYTICS_MAX_MESES:
+        return jsonify({"ok": False, "error": f"Periodo maximo de {ANALYTICS_MAX_MESES} meses"}), 400
+    if not 1 <= janela <= 24:
+        return jsonify({"ok": False, "error": "janela deve estar entre 1 e 24"}), 400
+
+    sql, params = _ATINGIMENTO_SQL, [date(mes_de // 12, mes_de % 12 + 1, 1), date(mes_ate // 12, mes_ate % 12 + 1, 1)]
+    if setor_id is not None:
+        try:
+            scope.check_setor(setor_id, allow_assigned=True)
+        except PermissionError:
+            return jsonify({"ok": False, "error": "Acesso negado a este setor"}), 403
+        sql += " AND v.ZIV_SETOR_ID = ?"
+        params.append(setor_id)
+    elif scope.visible_setor_ids is not None:
+        setores = sorted(scope.visible_setor_ids)
+        if not setores:
+            return jsonify({"ok": False, "error": "Usuário sem setor associado"}), 403
+        sql += f" AND v.ZIV_SETOR_ID IN ({', '.join('?' for _ in setores)})"
+        params.extend(setores)
+    if indicador_id is not None:
+        sql += " AND v.ZIV_INDICADOR_ID = ?"
+        params.append(indicador_id)
+
+    started = perf_counter()
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+    except Exception as e:
+        return _error_response(500, "Erro interno", e)
+    query_ms = (perf_counter() - started) * 1000
+
+    # colunas da consulta; a meta (texto em ZIN_META) é convertida uma vez por indicador
+    indicadores, setores, meses, valores, metas_txt = zip(*rows) if rows else ((),) * 5
+    metas = {}
+    for ind_id, meta in dict(zip(indicadores, metas_txt)).items():
+        num = parse_numero(meta)
+        metas[int(ind_id)] = float(num) if num is not None else None
+    result = analytics.atingimento(indicadores, setores, meses, valores, metas, mes_de, mes_ate, janela=janela)
+
+    return jsonify({
+        "ok": True,
+        "de": analytics.month_label(mes_de),
+        "ate": analytics.month_label(mes_ate),
+        "janela": janela,
+        "linhas": len(rows),
+        **result,
+        "consulta_ms": round(query_ms, 1),
+        "calculo_ms": round((perf_counter() - started) * 1000 - query_ms, 1),
+    })
+
 # =========================
 # 11) GESTÃO/ADM - USERS CRUD
 # =========================
@@ -1693,7 +3462,7 @@ def api_create_user():
     payload = request.get_json(force=True, silent=True) or {}
 
     nome = (payload.get("nome") or "").strip()
-    email = (payload.get("email") or "").strip()
+    email = _normalize_email(payload.get("email"))
     senha = (payload.get("senha") or payload.get("password") or "").strip()
     setor_id = payload.get("setor_id") or payload.get("setorId")
     nivel = int(payload.get("nivel") or 1)
@@ -1715,7 +3484,7 @@ def api_create_user():
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT 1 FROM ZFU WHERE LOWER(ZFU_EMAIL)=LOWER(?)", (email,))
+            cur.execute("SELECT 1 FROM ZFU WHERE ZFU_EMAIL_NORM = ?", (email,))
             if cur.fetchone():
                 return jsonify({"ok": False, "error": "Email já cadastrado"}), 409
 
@@ -1762,7 +3531,17 @@ def api_update_user(user_id: int):
                 fields.append("ZFU_NIVEL = ?")
                 params.append(new_level)
 
-            for k, col in [("nome", "ZFU_NOME"), ("email", "ZFU_EMAIL"), ("setor_id", "ZFU_SETOR_ID"), ("ativo", "ZFU_ATIVO")]:
+            if "email" in payload:
+                email = _normalize_email(payload.get("email"))
+                if not email:
+                    return jsonify({"ok": False, "error": "Informe email"}), 400
+                cur.execute("SELECT 1 FROM ZFU WHERE ZFU_EMAIL_NORM = ? AND ZFU_ID <> ?", (email, user_id))
+                if cur.fetchone():
+                    return jsonify({"ok": False, "error": "Email já cadastrado"}), 409
+                fields.append("ZFU_EMAIL = ?")
+                params.append(email)
+
+            for k, col in [("nome", "ZFU_NOME"), ("setor_id", "ZFU_SETOR_ID"), ("ativo", "ZFU_ATIVO")]:
                 if k in payload:
                     fields.append(f"{col} = ?")
                     params.append(payload[k])
@@ -1776,6 +3555,7 @@ def api_update_user(user_id: int):
                 params
             )
             conn.commit()
+            _invalidate_user_cache(user_id)
             _log_action(request.current_user, 'user_atualizar', f"user_id={user_id}")
             return jsonify({"ok": True})
     except Exception as e:
@@ -1850,6 +3630,8 @@ def api_create_indicador():
             cur.execute("SELECT SCOPE_IDENTITY()")
             new_id = int(cur.fetchone()[0])
             conn.commit()
+            if responsavel_id is not None:
+                _invalidate_user_cache(responsavel_id)
             _log_action(
                 request.current_user,
                 'indicador_criar',
@@ -1898,17 +3680,681 @@ def api_update_indicador(indicador_id: int):
                 params
             )
             conn.commit()
+            if "ativo" in payload or "responsavel_id" in payload or "responsavelId" in payload:
+                # muda o escopo do responsável antigo e do novo
+                _invalidate_user_cache()
             return jsonify({"ok": True})
     except Exception as e:
         return _error_response(500, "Erro interno", e)
 
+# =========================
+# 12.1) BATCH DE LEITURAS
+# =========================
+_BATCH_EXCLUDED_ENDPOINTS = {"api_batch", "api_stream_pending"}  # stream SSE nunca termina dentro do batch
+_batch_executor: ThreadPoolExecutor | None = None
+_batch_executor_lock = threading.Lock()
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="api-batch")
+        return _batch_executor
+
+def _run_batch_item(item: dict, headers: dict) -> dict:
+    """Executa um GET interno (rota existente) e devolve {id, status, body}."""
+    item_id = item.get("id")
+    path = str(item.get("path") or item.get("url") or "")
+    if not path.startswith("/api/"):
+        return {"id": item_id, "status": 400, "body": {"ok": False, "error": "path deve começar com /api/"}}
+
+    try:
+        with app.test_request_context(path, method="GET", headers=headers):
+            if request.routing_exception is not None:
+                code = getattr(request.routing_exception, "code", 404) or 404
+                error = "Apenas GET e permitido em batch" if code == 405 else "Rota nao encontrada"
+                return {"id": item_id, "status": code, "body": {"ok": False, "error": error}}
+            endpoint = request.url_rule.endpoint
+            if endpoint in _BATCH_EXCLUDED_ENDPOINTS:
+                return {"id": item_id, "status": 400, "body": {"ok": False, "error": "Rota nao permitida em batch"}}
+
+            try:
+                rv = app.view_functions[endpoint](**(request.view_args or {}))
+            except Exception as e:
+                # mesmo tratamento da rota avulsa: abort(403/404) e os errorhandlers (ex.: CircuitOpenError)
+                rv = app.handle_user_exception(e)
+                if isinstance(rv, HTTPException):
+                    return {"id": item_id, "status": rv.code or 500,
+                            "body": {"ok": False, "error": rv.description or rv.name}}
+            response = app.make_response(rv)
+            return {"id": item_id, "status": response.status_code, "body": response.get_json(silent=True)}
+    except Exception as e:
+        app.logger.exception("[BATCH] erro em %s", path, exc_info=e)
+        return {"id": item_id, "status": 500, "body": {"ok": False, "error": _safe_error_message(e)}}
+
+@app.route("/api/batch", methods=["POST"])
+@require_level(1)
+def api_batch():
+    """
+    Várias leituras em uma ida e volta.
+    Body: { requests: [{ id?, path: "/api/setores" }, ...], parallel?: bool }
+    - Autentica uma vez (o usuário vale para todas as sub-requisições).
+    - Sub-requisições compartilham a conexão da requisição (uma por thread no modo paralelo).
+    - Cada item volta com seu próprio status.
+    """
+    payload = request.get_json(force=True, silent=True) or {}
+    items = payload.get("requests") or payload.get("items") or []
+    if not isinstance(items, list) or not items:
+        return jsonify({"ok": False, "error": "Envie requests: [{ path }]"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"ok": False, "error": f"Maximo de {BATCH_MAX_ITEMS} itens por batch"}), 400
+    items = [i if isinstance(i, dict) else {"path": i} for i in items]
+
+    headers = {"Authorization": request.headers.get("Authorization", "")}
+    state = {
+        "token": _get_bearer_token(),
+        "user": request.current_user,
+        "request_id": g.get("request_id"),
+        "conns": {},
+        "lock": threading.Lock(),
+    }
+
+    def run(item):
+        # contexto limpo por tarefa: só o estado do batch, sem os contextos do Flask da thread pai
+        ctx = Context()
+        ctx.run(_batch_state.set, state)
+        return ctx.run(_run_batch_item, item, headers)
+
+    try:
+        parallel = bool(payload.get("parallel", True)) and BATCH_MAX_WORKERS > 1 and len(items) > 1
+        if parallel:
+            results = list(_get_batch_executor().map(run, items))
+        else:
+            results = [run(item) for item in items]
+    finally:
+        for conn in state["conns"].values():
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    return jsonify({"ok": True, "responses": results})
+
+# =========================
+# 12.2) ADM - PERFIS DE REQUISIÇÃO
+# =========================
+@app.route("/api/admin/profiles/<profile_id>", methods=["GET"])
+@require_level(5)
+def api_admin_profile(profile_id: str):
+    """
+    Relatório de uma requisição executada com X-Profile: 1 (ou ?_profile=1).
+    JSON com o SQL executado e o top de funções; ?formato=prof baixa o perfil bruto (pstats/snakeviz).
+    """
+    ext = "prof" if (request.args.get("formato") or "").lower() == "prof" else "json"
+    found = resolve_profile(PROFILE_DIR, profile_id, ext)
+    if not found:
+        return jsonify({"ok": False, "error": "Perfil nao encontrado"}), 404
+    _owner_id, path = found
+    if ext == "prof":
+        return send_file(path, mimetype="application/octet-stream", as_attachment=True,
+                         download_name=f"perfil_{profile_id[-8:]}.prof")
+    return send_file(path, mimetype="application/json")
+
+# =========================
+# 12.3) ADM - DIAGNÓSTICO DE MEMÓRIA
+# =========================
+_tracemalloc = TracemallocSession()
+_memory_state = {"checked_at": 0.0, "recycling": False}
+
+def _prune_rate_store() -> int:
+    """Remove chaves do rate limit de login sem tentativas na janela (senão o dict só cresce)."""
+    limit = time() - RATE_LIMIT_WINDOW_SEC
+    removed = 0
+    for key, q in list(_rate_store.items()):
+        if not q or q[-1] <= limit:
+            _rate_store.pop(key, None)
+            removed += 1
+    return removed
+
+def _memory_caches() -> dict:
+    """Entradas e bytes aproximados das estruturas por processo que crescem com o uso."""
+    def item(entries, obj):
+        return {"entradas": entries, "bytes": approx_size(obj)}
+
+    valores = _valores_cache.stats()
+    return {
+        "usuarios": item(len(_user_cache), _user_cache),
+        "valores": {"entradas": valores["entradas"], "bytes": valores["bytes"], "max_bytes": valores["max_bytes"]},
+        "rate_limit_login": item(len(_rate_store), _rate_store),
+        "throttle": item(sum(len(b) for b in _throttle_buckets.values()), _throttle_buckets),
+        "leitura_apos_escrita": item(len(_recent_writers), _recent_writers),
+        "eventos_sse": {**pending_events.stats(), "bytes": approx_size(pending_events)},
+        "assets": item(len(_asset_variants), [_asset_manifest, _asset_variants]),
+        "logs": _log_pipeline.stats(),
+    }
+
+def _recycle_supervised() -> bool:
+    """Há quem suba o processo de novo sem derrubar o serviço (worker do gunicorn ou declarado)."""
+    return MEMORY_RECYCLE_SUPERVISED or "gunicorn" in sys.modules
+
+def _recycle_worker(rss: int):
+    _memory_state["recycling"] = True
+    app.logger.warning(
+        "[MEMORIA] RSS %.0f MB acima de MEMORY_RECYCLE_RSS_MB=%s: drenando o worker para reciclar",
+        rss / 2**20, MEMORY_RECYCLE_RSS_MB,
+    )
+    threading.Thread(target=_drain_and_exit, name="memory-recycle", daemon=True).start()
+
+def _drain_and_exit():
+    """
+    Recusa novos jobs e espera os da fila/RUNNING e os resultados de Idempotency-Key pendentes
+    (até MEMORY_RECYCLE_DRAIN_SEC); então envia SIGTERM a si mesmo. As requisições em curso ficam
+    com o gunicorn, que as termina no SIGTERM (graceful_timeout) e sobe outro worker.
+    Health/ready não mudam: os workers compartilham o socket e o nó continua atendendo.
+    """
+    deadline = monotonic() + MEMORY_RECYCLE_DRAIN_SEC
+    stop_archive_scheduler()
+    stopper = threading.Thread(target=jobs.shutdown, kwargs={"wait": True}, name="memory-recycle-jobs", daemon=True)
+    stopper.start()
+    for t in (stopper, _archive_thread):
+        if t is not None:
+            t.join(max(deadline - monotonic(), 0))
+    while monotonic() < deadline and _idempotency.stats()["resultados_pendentes"]:
+        sleep(0.2)
+    pendentes = {"jobs": stopper.is_alive(), **_idempotency.stats()}
+    if pendentes["jobs"] or pendentes["resultados_pendentes"]:
+        app.logger.warning("[MEMORIA] drenagem incompleta após %ss; encerrando assim mesmo: %s",
+                           MEMORY_RECYCLE_DRAIN_SEC, pendentes)
+    else:
+        app.logger.info("[MEMORIA] worker drenado; encerrando")
+    os.kill(os.getpid(), signal.SIGTERM)
+
+@app.after_request
+def _check_worker_memory(response):
+    """A cada MEMORY_CHECK_SEC: limpa o rate limit de login e, se configurado, recicla o worker por RSS."""
+    now = monotonic()
+    if now - _memory_state["checked_at"] < MEMORY_CHECK_SEC:
+        return response
+    _memory_state["checked_at"] = now
+    _prune_rate_store()
+    if MEMORY_RECYCLE_RSS_MB > 0 and not _memory_state["recycling"] and _recycle_supervised():
+        rss = rss_bytes()
+        if rss is not None and rss > MEMORY_RECYCLE_RSS_MB * 2**20:
+            _recycle_worker(rss)
+    return response
+
+@app.route("/api/admin/memoria", methods=["GET"])
+@require_level(5)
+def api_admin_memoria():
+    """RSS do processo, tamanho dos caches em memória, GC e estado do tracemalloc (por worker)."""
+    rss = rss_bytes()
+    return jsonify({
+        "ok": True,
+        "pid": os.getpid(),
+        "rss_bytes": rss,
+        "rss_mb": round(rss / 2**20, 1) if rss is not None else None,
+        "reciclagem": {
+            "limite_mb": MEMORY_RECYCLE_RSS_MB or None,
+            "ativa": MEMORY_RECYCLE_RSS_MB > 0 and _recycle_supervised(),
+            "em_andamento": _memory_state["recycling"],
+        },
+        "threads": threading.active_count(),
+        "gc": {"contagens": gc.get_count(), "objetos": len(gc.get_objects())},
+        "caches": _memory_caches(),
+        "tracemalloc": _tracemalloc.status(),
+    })
+
+@app.route("/api/admin/memoria/tracemalloc", methods=["POST"])
+@require_level(5)
+def api_admin_tracemalloc():
+    """
+    Body: { acao: "start" | "snapshot" | "stop", top?: 20, frames?: 1 }
+    - start: liga o tracemalloc neste worker (custo de CPU/memória até o stop);
+    - snapshot: maiores alocações por linha + diferença para o snapshot anterior;
+    - stop: desliga e libera os rastros.
+    """
+    payload = request.get_json(force=True, silent=True) or {}
+    acao = str(payload.get("acao") or "").strip().lower()
+    try:
+        top = min(max(int(payload.get("top") or 20), 1), 200)
+        frames = min(max(int(payload.get("frames") or 1), 1), 25)
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "top/frames devem ser inteiros"}), 400
+
+    if acao == "start":
+        result = _tracemalloc.start(frames)
+    elif acao == "stop":
+        result = _tracemalloc.stop()
+    elif acao == "snapshot":
+        if not _tracemalloc.active:
+            return jsonify({"ok": False, "error": "tracemalloc inativo; envie acao=start antes"}), 409
+        result = _tracemalloc.snapshot(top)
+    else:
+        return jsonify({"ok": False, "error": "acao deve ser start, snapshot ou stop"}), 400
+    _log_action(request.current_user, f"tracemalloc_{acao}", f"pid={os.getpid()}")
+    return jsonify({"ok": True, "pid": os.getpid(), **result})
+
+# =========================
+# 13) ARQUIVAMENTO DE DRAFTS (ZDR -> ZDH)
+# =========================
+_ARCHIVE_LOCK_RESOURCE = "ZDR_ARCHIVE"
+# um ramo por status, cada um na própria coluna (índices filtrados da migração 0007);
+# ZDR_CRIADO_EM só para linhas resolvidas antes de existirem as colunas de data
+_ARCHIVE_WHERE = (
+    "((ZDR_STATUS = 'APPROVED' AND ZDR_APROVADO_EM < ?) "
+    "OR (ZDR_STATUS = 'REJECTED' AND ZDR_REJEITADO_EM < ?) "
+    "OR (ZDR_STATUS IN ('APPROVED','REJECTED') AND ZDR_APROVADO_EM IS NULL "
+    "AND ZDR_REJEITADO_EM IS NULL AND ZDR_CRIADO_EM < ?))"
+)
+_archive_thread: threading.Thread | None = None
+_archive_stop = threading.Event()
+
+def archive_old_drafts(retention_days: int | None = None, batch_size: int | None = None,
+                       dry_run: bool = False, max_batches: int | None = None, progress=None) -> dict:
+    """
+    Move drafts APPROVED/REJECTED resolvidos há mais de `retention_days` de ZDR para ZDH.
+    - Cada lote é uma transação curta (DELETE TOP ... OUTPUT INTO), evitando escalar locks.
+    - dry_run: só conta os candidatos.
+    - sp_getapplock garante uma execução por vez entre workers/CLI.
+    """
+    retention_days = ARCHIVE_RETENTION_DAYS if retention_days is None else int(retention_days)
+    batch_size = min(max(int(batch_size or ARCHIVE_BATCH_SIZE), 1), ARCHIVE_MAX_BATCH_SIZE)
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    report = progress or (lambda msg: app.logger.info("[ARQUIVO] %s", msg))
+
+    hist_cols = ", ".join(c.replace("ZDR_", "ZDH_", 1) for c in _ZDR_COLS)
+    deleted_cols = ", ".join(f"DELETED.{c}" for c in _ZDR_COLS)
+
+    result = {
+        "ok": True,
+        "dry_run": bool(dry_run),
+        "corte": cutoff.isoformat(timespec="seconds"),
+        "candidatos": 0,
+        "arquivados": 0,
+        "lotes": 0,
+    }
+
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT COUNT(1) FROM ZDR WHERE {_ARCHIVE_WHERE}", (cutoff,) * 3)
+        total = int(cur.fetchone()[0] or 0)
+        result["candidatos"] = total
+        conn.commit()
+
+        if dry_run or not total:
+            report(f"{total} drafts anteriores a {result['corte']} elegiveis (dry_run={bool(dry_run)})")
+            return result
+
+        cur.execute(
+            "SET NOCOUNT ON; DECLARE @r INT; "
+            "EXEC @r = sp_getapplock @Resource = ?, @LockMode = 'Exclusive', @LockOwner = 'Session', @LockTimeout = 0; "
+            "SELECT @r",
+            (_ARCHIVE_LOCK_RESOURCE,)
+        )
+        if int(cur.fetchone()[0]) < 0:
+            report("outro processo ja esta arquivando; execucao ignorada")
+            result["ok"] = False
+            return result
+
+        try:
+            while max_batches is None or result["lotes"] < int(max_batches):
+                # NOCOUNT da sessão (applock acima) deixa cur.rowcount em -1: a contagem vem do SELECT
+                cur.execute(
+                    f"DELETE TOP (?) FROM ZDR "
+                    f"OUTPUT {deleted_cols} INTO ZDH ({hist_cols}) "
+                    f"WHERE {_ARCHIVE_WHERE}; "
+                    f"SELECT @@ROWCOUNT",
+                    (batch_size, cutoff, cutoff, cutoff)
+                )
+                moved = int(cur.fetchone()[0] or 0)
+                conn.commit()
+                if moved <= 0:
+                    break
+
+                result["lotes"] += 1
+                result["arquivados"] += moved
+                report(f"lote {result['lotes']}: {moved} movidos ({result['arquivados']}/{total})")
+
+                if moved < batch_size:
+                    break
+                if ARCHIVE_BATCH_PAUSE_MS > 0:
+                    sleep(ARCHIVE_BATCH_PAUSE_MS / 1000)
+        finally:
+            cur.execute("EXEC sp_releaseapplock @Resource = ?, @LockOwner = 'Session'", (_ARCHIVE_LOCK_RESOURCE,))
+            conn.commit()
+
+    return result
+
+def _archive_scheduler_loop():
+    interval = max(ARCHIVE_INTERVAL_HOURS, 1) * 3600
+    # pequena espera inicial para não competir com o boot
+    if _archive_stop.wait(60):
+        return
+    while True:
+        try:
+            archive_old_drafts()
+        except Exception as e:
+            app.logger.exception("[ARQUIVO] falha no arquivamento agendado", exc_info=e)
+        if _archive_stop.wait(interval):
+            return
+
+def start_archive_scheduler():
+    """Inicia o arquivamento periódico em thread daemon (ARCHIVE_SCHEDULE_ENABLED=true)."""
+    global _archive_thread
+    if not ARCHIVE_SCHEDULE_ENABLED:
+        return
+    if _archive_thread and _archive_thread.is_alive():
+        return
+    _archive_stop.clear()
+    _archive_thread = threading.Thread(target=_archive_scheduler_loop, name="zdr-archive", daemon=True)
+    _archive_thread.start()
+    app.logger.info("[ARQUIVO] agendador iniciado (a cada %sh, retencao %s dias)", ARCHIVE_INTERVAL_HOURS, ARCHIVE_RETENTION_DAYS)
+
+def stop_archive_scheduler():
+    _archive_stop.set()
+
+@app.cli.command("archive-drafts")
+@click.option("--retention-days", type=int, default=None, help="Dias de retencao em ZDR (padrao: ARCHIVE_RETENTION_DAYS).")
+@click.option("--batch-size", type=int, default=None, help="Linhas por transacao (padrao: ARCHIVE_BATCH_SIZE).")
+@click.option("--max-batches", type=int, default=None, help="Limita a quantidade de lotes nesta execucao.")
+@click.option("--dry-run", is_flag=True, help="Apenas conta os drafts elegiveis.")
+def cli_archive_drafts(retention_days, batch_size, max_batches, dry_run):
+    """Move drafts APPROVED/REJECTED antigos de ZDR para ZDH."""
+    result = archive_old_drafts(
+        retention_days=retention_days,
+        batch_size=batch_size,
+        dry_run=dry_run,
+        max_batches=max_batches,
+        progress=click.echo,
+    )
+    click.echo(
+        f"candidatos={result['candidatos']} arquivados={result['arquivados']} "
+        f"lotes={result['lotes']} corte={result['corte']} dry_run={result['dry_run']}"
+    )
+    if not result["ok"]:
+        raise SystemExit(1)
+
+# =========================
+# 13.1) JOBS EM SEGUNDO PLANO
+# =========================
+jobs = JobRunner(
+    connect=get_db_connection,
+    max_workers=JOBS_MAX_WORKERS,
+    max_queued=JOBS_MAX_QUEUED,
+    retention_hours=JOBS_RETENTION_HOURS,
+    stale_minutes=JOBS_STALE_MINUTES,
+    logger=app.logger,
+    describe_error=lambda e: _safe_error_message(e, "Falha ao executar o job"),
+)
+
+def _job_user(ctx) -> dict:
+    """Usuário do job com o escopo RBAC atual (revalida ativo/nível na execução)."""
+    record = _load_user_record(int(ctx.user_id))
+    if not record or not record.get("ativo"):
+        raise PermissionError("Usuario inativo")
+    return record
+
+def _prepare_import_job(user: dict):
+    upload = _import_upload()
+    if upload is None:
+        raise ValueError("Envie o arquivo CSV/XLSX no campo 'arquivo'")
+    stream, filename, content_type = upload
+
+    # o upload só vive durante a requisição: copia para disco e o job apaga ao terminar
+    JOBS_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    path = JOBS_UPLOAD_DIR / f"{uuid.uuid4().hex}.upload"
+    with open(path, "wb") as f:
+        shutil.copyfileobj(stream, f, 1024 * 1024)
+    params = {
+        "arquivo": str(path),
+        "filename": filename,
+        "content_type": content_type,
+        "dry_run": _arg_flag("dry_run"),
+    }
+    return params, [path]
+
+@jobs.job("import-valores", min_level=3, prepare=_prepare_import_job)
+def _job_import_valores(ctx, params: dict):
+    user = _job_user(ctx)
+    path = Path(params["arquivo"])
+    size = max(path.stat().st_size, 1)
+    with open(path, "rb") as f:
+        def on_batch(stats):
+            ctx.progress(f.tell() * 100 / size, f"{stats['linhas']} linhas processadas")
+        try:
+            return import_valores(
+                user, f, params.get("filename"), params.get("content_type"),
+                dry_run=bool(params.get("dry_run")), on_batch=on_batch,
+            )
+        except ImportFormatError as e:
+            return {"ok": False, "error": str(e)}
+
+def _prepare_archive_job(user: dict):
+    payload = request.get_json(force=True, silent=True) or {}
+    params = {
+        "retention_days": payload.get("retention_days"),
+        "batch_size": payload.get("batch_size"),
+        "max_batches": payload.get("max_batches"),
+        "dry_run": bool(payload.get("dry_run")),
+    }
+    return params, []
+
+@jobs.job("archive-drafts", min_level=5, prepare=_prepare_archive_job)
+def _job_archive_drafts(ctx, params: dict):
+    return archive_old_drafts(
+        retention_days=params.get("retention_days"),
+        batch_size=params.get("batch_size"),
+        max_batches=params.get("max_batches"),
+        dry_run=bool(params.get("dry_run")),
+        progress=lambda msg: ctx.progress(message=msg),
+    )
+
+def _prepare_drafts_bulk_job(user: dict):
+    return _parse_bulk_request(request.get_json(force=True, silent=True) or {}), []
+
+@jobs.job("drafts-bulk", min_level=3, prepare=_prepare_drafts_bulk_job)
+def _job_drafts_bulk(ctx, params: dict):
+    return apply_drafts_bulk(_job_user(ctx), params)
+
+def _prepare_backfill_job(user: dict):
+    payload = request.get_json(force=True, silent=True) or {}
+    # sem dry_run: um parâmetro ignorado aqui faria UPDATEs reais em quem pediu só a simulação
+    extra = sorted(set(payload) - {"batch_size", "max_batches"})
+    if extra:
+        raise ValueError(f"Parâmetros não suportados em backfill-valores: {', '.join(extra)} "
+                         "(use batch_size, max_batches)")
+    return {"batch_size": payload.get("batch_size"), "max_batches": payload.get("max_batches")}, []
+
+@jobs.job("backfill-valores", min_level=5, prepare=_prepare_backfill_job)
+def _job_backfill_valores(ctx, params: dict):
+    return backfill_valores_tipados(
+        batch_size=params.get("batch_size"),
+        max_batches=params.get("max_batches"),
+        progress=lambda msg: ctx.progress(message=msg),
+    )
+
+def _can_see_job(user: dict, job: dict) -> bool:
+    return int(user["nivel"]) >= 4 or job.get("funcionario_id") == int(user["id"])
+
+@app.route("/api/jobs/<tipo>", methods=["POST"])
+@require_level(1)
+def api_submit_job(tipo: str):
+    """
+    Enfileira um job. Tipos: import-valores (multipart "arquivo"), archive-drafts, drafts-bulk e backfill-valores (JSON).
+    Responde 202 com o id; acompanhe em GET /api/jobs/<id>.
+    """
+    user = request.current_user
+    jt = jobs.job_type(tipo)
+    if jt is None:
+        return jsonify({"ok": False, "error": f"Tipo de job desconhecido. Use: {', '.join(jobs.types)}"}), 404
+    if int(user["nivel"]) < jt.min_level:
+        return jsonify({"ok": False, "error": f"Permissão insuficiente (requer nível >= {jt.min_level})"}), 403
+
+    files = []
+    try:
+        params, files = jt.prepare(user) if jt.prepare else (request.get_json(force=True, silent=True) or {}, [])
+        job_id = jobs.submit(tipo, user["id"], params, files=files)
+    except ValueError as e:
+        JobRunner._remove_files(files)
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except JobQueueFull as e:
+        return jsonify({"ok": False, "error": str(e)}), 503, {"Retry-After": "30"}
+    except Exception as e:
+        return _error_response(500, "Erro interno", e)
+
+    _log_action(user, "job_criar", f"tipo={tipo} job_id={job_id}")
+    status_url = f"/api/jobs/{job_id}"
+    return jsonify({"ok": True, "job_id": job_id, "status": "QUEUED", "status_url": status_url}), 202, {"Location": status_url}
+
+@app.route("/api/jobs", methods=["GET"])
+@require_level(1)
+def api_list_jobs():
+    """Jobs recentes do usuário (Gestão/ADM: todos com ?todos=1)."""
+    user = request.current_user
+    todos = _arg_flag("todos") and int(user["nivel"]) >= 4
+    try:
+        return jsonify(jobs.list_jobs(None if todos else user["id"], limit=int(request.args.get("limit") or 50)))
+    except Exception as e:
+        return _error_response(500, "Erro interno", e)
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+@require_level(1)
+def api_get_job(job_id: str):
+    try:
+        job = jobs.get(job_id)
+    except Exception as e:
+        return _error_response(500, "Erro interno", e)
+    if not job or not _can_see_job(request.current_user, job):
+        return jsonify({"ok": False, "error": "Job nao encontrado"}), 404
+    return jsonify(job)
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+@require_level(1)
+def api_cancel_job(job_id: str):
+    user = request.current_user
+    try:
+        job = jobs.get(job_id)
+        if not job or not _can_see_job(user, job):
+            return jsonify({"ok": False, "error": "Job nao encontrado"}), 404
+        if not jobs.cancel(job_id):
+            return jsonify({"ok": False, "error": f"Job ja finalizado ({job['status']})"}), 409
+    except Exception as e:
+        return _error_response(500, "Erro interno", e)
+    _log_action(user, "job_cancelar", f"job_id={job_id}")
+    return jsonify({"ok": True, "job_id": job_id})
+
+@app.cli.command("purge-jobs")
+def cli_purge_jobs():
+    """Remove jobs finalizados antigos e marca como FAILED os sem atualização."""
+    result = jobs.purge()
+    click.echo(f"removidos={result['removidos']} interrompidos={result['interrompidos']}")
+
+@app.cli.command("seed")
+def cli_seed():
+    """Cria o ADM inicial (SEED_ADMIN_EMAIL/SEED_ADMIN_PASSWORD) se ainda não existir."""
+    ensure_seed_admin(force=True)
+    click.echo("seed concluido")
+
+# =========================
+# 13.2) STARTUP (create_app / warm-up / readiness)
+# =========================
+# Warm-up: abre a primeira conexão (pool ODBC), consulta os catálogos e gera o hash
+# bcrypt descartável, para que a primeira requisição real não pague esses custos.
+WARMUP_ENABLED = (os.getenv("WARMUP_ENABLED") or "true").lower() in ("1", "true", "yes", "y")
+WARMUP_BLOCKING = (os.getenv("WARMUP_BLOCKING") or "false").lower() in ("1", "true", "yes", "y")
+
+_startup = {
+    "ready": False,
+    "import_ms": None,
+    "startup_ms": None,
+    "etapas": {},
+    "erros": [],
+}
+_startup_lock = threading.Lock()
+_startup_done = False
+
+def _startup_step(name: str, fn):
+    t0 = perf_counter()
+    try:
+        fn()
+    except Exception as e:
+        _startup["erros"].append(f"{name}: {_safe_error_message(e, type(e).__name__)}")
+        app.logger.warning("[STARTUP] %s falhou: %s", name, e)
+    finally:
+        _startup["etapas"][name] = round((perf_counter() - t0) * 1000, 1)
+
+def _warmup_db():
+    # com réplica, aquece os dois pools (primário e ApplicationIntent=ReadOnly)
+    for read_only in ((False, True) if DB_READ_REPLICA_ENABLED else (False,)):
+        with get_db_connection(read_only=read_only) as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT ZSE_ID, ZSE_NOME, ZSE_ATIVO FROM ZSE WHERE ZSE_ATIVO = 1 ORDER BY ZSE_NOME")
+            cur.fetchall()
+            cur.execute("SELECT ZIN_ID, ZIN_SETOR_ID, ZIN_CODIGO FROM ZIN")
+            cur.fetchall()
+
+def _run_startup():
+    if SEED_ADMIN_ENABLED:
+        _startup_step("seed", ensure_seed_admin)
+    if WARMUP_ENABLED:
+        _startup_step("senha", _dummy_password_hash)
+        _startup_step("banco", _warmup_db)
+    _startup["startup_ms"] = round((perf_counter() - _BOOT_STARTED) * 1000, 1)
+    _startup["ready"] = True
+    app.logger.info(
+        "[STARTUP] pronto em %.0f ms (import %.0f ms; %s)",
+        _startup["startup_ms"], _startup["import_ms"] or 0,
+        ", ".join(f"{k} {v:.0f} ms" for k, v in _startup["etapas"].items()) or "sem warm-up",
+    )
+
+def create_app(start_scheduler: bool = True) -> Flask:
+    """
+    Fase de startup explícita: seed (SEED_ADMIN_ENABLED), warm-up e agendador de arquivamento.
+    As rotas já estão registradas em `app`; chamar mais de uma vez não repete o startup.
+    Uso em WSGI: `src.app:create_app()`. Servido direto como `src.app:app`, o startup roda na
+    primeira requisição (_startup_fallback, com aviso no log) e sem o agendador de arquivamento.
+    """
+    global _startup_done
+    with _startup_lock:
+        if _startup_done:
+            return app
+        _startup_done = True
+
+    if MEMORY_RECYCLE_RSS_MB > 0 and not _recycle_supervised():
+        app.logger.warning("[MEMORIA] MEMORY_RECYCLE_RSS_MB ignorado: processo único (sem gunicorn nem "
+                           "MEMORY_RECYCLE_SUPERVISED=true); reciclar derrubaria o servidor inteiro")
+    if WARMUP_BLOCKING:
+        _run_startup()
+    else:
+        # readiness fica false até o warm-up terminar; o servidor já aceita conexões
+        threading.Thread(target=_run_startup, name="startup-warmup", daemon=True).start()
+    if start_scheduler:
+        start_archive_scheduler()
+    return app
+
+@app.before_request
+def _startup_fallback():
+    """Servidor WSGI apontando para `src.app:app` (ou `flask run`) não chama create_app(): avisa e faz o startup."""
+    if _startup_done:
+        return
+    app.logger.warning("[STARTUP] requisição recebida sem create_app() (servidor apontando para src.app:app?); "
+                       "executando o startup agora, sem o agendador. Use src.app:create_app()")
+    create_app(start_scheduler=False)
+
+@app.route("/api/ready", methods=["GET"])
+def api_ready():
+    """Readiness: 503 até o startup (create_app) terminar o seed/warm-up."""
+    body = {"ok": _startup["ready"], **_startup}
+    return jsonify(body), (200 if _startup["ready"] else 503)
+
+_startup["import_ms"] = round((perf_counter() - _BOOT_STARTED) * 1000, 1)
+
 # =========================
 # 14) MAIN
 # =========================
 if __name__ == "__main__":
-    print("=" * 70)
-    print("🚀 SERVIDOR FLASK INICIADO")
-    print("=" * 70)
-    print("📍 Acesse: http://127.0.0.1:5000")
-    print("=" * 70)
-    app.run(debug=DEBUG, port=int(os.getenv("APP_PORT") or "5000"), host=(os.getenv("APP_HOST") or "127.0.0.1"), use_reloader=False)
+    host = os.getenv("APP_HOST") or "127.0.0.1"
+    port = int(os.getenv("APP_PORT") or "5000")
+    app.logger.info("[STARTUP] servidor Flask iniciado: http://%s:%s", host, port)
+    create_app()
+    app.run(debug=DEBUG, port=port, host=host, use_reloader=False)
@@ -0,0 +1,297 @@
+"""
+===========================================================
+PIPELINE DE ASSETS ESTÁTICOS
+===========================================================
+
+Gera, a partir de src/static, versões minificadas com hash do conteúdo no nome
+(ex.: script.3f2a9c1b0d.js), mais as variantes pré-comprimidas .gz / .br,
+em src/static/dist, e um manifest.json { "script.js": "script.3f2a9c1b0d.js" }.
+
+O app usa o manifest para montar as URLs no template (asset_url) e serve os
+arquivos com cache imutável, escolhendo o .br/.gz pelo Accept-Encoding.
+
+Uso (passo de deploy, antes de subir os workers):
+    flask --app src.app build-assets
+
+O build pode rodar com workers no ar servindo o dist: cada arquivo é gravado
+em um temporário e trocado com os.replace (nunca fica meio escrito), o
+manifest é trocado por último, e os arquivos de builds anteriores só são
+apagados depois de prune_grace_sec (um worker ainda com o manifest antigo
+continua achando o que referencia).
+===========================================================
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from time import time
+from pathlib import Path
+
+try:  # opcional: sem brotli, só gera .gz
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+DIST_DIR = STATIC_DIR / "dist"
+MANIFEST_NAME = "manifest.json"
+
+ASSETS = ("script.js", "styles.css")
+
+HASH_LEN = 10
+PRUNE_GRACE_SEC = 24 * 3600
+
+# =========================
+# MINIFICAÇÃO (conservadora)
+# =========================
+_JS_REGEX_PREFIX = set("(,=:[!&|?{};+-*%<>~^")
+_JS_WORD_RE = re.compile(r"[\w$]+")
+_JS_REGEX_KEYWORDS = {
+    "return", "typeof", "case", "do", "else", "in", "of", "new",
+    "delete", "void", "throw", "instanceof", "yield", "await",
+}
+
+
+def _collapse_ws(ws: str) -> str:
+    """Espaços viram um espaço; quebras de linha são mantidas (ASI do JS)."""
+    return "\n" if "\n" in ws else " "
+
+
+def minify_js(src: str) -> str:
+    """
+    Remove comentários, indentação e linhas vazias.
+    Strings, template literals (com ${...} aninhado) e regex literais são copiados intactos;
+    quebras de linha são preservadas para não depender de ASI.
+    """
+    out: list[str] = []
+    i, n = 0, len(src)
+    template_depth: list[int] = []  # profundidade de chaves de cada ${ aberto
+    brace_depth = 0
+    last_sig = ""     # último caractere significativo emitido
+    last_word = ""    # última palavra emitida (para detectar regex após keyword)
+
+    def emit(text: str):
+        nonlocal last_sig, last_word
+        out.append(text)
+        stripped = text.rstrip()
+        if stripped:
+            last_sig = stripped[-1]
+            m = re.search(r"[A-Za-z_$][\w$]*$", stripped)
+            last_word = m.group(0) if m else ""
+
+    def read_template(start: int) -> int:
+        """Copia `...` até o fim ou até ${ (retorna índice após o trecho)."""
+        j = start + 1
+        while j < n:
+            c = src[j]
+            if c == "\\":
+                j += 2
+                continue
+            if c == "`":
+                emit(src[start:j + 1])
+                return j + 1
+            if c == "$" and j + 1 < n and src[j + 1] == "{":
+                emit(src[start:j + 2])
+                template_depth.append(brace_depth)
+                return j + 2
+            j += 1
+        emit(src[start:])
+        return n
+
+    while i < n:
+        c = src[i]
+
+        # whitespace
+        if c in " \t\r\n":
+            j = i
+            while j < n and src[j] in " \t\r\n":
+                j += 1
+            if out and last_sig:
+                out.append(_collapse_ws(src[i:j]))
+            i = j
+            continue
+
+        # comentários
+        if c == "/" and i + 1 < n and src[i + 1] == "/":
+            j = src.find("\n", i)
+            i = n if j < 0 else j
+            continue
+        if c == "/" and i + 1 < n and src[i + 1] == "*":
+            j = src.find("*/", i + 2)
+            i = n if j < 0 else j + 2
+            continue
+
+        # strings
+        if c in ("'", '"'):
+            j = i + 1
+            while j < n and src[j] != c:
+                if src[j] == "\\":
+                    j += 1
+                elif src[j] == "\n":
+                    break
+                j += 1
+            emit(src[i:j + 1])
+            i = j + 1
+            continue
+
+        if c == "`":
+            i = read_template(i)
+            continue
+
+        # fim de ${...} dentro de template
+        if c == "}" and template_depth and template_depth[-1] == brace_depth:
+            template_depth.pop()
+            i = read_template(i)
+            continue
+
+        # regex literal
+        if c == "/" and (not last_sig or last_sig in _JS_REGEX_PREFIX or last_word in _JS_REGEX_KEYWORDS):
+            j = i + 1
+            in_class = False
+            while j < n and src[j] != "\n":
+                ch = src[j]
+                if ch == "\\":
+                    j += 2
+                    continue
+                if ch == "[":
+                    in_class = True
+                elif ch == "]":
+                    in_class = False
+                elif ch == "/" and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (src[j].isalpha()):
+                j += 1  # flags
+            emit(src[i:j])
+            i = j
+            continue
+
+        if c == "{":
+            brace_depth += 1
+        elif c == "}":
+            brace_depth -= 1
+
+        # identificadores/números de uma vez
+        m = _JS_WORD_RE.match(src, i)
+        if m:
+            emit(m.group(0))
+            i = m.end()
+            continue
+
+        emit(c)
+        i += 1
+
+    text = "".join(out)
+    # remove espaços no fim das linhas e linhas vazias
+    return "\n".join(line.rstrip() for line in text.split("\n") if line.strip()) + "\n"
+
+
+_CSS_TOKEN_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/)""", re.S)
+
+
+def minify_css(src: str) -> str:
+    """Remove comentários e espaços redundantes (strings preservadas)."""
+    parts = []
+    for idx, piece in enumerate(_CSS_TOKEN_RE.split(src)):
+        if idx % 2 == 1:
+            if piece.startswith("/*"):
+                continue
+            parts.append(piece)
+            continue
+        piece = re.sub(r"\s+", " ", piece)
+        piece = re.sub(r"\s*([{};,])\s*", r"\1", piece)
+        piece = re.sub(r":\s+", ":", piece)
+        parts.append(piece)
+    css = "".join(parts).replace(";}", "}")
+    return css.strip() + "\n"
+
+
+_MINIFIERS = {".js": minify_js, ".css": minify_css}
+
+
+# =========================
+# BUILD / MANIFEST
+# =========================
+def _fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LEN]
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Grava em um temporário no mesmo diretório e troca (os.replace é atômico)."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def build_assets(static_dir: Path = STATIC_DIR, dist_dir: Path = DIST_DIR, log=None,
+                 prune_grace_sec: int = PRUNE_GRACE_SEC) -> dict:
+    """
+    Minifica, aplica hash e pré-comprime os ASSETS.
+    Idempotente: arquivos já existentes com o mesmo hash não são reescritos.
+    Seguro com workers servindo o dist (ver cabeçalho do módulo).
+    Retorna o manifest gerado.
+    """
+    log = log or (lambda msg: None)
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    keep = {MANIFEST_NAME}
+    for hashed in load_manifest(dist_dir).values():  # build anterior: ainda pode estar em uso
+        keep.update({hashed, hashed + ".gz", hashed + ".br"})
+
+    for name in ASSETS:
+        src_path = static_dir / name
+        if not src_path.exists():
+            continue
+        source = src_path.read_text(encoding="utf-8-sig")
+        minify = _MINIFIERS.get(src_path.suffix)
+        data = (minify(source) if minify else source).encode("utf-8")
+
+        hashed = f"{src_path.stem}.{_fingerprint(data)}{src_path.suffix}"
+        manifest[name] = hashed
+        keep.update({hashed, hashed + ".gz", hashed + ".br"})
+
+        target = dist_dir / hashed
+        if not target.exists():
+            # variantes antes do original: se o original existe, o build dele terminou
+            # mtime fixo: gzip determinístico para o mesmo conteúdo
+            _write_atomic(dist_dir / (hashed + ".gz"), gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_atomic(dist_dir / (hashed + ".br"), brotli.compress(data, quality=11))
+            _write_atomic(target, data)
+            log(f"{name} -> {hashed} ({len(source.encode('utf-8'))} -> {len(data)} bytes)")
+
+    _write_atomic(dist_dir / MANIFEST_NAME,
+                  json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+
+    # remove builds antigos (fora do manifest atual e do anterior) depois da carência
+    limit = time() - prune_grace_sec
+    for old in dist_dir.iterdir():
+        if old.is_file() and old.name not in keep:
+            try:
+                if old.stat().st_mtime < limit:
+                    old.unlink()
+            except OSError:
+                pass
+    return manifest
+
+
+def load_manifest(dist_dir: Path = DIST_DIR) -> dict:
+    path = dist_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,189 @@
+"""
+===========================================================
+CIRCUIT BREAKER (fail-fast quando o banco está fora)
+===========================================================
+
+Sem o breaker, cada requisição espera o timeout de login do ODBC quando o
+SQL Server está inacessível e o worker fica preso; com poucos workers o app
+inteiro para de responder. O breaker conta as falhas recentes e, acima do
+limite, passa a recusar as chamadas na hora (CircuitOpenError) até o banco
+voltar.
+
+Estados:
+- CLOSED: chamadas normais. Falhas e sucessos entram em uma janela de
+  window_sec; com pelo menos min_calls chamadas e taxa de falha
+  >= failure_rate, abre.
+- OPEN: before_call() levanta CircuitOpenError (retry_after = segundos
+  restantes). Após open_sec, passa a HALF_OPEN.
+- HALF_OPEN: libera até half_open_max chamadas de prova ao mesmo tempo.
+  Um sucesso fecha o circuito; uma falha reabre (open_sec dobra a cada
+  reabertura seguida, até max_open_sec).
+
+O app decide o que é falha: erro no pyodbc.connect() ou conexão perdida
+no meio da consulta chamam record_failure(); conexão aberta,
+record_success().
+===========================================================
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from time import monotonic
+
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitOpenError(RuntimeError):
+    """Circuito aberto: a chamada foi recusada sem tentar o recurso."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} indisponível (circuito aberto)")
+        self.name = name
+        self.retry_after = max(int(retry_after), 1)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 5,
+        window_sec: float = 30,
+        open_sec: float = 10,
+        max_open_sec: float = 120,
+        half_open_max: int = 1,
+        logger=None,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = max(int(min_calls), 1)
+        self.window_sec = window_sec
+        self.open_sec = open_sec
+        self.max_open_sec = max(max_open_sec, open_sec)
+        self.half_open_max = max(int(half_open_max), 1)
+        self.logger = logger
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._calls: deque[tuple[float, bool]] = deque()  # (instante, falhou)
+        self._opened_at = 0.0
+        self._open_for = open_sec
+        self._probes = 0
+        self._last_error: str | None = None
+        self._last_change = datetime.now(timezone.utc)
+        self._rejected = 0
+
+    # ---------- chamadas ----------
+    def before_call(self):
+        """Levanta CircuitOpenError se a chamada não deve ser feita agora."""
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self._opened_at + self._open_for - monotonic()
+                if remaining > 0:
+                    self._rejected += 1
+                    raise CircuitOpenError(self.name, remaining + 0.999)
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_max:
+                    self._rejected += 1
+                    raise CircuitOpenError(self.name, 1)
+                self._probes += 1
+
+    def record_success(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+                self._open_for = self.open_sec
+                self._calls.clear()
+                self._set_state(CLOSED)
+                return
+            self._add_call(False)
+
+    def record_failure(self, exc: BaseException | None = None):
+        with self._lock:
+            if exc is not None:
+                self._last_error = f"{type(exc).__name__}: {exc}"[:300]
+            if self._state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+                self._open_for = min(self._open_for * 2, self.max_open_sec)
+                self._trip()
+                return
+            if self._state == OPEN:
+                return
+            self._add_call(True)
+            total = len(self._calls)
+            failures = sum(1 for _, failed in self._calls if failed)
+            if total >= self.min_calls and failures / total >= self.failure_rate:
+                self._open_for = self.open_sec
+                self._trip()
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+            self._probes = 0
+            self._open_for = self.open_sec
+            self._set_state(CLOSED)
+
+    # ---------- estado ----------
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and monotonic() >= self._opened_at + self._open_for:
+                return HALF_OPEN  # a próxima chamada será a prova
+            return self._state
+
+    def snapshot(self, include_error: bool = False) -> dict:
+        """Estado para o health check; last_error (texto da exceção) só com include_error=True."""
+        with self._lock:
+            self._expire(monotonic())
+            total = len(self._calls)
+            failures = sum(1 for _, failed in self._calls if failed)
+            retry_after = None
+            state = self._state
+            if state == OPEN:
+                remaining = self._opened_at + self._open_for - monotonic()
+                if remaining > 0:
+                    retry_after = int(remaining + 0.999)
+                else:
+                    state = HALF_OPEN
+            return {
+                "state": state,
+                "window_calls": total,
+                "window_failures": failures,
+                "retry_after": retry_after,
+                "rejected": self._rejected,
+                "since": self._last_change.isoformat(timespec="seconds"),
+                **({"last_error": self._last_error} if include_error else {}),
+            }
+
+    # ---------- internos (com _lock) ----------
+    def _expire(self, now: float):
+        limit = now - self.window_sec
+        while self._calls and self._calls[0][0] < limit:
+            self._calls.popleft()
+
+    def _add_call(self, failed: bool):
+        now = monotonic()
+        self._expire(now)
+        self._calls.append((now, failed))
+
+    def _trip(self):
+        self._opened_at = monotonic()
+        self._calls.clear()
+        self._set_state(OPEN)
+
+    def _set_state(self, state: str):
+        if state == self._state:
+            return
+        previous, self._state = self._state, state
+        self._last_change = datetime.now(timezone.utc)
+        if state != HALF_OPEN:
+            self._probes = 0
+        if self.logger is not None:
+            log = self.logger.warning if state == OPEN else self.logger.info
+            extra = f" por {self._open_for:.0f}s ({self._last_error})" if state == OPEN else ""
+            log("[BREAKER] %s: %s -> %s%s", self.name, previous, state, extra)
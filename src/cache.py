@@ -0,0 +1,115 @@
+"""
+===========================================================
+CACHE DE RESULTADOS (LRU por bytes)
+===========================================================
+
+Guarda respostas já serializadas (bytes) por chave, com limite total em
+bytes, limite de idade (ttl_sec) e remoção do menos usado quando enche.
+
+A invalidação é explícita (as rotas de escrita chamam invalidate() com as
+chaves afetadas). Para uma leitura que começou antes da escrita não gravar
+o resultado antigo depois dela, cada chave tem uma geração: o leitor pega
+generation() antes da consulta e put() descarta o valor se a geração mudou.
+
+O cache é por processo; ttl_sec limita quanto tempo outro worker pode
+servir um valor que só foi invalidado no processo que escreveu.
+===========================================================
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+
+class ResultCache:
+    def __init__(self, max_bytes: int, ttl_sec: float = 60, max_entry_bytes: int | None = None):
+        self.max_bytes = max(int(max_bytes), 0)
+        self.ttl_sec = ttl_sec
+        self.max_entry_bytes = max_entry_bytes or max(self.max_bytes // 4, 1)
+        self._lock = threading.Lock()
+        self._data: OrderedDict[object, tuple[float, bytes]] = OrderedDict()  # chave -> (expira, valor)
+        self._generations: dict[object, int] = {}
+        self._invalidated_at: dict[object, float] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key) -> bytes | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= monotonic():
+                if item is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def generation(self, key) -> int:
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def invalidated_within(self, key, seconds: float) -> bool:
+        """A chave foi invalidada há menos de `seconds` (ex.: réplica ainda pode estar atrasada)."""
+        with self._lock:
+            at = self._invalidated_at.get(key)
+            return at is not None and monotonic() - at < seconds
+
+    def put(self, key, value: bytes, generation: int) -> bool:
+        size = len(value)
+        if not self.enabled or size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            if self._generations.get(key, 0) != generation:
+                return False  # escrita no meio da leitura: valor pode estar desatualizado
+            if key in self._data:
+                self._drop(key)
+            while self._data and self._bytes + size > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._drop(oldest)
+                self.evictions += 1
+            self._data[key] = (monotonic() + self.ttl_sec, value)
+            self._bytes += size
+            return True
+
+    def invalidate(self, keys):
+        now = monotonic()
+        with self._lock:
+            for key in keys:
+                self._generations[key] = self._generations.get(key, 0) + 1
+                self._invalidated_at[key] = now
+                if key in self._data:
+                    self._drop(key)
+                self.invalidations += 1
+            if len(self._invalidated_at) > 10000:
+                # só interessa o passado recente; gerações ficam (são pequenas e evitam reuso)
+                limit = now - 3600
+                for key in [k for k, at in self._invalidated_at.items() if at < limit]:
+                    del self._invalidated_at[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entradas": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else None,
+                "evictions": self.evictions,
+                "invalidacoes": self.invalidations,
+            }
+
+    def _drop(self, key):
+        _, value = self._data.pop(key)
+        self._bytes -= len(value)
@@ -0,0 +1,171 @@
+"""
+===========================================================
+EVENTOS EM PROCESSO (pub/sub para Server-Sent Events)
+===========================================================
+
+As rotas de escrita publicam no EventBus depois do commit; cada conexão
+SSE (GET /api/stream/...) é um Subscription com fila própria e filtro
+(ex.: setor do líder).
+
+- Ids de evento são "<época>-<n>": a época muda a cada processo, então um
+  Last-Event-ID de outro processo/reinício nunca é confundido com um
+  evento conhecido.
+- O bus guarda os últimos `history` eventos; quem reconecta com
+  Last-Event-ID recebe o que perdeu. Se o id saiu do histórico (ou é de
+  outra época), recebe um evento "reset" e recarrega a lista inteira.
+- Fila cheia (cliente lento) também vira "reset", em vez de crescer sem
+  limite ou bloquear quem publica.
+
+O bus é por processo: com vários workers, cada um só entrega o que foi
+publicado nele mesmo (o "reset" na reconexão cobre a diferença).
+===========================================================
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+RESET = "reset"
+
+
+class BusFull(RuntimeError):
+    """Limite de conexões simultâneas atingido."""
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    event: str
+    data: dict = field(default_factory=dict)
+    setor_id: int | None = None
+
+    def to_sse(self) -> str:
+        payload = json.dumps(self.data, ensure_ascii=False, default=str, separators=(",", ":"))
+        return f"id: {self.id}\nevent: {self.event}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    def __init__(self, bus: EventBus, match: Callable[[Event], bool], queue_size: int):
+        self._bus = bus
+        self.match = match
+        self._queue: queue.Queue[Event] = queue.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def _offer(self, ev: Event):
+        if self.closed or not self.match(ev):
+            return
+        try:
+            self._queue.put_nowait(ev)
+        except queue.Full:
+            # cliente não acompanha: descarta a fila e pede recarga completa
+            with self._queue.mutex:
+                self._queue.queue.clear()
+            self._queue.put_nowait(self._bus.reset_event(ev.setor_id))
+
+    def get(self, timeout: float) -> Event | None:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._bus._unsubscribe(self)
+
+
+class EventBus:
+    def __init__(self, history: int = 500, max_subscribers: int = 100, queue_size: int = 200):
+        self.epoch = os.urandom(4).hex()
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._history: deque[tuple[int, Event]] = deque(maxlen=max(int(history), 1))
+        self._subs: list[Subscription] = []
+        self.published = 0
+
+    # ---------- publicação ----------
+    def _next_id(self) -> tuple[int, str]:
+        self._seq += 1
+        return self._seq, f"{self.epoch}-{self._seq}"
+
+    def reset_event(self, setor_id: int | None = None) -> Event:
+        with self._lock:
+            _, ev_id = self._next_id()
+        return Event(ev_id, RESET, {}, setor_id)
+
+    def publish(self, event: str, data: dict, setor_id: int | None = None) -> Event:
+        with self._lock:
+            seq, ev_id = self._next_id()
+            ev = Event(ev_id, event, data, setor_id)
+            self._history.append((seq, ev))
+            subs = list(self._subs)
+            self.published += 1
+        for sub in subs:
+            sub._offer(ev)
+        return ev
+
+    def publish_lazy(self, event: str, build: Callable[[], dict | None], setor_id: int | None = None):
+        """
+        Publica só se alguém escuta: build() (que pode consultar o banco) não roda sem assinantes.
+        Sem assinantes grava um "reset" no histórico, para quem reconectar logo em seguida recarregar.
+        """
+        if not self.has_subscribers:
+            with self._lock:
+                seq, ev_id = self._next_id()
+                self._history.append((seq, Event(ev_id, RESET, {}, setor_id)))
+            return None
+        data = build()
+        if data is None:
+            return None
+        return self.publish(event, data, setor_id)
+
+    # ---------- assinatura ----------
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subs)
+
+    def subscribe(self, match: Callable[[Event], bool], last_event_id: str | None = None) -> Subscription:
+        sub = Subscription(self, match, self.queue_size)
+        with self._lock:
+            if len(self._subs) >= self.max_subscribers:
+                raise BusFull("Limite de conexões de eventos atingido")
+            missed = self._missed_since(last_event_id) if last_event_id else []
+            self._subs.append(sub)
+        if missed is None:
+            sub._offer(self.reset_event())
+        else:
+            for ev in missed:
+                sub._offer(ev)
+        return sub
+
+    def _missed_since(self, last_event_id: str) -> list[Event] | None:
+        """Eventos após last_event_id; None se não dá para saber (outra época ou fora do histórico)."""
+        epoch, _, seq = last_event_id.strip().partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq > self._seq:
+            return None
+        oldest = self._history[0][0] if self._history else self._seq + 1
+        if seq + 1 < oldest:
+            return None
+        return [ev for s, ev in self._history if s > seq]
+
+    def _unsubscribe(self, sub: Subscription):
+        with self._lock:
+            try:
+                self._subs.remove(sub)
+            except ValueError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"assinantes": len(self._subs), "publicados": self.published, "historico": len(self._history)}
@@ -0,0 +1,277 @@
+"""
+===========================================================
+CHAVES DE IDEMPOTÊNCIA (Idempotency-Key)
+===========================================================
+
+Uma gravação repetida pelo cliente (timeout de rede, clique duplo) com o
+mesmo cabeçalho Idempotency-Key não é executada de novo: a primeira
+resposta fica em dbo.ZIK (sql/migrations/0006_idempotencia.sql) e é
+devolvida para as repetições. A tabela é compartilhada entre workers.
+
+- begin(): registra a chave como PROCESSING (INSERT condicional com
+  UPDLOCK/HOLDLOCK: só uma requisição ganha). As demais:
+  - DONE com o mesmo conteúdo -> Replay (status + corpo gravados);
+  - conteúdo diferente (hash do método/rota/corpo) -> KeyMismatch;
+  - ainda PROCESSING -> esperam (consulta a cada poll_sec) até wait_sec;
+    depois disso, KeyBusy. Uma chave PROCESSING há mais de lock_sec é
+    considerada abandonada (worker caiu) e é assumida por quem chegar.
+- running(): enquanto a rota executa, uma thread de fundo (uma por
+  processo, para todas as chaves) renova ZIK_CRIADO_EM a cada lock_sec/3;
+  assim uma requisição longa (ex.: bulk de milhares de ids) nunca é
+  tomada por abandonada e executada de novo.
+- finish(): grava o resultado como DONE (expira em ttl_hours), com novas
+  tentativas. Se o banco ainda falhar, o resultado fica pendente na mesma
+  thread de fundo, que segue renovando a chave e tentando gravar até
+  conseguir (ou até ttl_hours). Respostas 5xx não são guardadas:
+  release() apaga a chave e o cliente pode repetir.
+- purge(): remove as expiradas (chamado a cada ~10 min pelo begin()).
+
+O app passa a função de conexão (sempre o primário) e usa begin/running/
+finish no decorator `idempotent` das rotas de escrita.
+===========================================================
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from time import monotonic, sleep
+from typing import Callable
+
+KEY_MAX_LEN = 100
+
+
+class KeyMismatch(ValueError):
+    """A chave já foi usada com outro conteúdo."""
+
+
+class KeyBusy(RuntimeError):
+    """Outra requisição com a mesma chave ainda está em execução."""
+
+
+@dataclass(frozen=True)
+class Replay:
+    status: int
+    body: str
+
+
+def fingerprint(method: str, path: str, body: bytes) -> str:
+    h = hashlib.sha256(f"{method.upper()} {path}\n".encode())
+    h.update(body or b"")
+    return h.hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(self, connect: Callable, ttl_hours: int = 24, lock_sec: int = 60,
+                 wait_sec: float = 3, poll_sec: float = 0.1, logger=None):
+        self.connect = connect
+        self.ttl_hours = max(int(ttl_hours), 1)
+        self.lock_sec = max(int(lock_sec), 1)
+        self.wait_sec = max(float(wait_sec), 0.0)
+        self.poll_sec = max(float(poll_sec), 0.01)
+        self.logger = logger
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+        self._running: dict[tuple[int, str], int] = {}  # chave -> requisições em execução
+        self._pending: dict[tuple[int, str], tuple[int, str, float]] = {}  # chave -> (status, corpo, desiste_em)
+        self._keeper: threading.Thread | None = None
+
+    def begin(self, user_id: int, key: str, route: str, digest: str) -> Replay | None:
+        """None = esta requisição executa (e deve chamar finish/release); Replay = repetir a resposta."""
+        self._maybe_purge()
+        deadline = monotonic() + self.wait_sec
+        while True:
+            with self.connect() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    "DELETE FROM ZIK WHERE ZIK_FUNCIONARIO_ID = ? AND ZIK_CHAVE = ? "
+                    "AND ZIK_EXPIRA_EM < SYSUTCDATETIME()",
+                    (int(user_id), key)
+                )
+                cur.execute(
+                    "INSERT INTO ZIK (ZIK_FUNCIONARIO_ID, ZIK_CHAVE, ZIK_ROTA, ZIK_HASH, ZIK_STATUS, "
+                    "ZIK_CRIADO_EM, ZIK_EXPIRA_EM) "
+                    "SELECT ?, ?, ?, ?, 'PROCESSING', SYSUTCDATETIME(), DATEADD(HOUR, ?, SYSUTCDATETIME()) "
+                    "WHERE NOT EXISTS (SELECT 1 FROM ZIK WITH (UPDLOCK, HOLDLOCK) "
+                    "WHERE ZIK_FUNCIONARIO_ID = ? AND ZIK_CHAVE = ?)",
+                    (int(user_id), key, route[:100], digest, self.ttl_hours, int(user_id), key)
+                )
+                if cur.rowcount == 1:
+                    conn.commit()
+                    return None
+                cur.execute(
+                    "SELECT ZIK_HASH, ZIK_STATUS, ZIK_HTTP_STATUS, ZIK_RESPOSTA, "
+                    "CASE WHEN ZIK_CRIADO_EM < DATEADD(SECOND, -?, SYSUTCDATETIME()) THEN 1 ELSE 0 END "
+                    "FROM ZIK WITH (UPDLOCK) WHERE ZIK_FUNCIONARIO_ID = ? AND ZIK_CHAVE = ?",
+                    (self.lock_sec, int(user_id), key)
+                )
+                row = cur.fetchone()
+                if row is None:  # apagada entre o INSERT e o SELECT: tenta de novo
+                    conn.commit()
+                    continue
+                stored_hash, status, http_status, body, abandoned = row
+                if stored_hash != digest:
+                    conn.commit()
+                    raise KeyMismatch("Idempotency-Key já usada com outro conteúdo")
+                if status == "DONE":
+                    conn.commit()
+                    return Replay(int(http_status), body or "")
+                if abandoned:
+                    cur.execute(
+                        "UPDATE ZIK SET ZIK_CRIADO_EM = SYSUTCDATETIME() "
+                        "WHERE ZIK_FUNCIONARIO_ID = ? AND ZIK_CHAVE = ? AND ZIK_STATUS = 'PROCESSING'",
+                        (int(user_id), key)
+                    )
+                    conn.commit()
+                    if self.logger:
+                        self.logger.warning("[IDEMPOTENCIA] chave abandonada assumida: usuario=%s rota=%s",
+                                            user_id, route)
+                    return None
+                conn.commit()
+            if monotonic() + self.poll_sec > deadline:
+                raise KeyBusy("Requisição com esta Idempotency-Key ainda em processamento")
+            sleep(self.poll_sec)
+
+    def finish(self, user_id: int, key: str, status: int, body: str, attempts: int = 3):
+        """Grava o resultado; se o banco falhar nas `attempts` tentativas, deixa para a thread de fundo."""
+        if status >= 500:
+            self.release(user_id, key)
+            return
+        for attempt in range(1, max(int(attempts), 1) + 1):
+            try:
+                self._store_result(user_id, key, status, body)
+                return
+            except Exception as e:
+                if attempt >= attempts:
+                    if self.logger:
+                        self.logger.warning("[IDEMPOTENCIA] falha ao gravar resultado (nova tentativa em "
+                                            "segundo plano): usuario=%s erro=%s", user_id, e)
+                    with self._lock:
+                        self._pending[(int(user_id), key)] = (int(status), body, monotonic() + self.ttl_hours * 3600)
+                    self._ensure_keeper()
+                    return
+                sleep(self.poll_sec * 2 ** attempt)
+
+    def _store_result(self, user_id: int, key: str, status: int, body: str):
+        with self.connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE ZIK SET ZIK_STATUS = 'DONE', ZIK_HTTP_STATUS = ?, ZIK_RESPOSTA = ?, "
+                "ZIK_EXPIRA_EM = DATEADD(HOUR, ?, SYSUTCDATETIME()) "
+                "WHERE ZIK_FUNCIONARIO_ID = ? AND ZIK_CHAVE = ?",
+                (int(status), body, self.ttl_hours, int(user_id), key)
+            )
+            conn.commit()
+
+    # ---------- chaves em execução ----------
+    @contextmanager
+    def running(self, user_id: int, key: str):
+        """Mantém a chave PROCESSING renovada enquanto o bloco executa."""
+        item = (int(user_id), key)
+        with self._lock:
+            self._running[item] = self._running.get(item, 0) + 1
+        self._ensure_keeper()
+        try:
+            yield
+        finally:
+            with self._lock:
+                count = self._running.pop(item, 1) - 1
+                if count > 0:
+                    self._running[item] = count
+
+    def heartbeat(self, keys) -> int:
+        """Renova ZIK_CRIADO_EM das chaves ainda PROCESSING; devolve quantas foram renovadas."""
+        renewed = 0
+        with self.connect() as conn:
+            cur = conn.cursor()
+            for user_id, key in keys:
+                cur.execute(
+                    "UPDATE ZIK SET ZIK_CRIADO_EM = SYSUTCDATETIME() "
+                    "WHERE ZIK_FUNCIONARIO_ID = ? AND ZIK_CHAVE = ? AND ZIK_STATUS = 'PROCESSING'",
+                    (int(user_id), key)
+                )
+                renewed += int(cur.rowcount or 0)
+            conn.commit()
+        return renewed
+
+    @property
+    def interval_sec(self) -> float:
+        return max(self.lock_sec / 3, 0.5)
+
+    def _ensure_keeper(self):
+        with self._lock:
+            if self._keeper is None or not self._keeper.is_alive():
+                self._keeper = threading.Thread(target=self._keep, name="idempotency-keeper", daemon=True)
+                self._keeper.start()
+
+    def _keep(self):
+        while True:
+            sleep(self.interval_sec)
+            with self._lock:
+                keys = list(self._running) + list(self._pending)
+                pending = dict(self._pending)
+            if not keys:
+                with self._lock:
+                    if not self._running and not self._pending:
+                        self._keeper = None
+                        return
+                continue
+            try:
+                self.heartbeat(keys)
+            except Exception as e:
+                if self.logger:
+                    self.logger.warning("[IDEMPOTENCIA] falha ao renovar chaves: %s", e)
+            now = monotonic()
+            for item, (status, body, give_up_at) in pending.items():
+                try:
+                    self._store_result(item[0], item[1], status, body)
+                except Exception as e:
+                    if now < give_up_at:
+                        continue
+                    if self.logger:
+                        self.logger.error("[IDEMPOTENCIA] resultado descartado após ttl: usuario=%s erro=%s",
+                                          item[0], e)
+                with self._lock:
+                    self._pending.pop(item, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"em_execucao": len(self._running), "resultados_pendentes": len(self._pending)}
+
+    def release(self, user_id: int, key: str):
+        with self.connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "DELETE FROM ZIK WHERE ZIK_FUNCIONARIO_ID = ? AND ZIK_CHAVE = ? AND ZIK_STATUS = 'PROCESSING'",
+                (int(user_id), key)
+            )
+            conn.commit()
+
+    # ---------- retenção ----------
+    def purge(self, batch_size: int = 1000) -> int:
+        removed = 0
+        with self.connect() as conn:
+            cur = conn.cursor()
+            while True:
+                cur.execute(
+                    "DELETE TOP (?) FROM ZIK WHERE ZIK_EXPIRA_EM < SYSUTCDATETIME()",
+                    (int(batch_size),)
+                )
+                count = int(cur.rowcount or 0)
+                conn.commit()
+                removed += count
+                if count < batch_size:
+                    return removed
+
+    def _maybe_purge(self, every_sec: int = 600):
+        now = monotonic()
+        if now - self._last_purge < every_sec:
+            return
+        self._last_purge = now
+        try:
+            self.purge()
+        except Exception as e:
+            if self.logger:
+                self.logger.warning("[IDEMPOTENCIA] falha na limpeza: %s", e)
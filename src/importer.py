@@ -0,0 +1,311 @@
+"""
+===========================================================
+IMPORTAÇÃO DE VALORES (CSV / XLSX)
+===========================================================
+
+Leitura em streaming de planilhas de histórico com as colunas
+setor / indicador (código) / periodo / valor.
+
+- CSV: lido linha a linha (UTF-8, com fallback para cp1252), separador
+  detectado pelo cabeçalho (; , ou TAB).
+- XLSX: somente se o openpyxl estiver instalado (modo read_only).
+
+Nada aqui acessa o banco: o app consome iter_import_rows() em lotes
+(chunked) e grava os erros por linha com ImportErrorReport, que escreve
+direto em disco (memória limitada mesmo com 100k+ linhas).
+===========================================================
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import re
+import shutil
+import tempfile
+import unicodedata
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from time import time
+
+try:  # opcional: sem openpyxl, só CSV
+    import openpyxl
+except ImportError:  # pragma: no cover - depende do ambiente
+    openpyxl = None
+
+# coluna canônica -> cabeçalhos aceitos (já normalizados)
+COLUMN_ALIASES = {
+    "setor": ("setor", "setor_id", "setorid", "setor_nome", "nome_setor"),
+    "indicador": ("indicador", "indicador_codigo", "codigo", "codigo_indicador", "cod_indicador"),
+    "indicador_id": ("indicador_id", "indicadorid"),
+    "periodo": ("periodo", "competencia", "mes", "data"),
+    "valor": ("valor", "value"),
+}
+
+REPORT_FIELDS = ("linha", "erro", "setor", "indicador", "periodo", "valor")
+
+_XLSX_CONTENT_TYPES = {
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class ImportFormatError(ValueError):
+    """Arquivo ilegível ou sem as colunas obrigatórias (erro do arquivo inteiro, não de uma linha)."""
+
+
+# =========================
+# CABEÇALHO
+# =========================
+def _normalize_header(name) -> str:
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", text.strip().lower()).strip("_")
+
+
+def map_columns(header: list) -> dict:
+    """{coluna canônica: índice}. Levanta ImportFormatError se faltar coluna obrigatória."""
+    normalized = [_normalize_header(h) for h in header]
+    mapping = {}
+    for canonical, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                mapping[canonical] = normalized.index(alias)
+                break
+
+    missing = [c for c in ("setor", "periodo", "valor") if c not in mapping]
+    if "indicador" not in mapping and "indicador_id" not in mapping:
+        missing.append("indicador")
+    if missing:
+        raise ImportFormatError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+    return mapping
+
+
+def _row_to_dict(values, mapping: dict) -> dict:
+    return {
+        key: (values[idx] if idx < len(values) else None)
+        for key, idx in mapping.items()
+    }
+
+
+def _is_blank_row(values) -> bool:
+    return all(v is None or str(v).strip() == "" for v in values)
+
+
+# =========================
+# CSV
+# =========================
+def _decode_lines(stream):
+    """Linhas de um stream binário como texto; troca para cp1252 no primeiro erro de UTF-8."""
+    encoding = "utf-8"
+    first = True
+    for raw in stream:
+        if first:
+            raw = raw.removeprefix(b"\xef\xbb\xbf")
+            first = False
+        try:
+            yield raw.decode(encoding)
+        except UnicodeDecodeError:
+            encoding = "cp1252"
+            yield raw.decode(encoding, errors="replace")
+
+
+def _sniff_delimiter(header_line: str) -> str:
+    counts = {d: header_line.count(d) for d in (";", ",", "\t")}
+    best = max(counts, key=counts.get)
+    return best if counts[best] else ","
+
+
+def iter_csv_rows(stream):
+    """(numero_da_linha, {coluna: valor}) para cada linha de dados do CSV."""
+    lines = _decode_lines(stream)
+    header_line = next(lines, None)
+    if header_line is None:
+        raise ImportFormatError("Arquivo vazio")
+
+    delimiter = _sniff_delimiter(header_line)
+    try:
+        mapping = map_columns(next(csv.reader([header_line], delimiter=delimiter)))
+        reader = csv.reader(lines, delimiter=delimiter)
+        for values in reader:
+            if _is_blank_row(values):
+                continue
+            # line_num conta as linhas físicas lidas após o cabeçalho
+            yield reader.line_num + 1, _row_to_dict(values, mapping)
+    except csv.Error as e:
+        raise ImportFormatError(f"CSV inválido: {e}") from e
+
+
+# =========================
+# XLSX
+# =========================
+def iter_xlsx_rows(fileobj):
+    """(numero_da_linha, {coluna: valor}) da primeira planilha do XLSX (openpyxl read_only)."""
+    if openpyxl is None:
+        raise ImportFormatError("Importação de XLSX indisponível (instale openpyxl) - envie CSV")
+
+    try:
+        wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError("XLSX inválido") from e
+
+    try:
+        ws = wb.worksheets[0]
+        mapping = None
+        for line_no, values in enumerate(ws.iter_rows(values_only=True), start=1):
+            if values is None or _is_blank_row(values):
+                continue
+            if mapping is None:
+                mapping = map_columns(list(values))
+                continue
+            yield line_no, _row_to_dict(values, mapping)
+        if mapping is None:
+            raise ImportFormatError("Arquivo vazio")
+    finally:
+        wb.close()
+
+
+def is_xlsx(filename: str | None, content_type: str | None) -> bool:
+    if filename and filename.lower().endswith((".xlsx", ".xlsm")):
+        return True
+    return (content_type or "").split(";")[0].strip().lower() in _XLSX_CONTENT_TYPES
+
+
+def iter_import_rows(stream, filename: str | None = None, content_type: str | None = None):
+    """Escolhe o leitor pelo nome/tipo do arquivo. XLSX precisa de arquivo com seek."""
+    if not is_xlsx(filename, content_type):
+        return iter_csv_rows(stream)
+
+    if not (hasattr(stream, "seekable") and stream.seekable()):
+        spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        shutil.copyfileobj(stream, spooled)
+        spooled.seek(0)
+        stream = spooled
+    return iter_xlsx_rows(stream)
+
+
+def chunked(iterable, size: int):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# =========================
+# VALIDAÇÃO DE CAMPOS
+# =========================
+_PERIODO_FORMATS = ("%Y-%m-%d", "%Y-%m", "%d/%m/%Y", "%m/%Y", "%Y/%m")
+
+
+def parse_periodo(value) -> date:
+    """Competência (sempre dia 1). Aceita date/datetime, YYYY-MM(-DD), DD/MM/YYYY e MM/YYYY."""
+    if isinstance(value, datetime):
+        return value.date().replace(day=1)
+    if isinstance(value, date):
+        return value.replace(day=1)
+
+    text = str(value or "").strip()
+    if " " in text:  # "2024-01-01 00:00:00" vindo de planilha
+        text = text.split(" ", 1)[0]
+    for fmt in _PERIODO_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().replace(day=1)
+        except ValueError:
+            continue
+    raise ValueError("periodo inválido (use YYYY-MM, YYYY-MM-DD ou MM/YYYY)")
+
+
+def format_valor(value) -> str | None:
+    """Valor como texto (ZIV_VALOR). Float inteiro de planilha vira '12' e não '12.0'."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    text = str(value).strip()
+    return text or None
+
+
+def cell_text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+# =========================
+# RELATÓRIO DE ERROS
+# =========================
+_REPORT_ID_RE = re.compile(r"^(\d+)_([0-9a-f]{32})$")
+
+
+class ImportErrorReport:
+    """
+    Erros por linha gravados em CSV no disco (aberto só no primeiro erro).
+    Guarda em memória apenas uma amostra para a resposta da API.
+    """
+
+    def __init__(self, report_dir: Path, owner_id: int, sample_size: int = 20):
+        self.report_dir = Path(report_dir)
+        self.report_id = f"{int(owner_id)}_{os.urandom(16).hex()}"
+        self.sample_size = sample_size
+        self.sample: list[dict] = []
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    @property
+    def path(self) -> Path:
+        return self.report_dir / f"{self.report_id}.csv"
+
+    def add(self, linha: int, erro: str, row: dict):
+        entry = {
+            "linha": linha,
+            "erro": erro,
+            "setor": cell_text(row.get("setor")),
+            "indicador": cell_text(row.get("indicador") or row.get("indicador_id")),
+            "periodo": cell_text(row.get("periodo")),
+            "valor": cell_text(row.get("valor")),
+        }
+        self.count += 1
+        if len(self.sample) < self.sample_size:
+            self.sample.append(entry)
+        if self._writer is None:
+            self.report_dir.mkdir(parents=True, exist_ok=True)
+            # utf-8-sig + ; para abrir direto no Excel em pt-BR
+            self._file = open(self.path, "w", encoding="utf-8-sig", newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=REPORT_FIELDS, delimiter=";")
+            self._writer.writeheader()
+        self._writer.writerow(entry)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def has_file(self) -> bool:
+        return self.count > 0
+
+
+def resolve_report(report_dir: Path, report_id: str) -> tuple[int, Path] | None:
+    """(dono, caminho) de um relatório existente; None se o id é inválido ou o arquivo não existe."""
+    m = _REPORT_ID_RE.match(report_id or "")
+    if not m:
+        return None
+    path = Path(report_dir) / f"{report_id}.csv"
+    if not path.is_file():
+        return None
+    return int(m.group(1)), path
+
+
+def cleanup_reports(report_dir: Path, max_age_sec: int):
+    """Remove relatórios mais antigos que max_age_sec."""
+    report_dir = Path(report_dir)
+    if not report_dir.is_dir():
+        return
+    limit = time() - max_age_sec
+    for path in report_dir.glob("*.csv"):
+        try:
+            if path.stat().st_mtime < limit:
+                path.unlink()
+        except OSError:
+            pass
+
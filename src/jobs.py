@@ -0,0 +1,410 @@
+"""
+===========================================================
+JOBS EM SEGUNDO PLANO
+===========================================================
+
+Executa operações longas (importação, arquivamento, aprovações em massa)
+fora da thread da requisição, em um pool limitado de threads do próprio
+processo. O estado fica em dbo.ZJB (sql/migrations/0003_jobs.sql), então
+qualquer worker responde ao GET de status e ao cancelamento.
+
+- submit() grava o job como QUEUED e o envia ao pool (JobQueueFull se o
+  processo já tem jobs demais na fila).
+- O handler recebe um JobContext: progress() grava progresso/mensagem
+  (no máximo uma escrita por progress_interval) e devolve o pedido de
+  cancelamento; check_cancel() levanta JobCancelled.
+- Cancelar um job QUEUED o finaliza na hora; um RUNNING é sinalizado e
+  para no próximo progress()/check_cancel() do handler.
+- Enquanto um job está na fila ou executando, uma thread de fundo (uma
+  por processo) renova ZJB_ATUALIZADO_EM a cada stale_minutes/3: um job
+  esperando na fila ou preso em um único comando longo continua "vivo".
+- purge() remove finalizados mais antigos que retention_hours e marca como
+  FAILED os que ficaram sem renovação por stale_minutes (o processo que
+  os tinha caiu). _finish() só grava sobre QUEUED/RUNNING: um job já
+  marcado FAILED não volta para DONE.
+
+O app registra os tipos com @jobs.job(...) e passa get_db_connection
+como função de conexão.
+===========================================================
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from time import monotonic, sleep
+from typing import Callable
+
+TERMINAL_STATUSES = ("DONE", "FAILED", "CANCELED")
+
+_JOB_COLS = (
+    "ZJB_ID", "ZJB_TIPO", "ZJB_STATUS", "ZJB_FUNCIONARIO_ID", "ZJB_PROGRESSO", "ZJB_MENSAGEM",
+    "ZJB_RESULTADO", "ZJB_ERRO", "ZJB_CANCELAR", "ZJB_CRIADO_EM", "ZJB_INICIADO_EM",
+    "ZJB_ATUALIZADO_EM", "ZJB_FINALIZADO_EM",
+)
+
+
+class JobCancelled(Exception):
+    """Levantada dentro do handler quando o job foi cancelado."""
+
+
+class JobQueueFull(RuntimeError):
+    """O processo já tem o máximo de jobs na fila/em execução."""
+
+
+@dataclass(frozen=True)
+class JobType:
+    name: str
+    fn: Callable
+    min_level: int = 1
+    prepare: Callable | None = None  # (user) -> (params, arquivos temporários); roda na requisição
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+class JobContext:
+    """Passado ao handler: progresso, cancelamento e dados do job."""
+
+    def __init__(self, runner: "JobRunner", job_id: str, user_id: int | None, params: dict):
+        self.runner = runner
+        self.job_id = job_id
+        self.user_id = user_id
+        self.params = params
+        self._last_write = 0.0
+
+    def check_cancel(self):
+        if self.job_id in self.runner._cancel_requested:
+            raise JobCancelled()
+
+    def progress(self, percent: float | None = None, message: str | None = None, force: bool = False):
+        """Atualiza ZJB (com throttle) e levanta JobCancelled se o job foi cancelado."""
+        self.check_cancel()
+        now = monotonic()
+        if not force and now - self._last_write < self.runner.progress_interval:
+            return
+        self._last_write = now
+
+        pct = None if percent is None else max(0, min(100, int(percent)))
+        with self.runner.connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE ZJB SET ZJB_PROGRESSO = COALESCE(?, ZJB_PROGRESSO), "
+                "ZJB_MENSAGEM = COALESCE(?, ZJB_MENSAGEM), ZJB_ATUALIZADO_EM = SYSUTCDATETIME() "
+                "OUTPUT INSERTED.ZJB_CANCELAR WHERE ZJB_ID = ?",
+                (pct, message[:400] if message else None, self.job_id)
+            )
+            row = cur.fetchone()
+            conn.commit()
+        if row and row[0]:
+            self.runner._cancel_requested.add(self.job_id)
+            raise JobCancelled()
+
+
+class JobRunner:
+    def __init__(self, connect: Callable, max_workers: int = 2, max_queued: int = 20,
+                 retention_hours: int = 72, stale_minutes: int = 30, progress_interval: float = 1.0,
+                 logger=None, describe_error: Callable[[Exception], str] | None = None):
+        self.connect = connect
+        self.max_workers = max(int(max_workers), 1)
+        self.max_queued = max(int(max_queued), 0)
+        self.retention_hours = retention_hours
+        self.stale_minutes = stale_minutes
+        self.progress_interval = progress_interval
+        self.logger = logger
+        self.describe_error = describe_error or (lambda e: str(e))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+        self._types: dict[str, JobType] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._active = 0  # fila + em execução neste processo
+        self._closed = False  # shutdown(): processo encerrando
+        self._cancel_requested: set[str] = set()
+        self._owned: set[str] = set()  # QUEUED/RUNNING deste processo (renovados pelo keeper)
+        self._keeper: threading.Thread | None = None
+        self._last_purge = 0.0
+
+    # ---------- registro ----------
+    def job(self, name: str, min_level: int = 1, prepare: Callable | None = None):
+        def deco(fn):
+            self._types[name] = JobType(name=name, fn=fn, min_level=min_level, prepare=prepare)
+            return fn
+        return deco
+
+    def job_type(self, name: str) -> JobType | None:
+        return self._types.get(name)
+
+    @property
+    def types(self) -> list[str]:
+        return sorted(self._types)
+
+    # ---------- execução ----------
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            return self._executor
+
+    def submit(self, name: str, user_id: int | None, params: dict | None = None, files=()) -> str:
+        """Grava o job (QUEUED) e agenda a execução. `files` são apagados ao fim do job."""
+        jt = self._types.get(name)
+        if jt is None:
+            raise KeyError(name)
+        params = params or {}
+
+        with self._lock:
+            if self._closed:
+                raise JobQueueFull("Servidor reiniciando; tente novamente em instantes")
+            if self._active >= self.max_workers + self.max_queued:
+                raise JobQueueFull("Fila de jobs cheia, tente novamente em instantes")
+            self._active += 1
+
+        job_id = uuid.uuid4().hex
+        try:
+            with self.connect() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    "INSERT INTO ZJB (ZJB_ID, ZJB_TIPO, ZJB_STATUS, ZJB_FUNCIONARIO_ID, ZJB_PARAMS, ZJB_WORKER, "
+                    "ZJB_CRIADO_EM, ZJB_ATUALIZADO_EM) "
+                    "VALUES (?, ?, 'QUEUED', ?, ?, ?, SYSUTCDATETIME(), SYSUTCDATETIME())",
+                    (job_id, name, user_id, json.dumps(params, default=_json_default), self.worker_id)
+                )
+                conn.commit()
+            with self._lock:
+                self._owned.add(job_id)
+            self._ensure_keeper()
+            self._get_executor().submit(self._run, job_id, jt, user_id, params, tuple(files))
+        except Exception:
+            with self._lock:
+                self._active -= 1
+                self._owned.discard(job_id)
+            self._remove_files(files)
+            raise
+
+        self._maybe_purge()
+        return job_id
+
+    def _run(self, job_id: str, jt: JobType, user_id: int | None, params: dict, files: tuple):
+        try:
+            with self.connect() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    "UPDATE ZJB SET ZJB_STATUS = 'RUNNING', ZJB_INICIADO_EM = SYSUTCDATETIME(), "
+                    "ZJB_ATUALIZADO_EM = SYSUTCDATETIME(), ZJB_WORKER = ? "
+                    "WHERE ZJB_ID = ? AND ZJB_STATUS = 'QUEUED' AND ZJB_CANCELAR = 0",
+                    (self.worker_id, job_id)
+                )
+                started = cur.rowcount
+                conn.commit()
+            if not started:
+                return  # cancelado enquanto estava na fila
+
+            ctx = JobContext(self, job_id, user_id, params)
+            result = jt.fn(ctx, params)
+            self._finish(job_id, "DONE", result=result, progress=100)
+        except JobCancelled:
+            self._finish(job_id, "CANCELED", message="Cancelado")
+        except Exception as e:
+            if self.logger:
+                self.logger.exception("[JOB] %s %s falhou", jt.name, job_id, exc_info=e)
+            self._finish(job_id, "FAILED", error=self.describe_error(e))
+        finally:
+            self._remove_files(files)
+            self._cancel_requested.discard(job_id)
+            with self._lock:
+                self._active -= 1
+                self._owned.discard(job_id)
+
+    def _finish(self, job_id: str, status: str, result=None, error: str | None = None,
+                message: str | None = None, progress: int | None = None):
+        try:
+            with self.connect() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    "UPDATE ZJB SET ZJB_STATUS = ?, ZJB_RESULTADO = ?, ZJB_ERRO = ?, "
+                    "ZJB_MENSAGEM = COALESCE(?, ZJB_MENSAGEM), ZJB_PROGRESSO = COALESCE(?, ZJB_PROGRESSO), "
+                    "ZJB_ATUALIZADO_EM = SYSUTCDATETIME(), ZJB_FINALIZADO_EM = SYSUTCDATETIME() "
+                    "WHERE ZJB_ID = ? AND ZJB_STATUS IN ('QUEUED', 'RUNNING')",
+                    (
+                        status,
+                        json.dumps(result, default=_json_default) if result is not None else None,
+                        error[:1000] if error else None,
+                        message,
+                        progress,
+                        job_id,
+                    )
+                )
+                finished = cur.rowcount
+                conn.commit()
+            if not finished and self.logger:
+                self.logger.warning("[JOB] %s já estava finalizado (ex.: marcado FAILED pelo purge); "
+                                    "status %s descartado", job_id, status)
+        except Exception as e:
+            if self.logger:
+                self.logger.exception("[JOB] falha ao finalizar %s", job_id, exc_info=e)
+
+    @staticmethod
+    def _remove_files(files):
+        for path in files or ():
+            try:
+                Path(path).unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    # ---------- renovação dos jobs deste processo ----------
+    @property
+    def heartbeat_sec(self) -> float:
+        return max(self.stale_minutes * 60 / 3, 1.0)
+
+    def heartbeat(self, job_ids) -> int:
+        """Renova ZJB_ATUALIZADO_EM dos jobs ainda QUEUED/RUNNING; devolve quantos foram renovados."""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        with self.connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE ZJB SET ZJB_ATUALIZADO_EM = SYSUTCDATETIME() "
+                f"WHERE ZJB_ID IN ({', '.join('?' * len(job_ids))}) AND ZJB_STATUS IN ('QUEUED', 'RUNNING')",
+                tuple(job_ids)
+            )
+            renewed = int(cur.rowcount or 0)
+            conn.commit()
+        return renewed
+
+    def _ensure_keeper(self):
+        with self._lock:
+            if self._keeper is None or not self._keeper.is_alive():
+                self._keeper = threading.Thread(target=self._keep, name="job-keeper", daemon=True)
+                self._keeper.start()
+
+    def _keep(self):
+        while True:
+            sleep(self.heartbeat_sec)
+            with self._lock:
+                job_ids = list(self._owned)
+                if not job_ids:
+                    self._keeper = None
+                    return
+            try:
+                self.heartbeat(job_ids)
+            except Exception as e:
+                if self.logger:
+                    self.logger.warning("[JOB] falha ao renovar jobs em andamento: %s", e)
+
+    # ---------- consulta / cancelamento ----------
+    @staticmethod
+    def _row_to_job(row) -> dict:
+        job = dict(zip(_JOB_COLS, row))
+        resultado = job["ZJB_RESULTADO"]
+        return {
+            "id": job["ZJB_ID"],
+            "tipo": job["ZJB_TIPO"],
+            "status": job["ZJB_STATUS"],
+            "funcionario_id": job["ZJB_FUNCIONARIO_ID"],
+            "progresso": job["ZJB_PROGRESSO"],
+            "mensagem": job["ZJB_MENSAGEM"],
+            "resultado": json.loads(resultado) if resultado else None,
+            "erro": job["ZJB_ERRO"],
+            "cancelamento_solicitado": bool(job["ZJB_CANCELAR"]),
+            "criado_em": _iso(job["ZJB_CRIADO_EM"]),
+            "iniciado_em": _iso(job["ZJB_INICIADO_EM"]),
+            "atualizado_em": _iso(job["ZJB_ATUALIZADO_EM"]),
+            "finalizado_em": _iso(job["ZJB_FINALIZADO_EM"]),
+        }
+
+    def get(self, job_id: str) -> dict | None:
+        with self.connect() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT {', '.join(_JOB_COLS)} FROM ZJB WHERE ZJB_ID = ?", (str(job_id),))
+            row = cur.fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, user_id: int | None = None, limit: int = 50) -> list[dict]:
+        """Jobs mais recentes (de um usuário, ou de todos quando user_id é None)."""
+        where, params = "", [max(1, min(int(limit), 200))]
+        if user_id is not None:
+            where = "WHERE ZJB_FUNCIONARIO_ID = ?"
+            params.append(int(user_id))
+        with self.connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT TOP (?) {', '.join(_JOB_COLS)} FROM ZJB {where} ORDER BY ZJB_CRIADO_EM DESC",
+                tuple(params)
+            )
+            rows = cur.fetchall()
+        return [self._row_to_job(r) for r in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """Solicita o cancelamento; False se o job já terminou ou não existe."""
+        with self.connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE ZJB SET ZJB_CANCELAR = 1, "
+                "ZJB_FINALIZADO_EM = CASE WHEN ZJB_STATUS = 'QUEUED' THEN SYSUTCDATETIME() ELSE ZJB_FINALIZADO_EM END, "
+                "ZJB_MENSAGEM = CASE WHEN ZJB_STATUS = 'QUEUED' THEN N'Cancelado' ELSE ZJB_MENSAGEM END, "
+                "ZJB_STATUS = CASE WHEN ZJB_STATUS = 'QUEUED' THEN 'CANCELED' ELSE ZJB_STATUS END, "
+                "ZJB_ATUALIZADO_EM = SYSUTCDATETIME() "
+                "WHERE ZJB_ID = ? AND ZJB_STATUS IN ('QUEUED', 'RUNNING')",
+                (str(job_id),)
+            )
+            changed = cur.rowcount
+            conn.commit()
+        if changed:
+            self._cancel_requested.add(str(job_id))
+        return bool(changed)
+
+    # ---------- retenção ----------
+    def purge(self) -> dict:
+        with self.connect() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE ZJB SET ZJB_STATUS = 'FAILED', ZJB_ERRO = N'Interrompido (sem atualizacao do worker)', "
+                "ZJB_FINALIZADO_EM = SYSUTCDATETIME() "
+                "WHERE ZJB_STATUS IN ('QUEUED', 'RUNNING') "
+                "AND COALESCE(ZJB_ATUALIZADO_EM, ZJB_CRIADO_EM) < DATEADD(MINUTE, -?, SYSUTCDATETIME())",
+                (int(self.stale_minutes),)
+            )
+            stale = cur.rowcount
+            cur.execute(
+                "DELETE FROM ZJB WHERE ZJB_STATUS IN ('DONE', 'FAILED', 'CANCELED') "
+                "AND ZJB_FINALIZADO_EM < DATEADD(HOUR, -?, SYSUTCDATETIME())",
+                (int(self.retention_hours),)
+            )
+            removed = cur.rowcount
+            conn.commit()
+        return {"interrompidos": int(stale or 0), "removidos": int(removed or 0)}
+
+    def _maybe_purge(self, every_sec: int = 600):
+        now = monotonic()
+        if now - self._last_purge < every_sec:
+            return
+        self._last_purge = now
+        try:
+            self.purge()
+        except Exception as e:
+            if self.logger:
+                self.logger.warning("[JOB] falha na limpeza de jobs: %s", e)
+
+    def shutdown(self, wait: bool = False):
+        """Recusa novos jobs. wait=True: espera a fila e os RUNNING terminarem; senão cancela a fila."""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,166 @@
+"""
+===========================================================
+LOGS ESTRUTURADOS SEM BLOQUEIO (QueueHandler / QueueListener)
+===========================================================
+
+As threads de requisição só colocam o registro em uma fila em memória;
+uma thread de fundo (QueueListener) formata e grava no stderr e, se
+configurado, no arquivo rotativo. Assim o I/O de log não atrasa a
+resposta.
+
+- ContextHandler (na thread que loga): junta ao registro os campos de
+  contexto da função `context()` do app (request_id, user_id, rota,
+  latência...) e amostra os registros DEBUG (debug_sample: fração
+  mantida, 1.0 = todos). Fila cheia: o registro é descartado e contado
+  (dropped), nunca bloqueia.
+- JsonFormatter: uma linha JSON por registro (ts, level, logger, msg,
+  campos de contexto, `extra=` do chamador e exc com o traceback).
+- TextFormatter: o formato texto anterior, com o contexto ao final.
+
+O app monta um LogPipeline sobre app.logger com os parâmetros LOG_* e a
+função de contexto da requisição, e chama stop() no atexit.
+===========================================================
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Callable
+
+# atributos padrão do LogRecord: o que não está aqui veio de extra= ou do contexto
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_exc_formatter = logging.Formatter()
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS and not k.startswith("_")}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **_extra_fields(record),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        if record.stack_info:
+            out["stack"] = record.stack_info
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        text = super().formatMessage(record)
+        fields = _extra_fields(record)
+        if fields:
+            text += " " + " ".join(f"{k}={v}" for k, v in fields.items() if v is not None)
+        return text
+
+
+class ContextHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue, context: Callable[[], dict] | None = None,
+                 debug_sample: float = 1.0):
+        super().__init__(log_queue)
+        self.context = context
+        self.debug_sample = min(max(float(debug_sample), 0.0), 1.0)
+        self.dropped = 0
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and self.debug_sample < 1.0 and random.random() >= self.debug_sample:
+            return False
+        return super().handle(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # formata mensagem/traceback aqui (os args podem mudar depois); o formatter roda no listener
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        if self.context is not None:
+            try:
+                for key, value in self.context().items():
+                    if value is not None and not hasattr(record, key):
+                        setattr(record, key, value)
+            except Exception:
+                pass  # log nunca derruba a requisição
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Fila + listener em segundo plano ligados a um logger (start/stop idempotentes)."""
+
+    def __init__(self, logger: logging.Logger, level: str = "INFO", fmt: str = "json", file: str = "",
+                 file_max_bytes: int = 10_000_000, file_backups: int = 5, queue_max: int = 10000,
+                 debug_sample: float = 1.0, context: Callable[[], dict] | None = None):
+        self.logger = logger
+        self.queue: queue.Queue = queue.Queue(maxsize=max(int(queue_max), 0))
+        formatter = JsonFormatter() if fmt == "json" else TextFormatter()
+
+        handlers: list[logging.Handler] = [logging.StreamHandler(sys.stderr)]
+        if file:
+            try:
+                handlers.append(RotatingFileHandler(file, maxBytes=file_max_bytes, backupCount=file_backups,
+                                                    encoding="utf-8"))
+            except OSError as e:
+                logger.warning("[LOG] arquivo de log indisponível (%s): %s", file, e)
+        for h in handlers:
+            h.setFormatter(formatter)
+
+        self.handler = ContextHandler(self.queue, context=context, debug_sample=debug_sample)
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self._started = False
+        self._fork_hook = False
+
+        for h in list(logger.handlers):
+            logger.removeHandler(h)
+        logger.addHandler(self.handler)
+        logger.setLevel(level)
+
+    def start(self):
+        if not self._started:
+            self.listener.start()
+            self._started = True
+            if hasattr(os, "register_at_fork") and not self._fork_hook:
+                # servidor que faz fork depois do import (ex.: gunicorn --preload): a thread não vai junto
+                os.register_at_fork(after_in_child=self._restart_in_child)
+                self._fork_hook = True
+
+    def _restart_in_child(self):
+        if self._started:
+            self.listener = QueueListener(self.queue, *self.listener.handlers, respect_handler_level=True)
+            self._started = False
+            self.start()
+
+    def stop(self):
+        """Esvazia a fila (grava o que falta) e para a thread."""
+        if self._started:
+            self._started = False
+            self.listener.stop()
+
+    def stats(self) -> dict:
+        return {"fila": self.queue.qsize(), "descartados": self.handler.dropped}
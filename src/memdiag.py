@@ -0,0 +1,186 @@
+"""
+===========================================================
+DIAGNÓSTICO DE MEMÓRIA DO WORKER
+===========================================================
+
+Ferramentas para acompanhar a memória de um processo que fica no ar por
+semanas:
+
+- rss_bytes(): memória residente atual (psutil se instalado; senão
+  /proc/self/statm no Linux; no Windows, GetProcessMemoryInfo). None se
+  não há como medir.
+- approx_size(): tamanho aproximado de uma estrutura (dict/list/deque/
+  objetos com __slots__), percorrendo até max_items itens; é uma
+  estimativa para comparar caches, não uma medição exata.
+- TracemallocSession: liga o tracemalloc sob demanda, tira snapshots e
+  devolve as maiores alocações e a diferença para o snapshot anterior.
+  Desligado, não tem custo (o tracemalloc só rastreia depois do start).
+
+Usado por GET /api/admin/memoria, POST /api/admin/memoria/tracemalloc e pela
+reciclagem do worker por RSS (MEMORY_RECYCLE_RSS_MB).
+===========================================================
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import tracemalloc
+from collections import deque
+from datetime import datetime, timezone
+
+try:  # opcional: pip install psutil
+    import psutil
+except ImportError:  # pragma: no cover - depende do ambiente
+    psutil = None
+
+
+def _rss_windows() -> int | None:  # pragma: no cover - só Windows
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return None
+    return int(counters.WorkingSetSize)
+
+
+def rss_bytes() -> int | None:
+    if psutil is not None:
+        return int(psutil.Process().memory_info().rss)
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if sys.platform == "win32":  # pragma: no cover - só Windows
+        try:
+            return _rss_windows()
+        except Exception:
+            return None
+    return None
+
+
+def approx_size(obj, max_items: int = 100_000) -> int:
+    """Bytes aproximados de obj e do que ele referencia (sem contar o mesmo objeto duas vezes)."""
+    seen: set[int] = set()
+    total = 0
+    stack = [obj]
+    visited = 0
+    while stack and visited < max_items:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        visited += 1
+        try:
+            total += sys.getsizeof(o)
+        except TypeError:
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            stack.extend(o)
+        elif isinstance(o, (str, bytes, bytearray, int, float, bool)) or o is None:
+            continue
+        else:
+            for name in getattr(type(o), "__slots__", ()):
+                if hasattr(o, name):
+                    stack.append(getattr(o, name))
+            if hasattr(o, "__dict__"):
+                stack.append(vars(o))
+    if stack:  # parou em max_items: extrapola pela média
+        total = int(total * (1 + len(stack) / max(visited, 1)))
+    return total
+
+
+def _stat_json(stat) -> dict:
+    frame = stat.traceback[0]
+    return {"arquivo": frame.filename, "linha": frame.lineno, "bytes": stat.size, "blocos": stat.count}
+
+
+def _diff_json(stat) -> dict:
+    frame = stat.traceback[0]
+    return {
+        "arquivo": frame.filename,
+        "linha": frame.lineno,
+        "bytes": stat.size,
+        "bytes_diff": stat.size_diff,
+        "blocos_diff": stat.count_diff,
+    }
+
+
+class TracemallocSession:
+    """Snapshots sob demanda; guarda só o último (para a diferença seguinte)."""
+
+    _IGNORE = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last: tracemalloc.Snapshot | None = None
+        self._last_at: str | None = None
+
+    @property
+    def active(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> dict:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(max(int(frames), 1))
+                self._last = None
+                self._last_at = None
+            return self.status()
+
+    def stop(self) -> dict:
+        with self._lock:
+            tracemalloc.stop()  # descarta os rastros: a memória do tracemalloc é liberada
+            self._last = None
+            self._last_at = None
+            return self.status()
+
+    def status(self) -> dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "ativo": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "rastreado_bytes": current,
+            "pico_bytes": peak,
+            "overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            "ultimo_snapshot": self._last_at,
+        }
+
+    def snapshot(self, top: int = 20) -> dict:
+        """Maiores alocações por linha e, se houver snapshot anterior, o que mais cresceu desde ele."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc não está ativo")
+            snap = tracemalloc.take_snapshot().filter_traces(self._IGNORE)
+            result = {
+                "em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "top": [_stat_json(s) for s in snap.statistics("lineno")[:top]],
+            }
+            if self._last is not None:
+                result["desde"] = self._last_at
+                result["diff"] = [_diff_json(s) for s in snap.compare_to(self._last, "lineno")[:top]]
+            self._last, self._last_at = snap, result["em"]
+            result["status"] = self.status()
+            return result
@@ -0,0 +1,192 @@
+"""
+===========================================================
+MODELOS DE LINHA (ZFU, ZSE, ZIN, ZIV, ZDR)
+===========================================================
+
+Classes com __slots__ (sem __dict__ por instância) para as linhas que o
+app guarda em cache por worker (usuário + escopo) ou devolve em listagens.
+Comparado a um dict por linha, cada objeto ocupa bem menos memória (ver
+`python -m bench.models`).
+
+- Cada modelo é um @dataclass(slots=True): o __init__ gerado atribui os
+  campos direto nos slots (construção barata, sem dict intermediário).
+- COLUMNS: colunas do SELECT, na mesma ordem dos campos; o app monta a
+  consulta com `Model.select_list()` e constrói com `Model.from_row(row)`.
+- to_json(): dict com os nomes das colunas (mesmo formato que as rotas já
+  devolviam), com datas ISO, rowversion em hex e DECIMAL como número. O
+  provider JSON do app chama to_json() ao serializar um Model.
+- user["id"] / user.get("setor_id"): leitura por nome do campo continua
+  funcionando onde o código tratava a linha como dict.
+===========================================================
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, ClassVar
+
+
+def json_value(v):
+    """Valor de coluna -> JSON (mesma conversão de _rows_to_dicts)."""
+    if hasattr(v, "isoformat"):
+        return v.isoformat()
+    if isinstance(v, (bytes, bytearray)):
+        return v.hex()  # rowversion
+    if isinstance(v, Decimal):
+        return float(v)
+    return v
+
+
+class Model:
+    """Base dos modelos: consulta, construção a partir da linha e JSON."""
+    __slots__ = ()
+    COLUMNS: ClassVar[tuple[str, ...]] = ()
+    # campos extras (fora do SELECT) incluídos no JSON quando não são None
+    EXTRA_JSON: ClassVar[tuple[tuple[str, str], ...]] = ()
+
+    @classmethod
+    def select_list(cls, alias: str | None = None) -> str:
+        prefix = f"{alias}." if alias else ""
+        return ", ".join(prefix + c for c in cls.COLUMNS)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+    @classmethod
+    def from_rows(cls, rows) -> list:
+        return [cls.from_row(r) for r in rows]
+
+    def to_json(self) -> dict:
+        out = {col: json_value(getattr(self, name)) for col, name in zip(self.COLUMNS, self.__slots__)}
+        for key, name in self.EXTRA_JSON:
+            value = getattr(self, name)
+            if value is not None:
+                out[key] = json_value(value)
+        return out
+
+    # ---------- acesso estilo dict (código legado) ----------
+    def __getitem__(self, name: str):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def get(self, name: str, default=None):
+        return getattr(self, name, default)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__slots__
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__ if n != "senha_hash")
+        return f"{type(self).__name__}({fields})"
+
+
+@dataclass(slots=True, repr=False)
+class Usuario(Model):
+    """ZFU. Em cache (sessão): sem senha_hash e com o AccessScope em `scope`."""
+    id: int
+    nome: str | None
+    email: str | None
+    setor_id: int | None
+    nivel: int
+    senha_hash: str | None
+    ativo: bool
+    scope: Any = None
+
+    COLUMNS: ClassVar[tuple[str, ...]] = (
+        "ZFU_ID", "ZFU_NOME", "ZFU_EMAIL", "ZFU_SETOR_ID", "ZFU_NIVEL", "ZFU_SENHA_HASH", "ZFU_ATIVO",
+    )
+
+    @classmethod
+    def from_row(cls, row):
+        id_, nome, email, setor_id, nivel, senha_hash, ativo = row
+        return cls(int(id_), nome, email, setor_id, int(nivel or 1), senha_hash, bool(ativo))
+
+    def for_session(self, scope) -> Usuario:
+        """Cópia para o cache/requisição: sem o hash da senha, com o escopo RBAC."""
+        return Usuario(self.id, self.nome, self.email, self.setor_id, self.nivel, None, self.ativo, scope)
+
+    def to_json(self) -> dict:
+        return {"id": self.id, "nome": self.nome, "email": self.email, "setor_id": self.setor_id, "nivel": self.nivel}
+
+
+@dataclass(slots=True, repr=False)
+class Setor(Model):
+    id: int
+    nome: str
+    ativo: bool
+
+    COLUMNS: ClassVar[tuple[str, ...]] = ("ZSE_ID", "ZSE_NOME", "ZSE_ATIVO")
+
+
+@dataclass(slots=True, repr=False)
+class Indicador(Model):
+    id: int
+    setor_id: int
+    codigo: str
+    nome: str
+    tipo: str | None
+    unidade: str | None
+    meta: str | None
+    ativo: bool
+    responsavel_id: int | None
+    read_only: bool | None = None  # calculado pelo escopo (níveis 1 e 3)
+
+    COLUMNS: ClassVar[tuple[str, ...]] = (
+        "ZIN_ID", "ZIN_SETOR_ID", "ZIN_CODIGO", "ZIN_NOME", "ZIN_TIPO", "ZIN_UNIDADE",
+        "ZIN_META", "ZIN_ATIVO", "ZIN_RESPONSAVEL_ID",
+    )
+    EXTRA_JSON: ClassVar[tuple[tuple[str, str], ...]] = (("read_only", "read_only"),)
+
+
+@dataclass(slots=True, repr=False)
+class Valor(Model):
+    id: int
+    indicador_id: int
+    setor_id: int
+    funcionario_id: int | None
+    periodo: Any
+    valor: str | None
+    valor_num: Any
+    valor_data: Any
+    criado_em: Any
+    atualizado_em: Any
+    versao: bytes | None
+
+    COLUMNS: ClassVar[tuple[str, ...]] = (
+        "ZIV_ID", "ZIV_INDICADOR_ID", "ZIV_SETOR_ID", "ZIV_FUNCIONARIO_ID", "ZIV_PERIODO", "ZIV_VALOR",
+        "ZIV_VALOR_NUM", "ZIV_VALOR_DATA", "ZIV_CRIADO_EM", "ZIV_ATUALIZADO_EM", "ZIV_VERSAO",
+    )
+
+
+@dataclass(slots=True, repr=False)
+class Draft(Model):
+    """ZDR (ZDH tem as mesmas colunas com prefixo ZDH_). `arquivado` só com incluir_arquivados."""
+    id: int
+    indicador_id: int
+    setor_id: int
+    funcionario_id: int | None
+    periodo: Any
+    valor: str | None
+    valor_num: Any
+    valor_data: Any
+    status: str
+    criado_em: Any
+    enviado_em: Any
+    aprovado_em: Any
+    aprovado_por: int | None
+    rejeitado_em: Any
+    rejeitado_por: int | None
+    rejeitado_motivo: str | None
+    arquivado: int | None = None
+
+    COLUMNS: ClassVar[tuple[str, ...]] = (
+        "ZDR_ID", "ZDR_INDICADOR_ID", "ZDR_SETOR_ID", "ZDR_FUNCIONARIO_ID",
+        "ZDR_PERIODO", "ZDR_VALOR", "ZDR_VALOR_NUM", "ZDR_VALOR_DATA", "ZDR_STATUS",
+        "ZDR_CRIADO_EM", "ZDR_ENVIADO_EM", "ZDR_APROVADO_EM", "ZDR_APROVADO_POR",
+        "ZDR_REJEITADO_EM", "ZDR_REJEITADO_POR", "ZDR_REJEITADO_MOTIVO",
+    )
+    EXTRA_JSON: ClassVar[tuple[tuple[str, str], ...]] = (("ZDR_ARQUIVADO", "arquivado"),)
@@ -0,0 +1,224 @@
+"""
+===========================================================
+PERFIL SOB DEMANDA DE UMA REQUISIÇÃO
+===========================================================
+
+Para investigar uma tela lenta em produção sem reproduzir localmente: o
+app executa uma única requisição sob cProfile e registra, ao mesmo tempo,
+cada comando SQL (texto, nº de parâmetros, tempo de execução e de fetch,
+linhas lidas). O relatório fica em disco (um .json + o .prof bruto, que
+abre no snakeviz/pstats) e é baixado pelo id.
+
+- SqlRecorder.wrap(conn): conexão que devolve cursores instrumentados;
+  o app só envolve a conexão quando há um perfil ativo na requisição
+  (fora disso, nada muda no caminho das consultas).
+- build_report(): junta metadados, SQL e o top de funções (pstats).
+- save_report()/load_report()/cleanup_profiles(): arquivos em profile_dir,
+  com id "<dono>_<hex>" (mesmo esquema dos relatórios de importação).
+
+O app guarda o SqlRecorder da requisição em um ContextVar que
+get_db_connection() consulta; relatórios em PROFILE_DIR.
+===========================================================
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import pstats
+import re
+from pathlib import Path
+from time import perf_counter, time
+
+SQL_MAX_CHARS = 4000
+MAX_STATEMENTS = 2000
+
+_PROFILE_ID_RE = re.compile(r"^(\d+)_([0-9a-f]{32})$")
+
+
+class SqlRecorder:
+    """Comandos SQL executados durante o perfil (na ordem)."""
+
+    def __init__(self, max_statements: int = MAX_STATEMENTS):
+        self.max_statements = max_statements
+        self.statements: list[dict] = []
+        self.omitted = 0
+
+    def wrap(self, conn):
+        return _ProfiledConnection(conn, self)
+
+    def _record(self, sql: str, params: int, ms: float) -> dict | None:
+        if len(self.statements) >= self.max_statements:
+            self.omitted += 1
+            return None
+        item = {"sql": str(sql)[:SQL_MAX_CHARS], "params": params, "ms": round(ms, 3), "fetch_ms": 0.0, "linhas": 0}
+        self.statements.append(item)
+        return item
+
+    def summary(self) -> dict:
+        return {
+            "total": len(self.statements) + self.omitted,
+            "omitidos": self.omitted,
+            "tempo_ms": round(sum(s["ms"] + s["fetch_ms"] for s in self.statements), 3),
+            "comandos": self.statements,
+        }
+
+
+class _ProfiledConnection:
+    __slots__ = ("_conn", "_recorder")
+
+    def __init__(self, conn, recorder: SqlRecorder):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_recorder", recorder)
+
+    def cursor(self):
+        return _ProfiledCursor(self._conn.cursor(), self._recorder)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+
+class _ProfiledCursor:
+    __slots__ = ("_cur", "_recorder", "_last")
+
+    def __init__(self, cur, recorder: SqlRecorder):
+        object.__setattr__(self, "_cur", cur)
+        object.__setattr__(self, "_recorder", recorder)
+        object.__setattr__(self, "_last", None)
+
+    def _params_count(self, params) -> int:
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            return len(params[0])
+        return len(params)
+
+    def execute(self, sql, *params):
+        t0 = perf_counter()
+        try:
+            self._cur.execute(sql, *params)
+        finally:
+            last = self._recorder._record(sql, self._params_count(params), (perf_counter() - t0) * 1000)
+            object.__setattr__(self, "_last", last)
+        return self
+
+    def executemany(self, sql, seq):
+        seq = list(seq)
+        t0 = perf_counter()
+        try:
+            self._cur.executemany(sql, seq)
+        finally:
+            last = self._recorder._record(sql, len(seq), (perf_counter() - t0) * 1000)
+            if last is not None:
+                last["executemany"] = True
+            object.__setattr__(self, "_last", last)
+        return self
+
+    def _fetch(self, fn, *args):
+        t0 = perf_counter()
+        rows = fn(*args)
+        last = self._last
+        if last is not None:
+            last["fetch_ms"] = round(last["fetch_ms"] + (perf_counter() - t0) * 1000, 3)
+            last["linhas"] += len(rows) if isinstance(rows, list) else int(rows is not None)
+        return rows
+
+    def fetchone(self):
+        return self._fetch(self._cur.fetchone)
+
+    def fetchall(self):
+        return self._fetch(self._cur.fetchall)
+
+    def fetchmany(self, size=None):
+        return self._fetch(self._cur.fetchmany, *(() if size is None else (size,)))
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cur, name, value)
+
+
+def _top_functions(stats: pstats.Stats, top: int) -> list[dict]:
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():  # type: ignore[attr-defined]
+        rows.append({
+            "funcao": func,
+            "arquivo": filename,
+            "linha": line,
+            "chamadas": nc,
+            "proprio_ms": round(tt * 1000, 3),
+            "acumulado_ms": round(ct * 1000, 3),
+        })
+    rows.sort(key=lambda r: r["acumulado_ms"], reverse=True)
+    return rows[:top]
+
+
+def build_report(profiler, recorder: SqlRecorder, meta: dict, top: int = 50) -> dict:
+    """Relatório JSON: metadados da requisição, SQL e funções com maior tempo acumulado."""
+    stats = pstats.Stats(profiler)
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(top)
+    return {
+        **meta,
+        "sql": recorder.summary(),
+        "python": {
+            "chamadas": stats.total_calls,  # type: ignore[attr-defined]
+            "tempo_ms": round(stats.total_tt * 1000, 3),  # type: ignore[attr-defined]
+            "top": _top_functions(stats, top),
+            "texto": text.getvalue(),
+        },
+    }
+
+
+def save_report(profile_dir: Path, owner_id: int, report: dict, profiler=None) -> str:
+    """Grava <id>.json (e <id>.prof com o perfil bruto); devolve o id."""
+    profile_dir = Path(profile_dir)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    profile_id = f"{int(owner_id)}_{os.urandom(16).hex()}"
+    report = {"id": profile_id, **report}
+    if profiler is not None:
+        profiler.dump_stats(str(profile_dir / f"{profile_id}.prof"))
+    tmp = profile_dir / f"{profile_id}.json.tmp"
+    tmp.write_text(json.dumps(report, ensure_ascii=False, default=str), encoding="utf-8")
+    tmp.replace(profile_dir / f"{profile_id}.json")
+    return profile_id
+
+
+def resolve_profile(profile_dir: Path, profile_id: str, ext: str = "json") -> tuple[int, Path] | None:
+    """(dono, caminho) de um perfil existente; None se o id é inválido ou o arquivo não existe."""
+    m = _PROFILE_ID_RE.match(profile_id or "")
+    if not m:
+        return None
+    path = Path(profile_dir) / f"{profile_id}.{ext}"
+    if not path.is_file():
+        return None
+    return int(m.group(1)), path
+
+
+def cleanup_profiles(profile_dir: Path, max_age_sec: int):
+    """Remove perfis mais antigos que max_age_sec."""
+    profile_dir = Path(profile_dir)
+    if not profile_dir.is_dir():
+        return
+    limit = time() - max_age_sec
+    for path in profile_dir.iterdir():
+        if path.suffix not in (".json", ".prof", ".tmp"):
+            continue
+        try:
+            if path.stat().st_mtime < limit:
+                path.unlink()
+        except OSError:
+            pass
@@ -228,17 +228,59 @@ function buildValoresPayload() {
         }));
 }
 
-async function apiPost(url, body) {
-    const token = normalizeToken(authToken);
+/**
+ * Idempotency-Key das gravações (apiPost com { idempotent: true }):
+ * - a mesma chave é reaproveitada para o mesmo URL + corpo até a gravação ter
+ *   resposta definitiva, então repetir após falha de rede não grava de novo;
+ * - falha de rede ou 409 (mesma chave ainda em processamento) são repetidas
+ *   automaticamente com a mesma chave.
+ */
+const IDEMPOTENT_RETRIES = 2;
+const idempotencyKeys = new Map(); // url + corpo -> chave
 
-    const resp = await fetch(url, {
+function newIdempotencyKey() {
+    if (window.crypto?.randomUUID) return window.crypto.randomUUID();
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+async function fetchIdempotent(url, init, payload) {
+    const id = `${url}\n${payload}`;
+    const key = idempotencyKeys.get(id) || newIdempotencyKey();
+    idempotencyKeys.set(id, key);
+    init.headers['Idempotency-Key'] = key;
+
+    for (let attempt = 0; ; attempt++) {
+        let resp;
+        try {
+            resp = await fetch(url, init);
+        } catch (err) {
+            if (attempt >= IDEMPOTENT_RETRIES) throw err;
+            await new Promise(r => setTimeout(r, 500 * (attempt + 1)));
+            continue;
+        }
+        // 409 + Retry-After: a primeira requisição com esta chave ainda está gravando
+        if (resp.status === 409 && resp.headers.get('Retry-After') && attempt < IDEMPOTENT_RETRIES) {
+            await new Promise(r => setTimeout(r, Number(resp.headers.get('Retry-After')) * 1000));
+            continue;
+        }
+        if (resp.status < 500) idempotencyKeys.delete(id);
+        return resp;
+    }
+}
+
+async function apiPost(url, body, options = {}) {
+    const token = normalizeToken(authToken);
+    const payload = JSON.stringify(body);
+    const init = {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
             ...(token ? { 'Authorization': `Bearer ${token}` } : {})
         },
-        body: JSON.stringify(body)
-    });
+        body: payload
+    };
+
+    const resp = options.idempotent ? await fetchIdempotent(url, init, payload) : await fetch(url, init);
 
     if (resp.status === 401) handleUnauthorized();
 
@@ -248,28 +290,188 @@ async function apiPost(url, body) {
         throw new Error(msg);
     }
 
+    invalidateApiCacheForWrite(url);
     return data;
 }
 
-async function apiGet(url) {
-    const token = normalizeToken(authToken);
+/**
+ * Cache de leituras da API (em memória, por URL):
+ * - Dentro de API_CACHE_FRESH_MS: devolve do cache, sem rede.
+ * - Até API_CACHE_STALE_MS: devolve o valor antigo e revalida em segundo plano
+ *   (stale-while-revalidate), enviando If-None-Match com o ETag recebido.
+ * - Requisições simultâneas à mesma URL compartilham a mesma Promise.
+ * - apiPost/apiPut invalidam os prefixos afetados (API_INVALIDATION).
+ */
+const API_CACHE_FRESH_MS = 15000;
+const API_CACHE_STALE_MS = 5 * 60 * 1000;
 
-    const resp = await fetch(url, {
-        method: 'GET',
-        headers: {
-            ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+const apiCache = new Map();    // url -> { data, etag, time }
+const apiInflight = new Map(); // url -> Promise
+
+/**
+ * Prefixos de leitura invalidados por escrita (prefixo da escrita -> prefixos de leitura).
+ */
+const API_INVALIDATION = [
+    ['/api/drafts', ['/api/drafts', '/api/valores']],
+    ['/api/valores', ['/api/valores', '/api/drafts']],
+    ['/api/users', ['/api/users', '/api/gestor/funcionarios']],
+    ['/api/setores', ['/api/setores']],
+    ['/api/indicadores', ['/api/indicadores', '/api/setores']]
+];
+
+function invalidateApiCache(prefixes) {
+    if (!prefixes) {
+        apiCache.clear();
+        return;
+    }
+    for (const key of Array.from(apiCache.keys())) {
+        if (prefixes.some(p => key.startsWith(p))) apiCache.delete(key);
+    }
+}
+
+function invalidateApiCacheForWrite(url) {
+    const path = String(url).split('?')[0];
+    const prefixes = new Set();
+    API_INVALIDATION.forEach(([writePrefix, readPrefixes]) => {
+        if (path.startsWith(writePrefix)) readPrefixes.forEach(p => prefixes.add(p));
+    });
+    if (prefixes.size) invalidateApiCache(Array.from(prefixes));
+}
+
+/**
+ * GET na rede, com revalidação por ETag. Coalesce chamadas simultâneas à mesma URL.
+ */
+function fetchApiGet(url) {
+    if (apiInflight.has(url)) return apiInflight.get(url);
+
+    const request = (async () => {
+        const token = normalizeToken(authToken);
+        const cached = apiCache.get(url);
+
+        const resp = await fetch(url, {
+            method: 'GET',
+            headers: {
+                ...(token ? { 'Authorization': `Bearer ${token}` } : {}),
+                ...(cached?.etag ? { 'If-None-Match': cached.etag } : {})
+            }
+        });
+
+        if (resp.status === 401) handleUnauthorized();
+
+        if (resp.status === 304 && cached) {
+            cached.time = Date.now();
+            return cached.data;
         }
+
+        const data = await resp.json().catch(() => ({}));
+        if (!resp.ok) {
+            const msg = data?.error || `Erro HTTP ${resp.status}`;
+            throw new Error(msg);
+        }
+
+        apiCache.set(url, { data, etag: resp.headers.get('ETag'), time: Date.now() });
+        return data;
+    })();
+
+    apiInflight.set(url, request);
+    request.then(
+        () => apiInflight.delete(url),
+        () => apiInflight.delete(url)
+    );
+    return request;
+}
+
+/**
+ * GET com cache. options.force ignora o cache (ainda revalida via ETag).
+ */
+async function apiGet(url, options = {}) {
+    const cached = apiCache.get(url);
+    if (cached && !options.force) {
+        const age = Date.now() - cached.time;
+        if (age < API_CACHE_FRESH_MS) return cached.data;
+        if (age < API_CACHE_STALE_MS) {
+            fetchApiGet(url).catch(() => {});
+            return cached.data;
+        }
+    }
+    return fetchApiGet(url);
+}
+
+/**
+ * Várias leituras em uma ida e volta (POST /api/batch).
+ * Retorna uma Promise por URL, na mesma ordem, com a mesma semântica de apiGet:
+ * entradas frescas vêm do cache, URLs já em voo são reaproveitadas e o restante
+ * segue em lotes de até API_BATCH_MAX_ITEMS. Falha de um item rejeita só a Promise dele.
+ */
+const API_BATCH_MAX_ITEMS = 20;
+
+function apiGetMany(urls) {
+    const promises = new Array(urls.length);
+    const pending = new Map(); // url -> { resolve, reject }
+
+    urls.forEach((url, idx) => {
+        const cached = apiCache.get(url);
+        if (cached && Date.now() - cached.time < API_CACHE_FRESH_MS) {
+            promises[idx] = Promise.resolve(cached.data);
+            return;
+        }
+        if (apiInflight.has(url)) {
+            promises[idx] = apiInflight.get(url);
+            return;
+        }
+        const request = new Promise((resolve, reject) => pending.set(url, { resolve, reject }));
+        apiInflight.set(url, request);
+        request.then(
+            () => apiInflight.delete(url),
+            () => apiInflight.delete(url)
+        );
+        promises[idx] = request;
     });
 
-    if (resp.status === 401) handleUnauthorized();
+    const pendingUrls = Array.from(pending.keys());
+    for (let i = 0; i < pendingUrls.length; i += API_BATCH_MAX_ITEMS) {
+        sendApiBatch(pendingUrls.slice(i, i + API_BATCH_MAX_ITEMS), pending);
+    }
+    return promises;
+}
 
-    const data = await resp.json().catch(() => ({}));
-    if (!resp.ok) {
-        const msg = data?.error || `Erro HTTP ${resp.status}`;
-        throw new Error(msg);
+async function sendApiBatch(urls, pending) {
+    const settle = (url, fn) => {
+        const p = pending.get(url);
+        pending.delete(url);
+        if (p) fn(p);
+    };
+
+    let responses;
+    try {
+        const data = await apiPost('/api/batch', {
+            requests: urls.map(url => ({ id: url, path: url }))
+        });
+        responses = Array.isArray(data?.responses) ? data.responses : [];
+    } catch (err) {
+        // servidor sem /api/batch ou erro no lote: cai para GETs individuais
+        urls.forEach(url => {
+            apiInflight.delete(url);
+            settle(url, p => fetchApiGet(url).then(p.resolve, p.reject));
+        });
+        return;
     }
 
-    return data;
+    const byId = new Map(responses.map(r => [r.id, r]));
+    urls.forEach(url => {
+        const r = byId.get(url);
+        settle(url, p => {
+            if (!r) {
+                p.reject(new Error('Resposta ausente no batch'));
+            } else if (r.status >= 200 && r.status < 300) {
+                apiCache.set(url, { data: r.body, etag: null, time: Date.now() });
+                p.resolve(r.body);
+            } else {
+                if (r.status === 401) handleUnauthorized();
+                p.reject(new Error(r.body?.error || `Erro HTTP ${r.status}`));
+            }
+        });
+    });
 }
 
 async function apiPut(url, body) {
@@ -292,6 +494,7 @@ async function apiPut(url, body) {
         throw new Error(msg);
     }
 
+    invalidateApiCacheForWrite(url);
     return data;
 }
 
@@ -301,6 +504,7 @@ async function apiPut(url, body) {
  * - Força usuário voltar ao login
  */
 function handleUnauthorized() {
+    invalidateApiCache();
     authToken = null;
     tokenStorage.removeItem('authToken');
     alert('Sessão expirada. Faça login novamente.');
@@ -417,6 +621,7 @@ async function handleLogin() {
             throw new Error(data?.error || 'Login inválido');
         }
 
+        invalidateApiCache();
         authToken = normalizeToken(data.token);
         if (!authToken) {
             tokenStorage.removeItem('authToken');
@@ -450,6 +655,7 @@ async function handleLogin() {
  * - Recarrega página (reinicia JS)
  */
 function handleLogout() {
+    invalidateApiCache();
     currentUser = null;
     authToken = null;
     tokenStorage.removeItem('authToken');
@@ -500,6 +706,7 @@ function hideAllScreens() {
         const el = document.getElementById(id);
         if (el) el.classList.add('hidden');
     });
+    stopPendingStream();
 }
 
 /**
@@ -733,10 +940,10 @@ async function loadSectors() {
 
         // Busca contagem de indicadores por setor em paralelo
         const counts = await Promise.all(
-            setoresApi.map(s =>
-                apiGet(`/api/indicadores?setorId=${encodeURIComponent(s.id)}`)
-                    .then(items => ({ id: s.id, count: Array.isArray(items) ? items.length : 0 }))
-                    .catch(() => ({ id: s.id, count: 0 }))
+            apiGetMany(setoresApi.map(s => `/api/indicadores?setorId=${encodeURIComponent(s.id)}`)).map((req, idx) =>
+                req
+                    .then(items => ({ id: setoresApi[idx].id, count: Array.isArray(items) ? items.length : 0 }))
+                    .catch(() => ({ id: setoresApi[idx].id, count: 0 }))
             )
         );
         const countMap = new Map(counts.map(c => [String(c.id), c.count]));
@@ -1056,7 +1263,7 @@ async function handleSave() {
 
     try {
         setButtonLoading(saveBtn, true, 'Salvando...');
-        await apiPost('/api/drafts', body);
+        await apiPost('/api/drafts', body, { idempotent: true });
         registrosDB.unshift({
             id: Date.now(),
             usuario: currentUser.nome,
@@ -1108,7 +1315,7 @@ async function handleSendDB() {
 
     try {
         setButtonLoading(sendBtn, true, 'Enviando...');
-        await apiPost('/api/valores', body);
+        await apiPost('/api/valores', body, { idempotent: true });
         registrosDB.unshift({
             id: Date.now(),
             usuario: currentUser.nome,
@@ -1365,18 +1572,133 @@ function showPromptModal({ title, message, placeholder, type }) {
 
 async function loadManagerData() {
     try {
-        const [funcionariosData, pendentesData] = await Promise.all([
-            apiGet('/api/gestor/funcionarios'),
-            apiGet('/api/drafts/pending')
-        ]);
+        startPendingStream();
+        const [funcionariosData, pendentesData] = await Promise.all(apiGetMany([
+            '/api/gestor/funcionarios',
+            '/api/drafts/pending'
+        ]));
 
         renderManagerFuncionarios(Array.isArray(funcionariosData) ? funcionariosData : []);
-        renderManagerIndicadores(Array.isArray(pendentesData) ? pendentesData : []);
+        setManagerPending(Array.isArray(pendentesData) ? pendentesData : []);
     } catch (err) {
         alert(`Erro ao carregar painel gestor: ${err.message}`);
     }
 }
 
+/**
+ * Fila de pendentes em tempo real: a lista é carregada uma vez e atualizada pelos
+ * eventos de /api/stream/pending (SSE). Lido com fetch, pois EventSource não envia
+ * o header Authorization. O servidor encerra o stream periodicamente; reconecta com Last-Event-ID.
+ */
+const managerPending = new Map(); // ZDR_ID -> linha
+let pendingStream = null;         // { controller, lastId, retryMs }
+
+function setManagerPending(items) {
+    managerPending.clear();
+    items.forEach(i => managerPending.set(String(i.ZDR_ID), i));
+    renderManagerPending();
+}
+
+function removeManagerPending(ids) {
+    ids.forEach(id => managerPending.delete(String(id)));
+    renderManagerPending();
+}
+
+function renderManagerPending() {
+    const selected = new Set(getSelectedDraftIds());
+    const items = Array.from(managerPending.values())
+        .sort((a, b) => String(b.ZDR_CRIADO_EM ?? '').localeCompare(String(a.ZDR_CRIADO_EM ?? '')));
+    renderManagerIndicadores(items, selected);
+}
+
+function startPendingStream() {
+    if (pendingStream || !window.ReadableStream || !window.TextDecoder) return;
+    pendingStream = { controller: new AbortController(), lastId: null, retryMs: 5000 };
+    runPendingStream(pendingStream);
+}
+
+function stopPendingStream() {
+    if (!pendingStream) return;
+    pendingStream.controller.abort();
+    pendingStream = null;
+}
+
+async function runPendingStream(stream) {
+    const { signal } = stream.controller;
+    while (!signal.aborted) {
+        let waitMs = stream.retryMs;
+        try {
+            const token = normalizeToken(authToken);
+            const resp = await fetch('/api/stream/pending', {
+                headers: {
+                    'Accept': 'text/event-stream',
+                    ...(token ? { 'Authorization': `Bearer ${token}` } : {}),
+                    ...(stream.lastId ? { 'Last-Event-ID': stream.lastId } : {})
+                },
+                signal
+            });
+            if (resp.status === 401 || resp.status === 403) {
+                if (resp.status === 401) handleUnauthorized();
+                return;
+            }
+            if (!resp.ok || !resp.body) {
+                const retryAfter = Number(resp.headers.get('Retry-After'));
+                if (retryAfter > 0) waitMs = retryAfter * 1000;
+            } else {
+                await readPendingStream(resp.body, stream);
+                waitMs = 500; // fim normal (duração máxima do servidor): reconecta logo
+            }
+        } catch (err) {
+            if (signal.aborted) return;
+        }
+        await new Promise(resolve => setTimeout(resolve, waitMs));
+    }
+}
+
+async function readPendingStream(body, stream) {
+    const reader = body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) return;
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split(/\r?\n\r?\n/);
+        buffer = frames.pop();
+        frames.forEach(frame => {
+            const msg = { event: 'message', data: '' };
+            frame.split(/\r?\n/).forEach(line => {
+                if (!line || line.startsWith(':')) return;
+                const idx = line.indexOf(':');
+                const field = idx === -1 ? line : line.slice(0, idx);
+                const val = idx === -1 ? '' : line.slice(idx + 1).replace(/^ /, '');
+                if (field === 'data') msg.data += val;
+                else if (field === 'event') msg.event = val;
+                else if (field === 'id') stream.lastId = val;
+                else if (field === 'retry' && Number(val) > 0) stream.retryMs = Number(val);
+            });
+            if (msg.data) handlePendingEvent(msg.event, JSON.parse(msg.data));
+        });
+    }
+}
+
+async function handlePendingEvent(type, data) {
+    invalidateApiCache(['/api/drafts/pending']);
+    if (type === 'pending') {
+        (data.items || []).forEach(i => managerPending.set(String(i.ZDR_ID), i));
+        renderManagerPending();
+    } else if (type === 'removed') {
+        removeManagerPending(data.ids || []);
+    } else if (type === 'reset') {
+        try {
+            const items = await apiGet('/api/drafts/pending', { force: true });
+            setManagerPending(Array.isArray(items) ? items : []);
+        } catch (err) {
+            showToast(`Erro ao atualizar pendentes: ${err.message}`, 'error');
+        }
+    }
+}
+
 function renderManagerFuncionarios(items) {
     const tbody = document.getElementById('managerFuncionariosBody');
     if (!tbody) return;
@@ -1400,21 +1722,23 @@ function renderManagerFuncionarios(items) {
     });
 }
 
-function renderManagerIndicadores(items) {
+function renderManagerIndicadores(items, selected = new Set()) {
     const tbody = document.getElementById('managerIndicadoresBody');
     if (!tbody) return;
     tbody.innerHTML = '';
 
     if (!items.length) {
         const tr = document.createElement('tr');
-        tr.innerHTML = '<td colspan="7">Nenhum indicador pendente</td>';
+        tr.innerHTML = '<td colspan="8">Nenhum indicador pendente</td>';
         tbody.appendChild(tr);
+        setupManagerBulkActions();
         return;
     }
 
     items.forEach(i => {
         const tr = document.createElement('tr');
         tr.innerHTML = `
+            <td><input type="checkbox" class="manager-draft-check" value="${i.ZDR_ID}"${selected.has(String(i.ZDR_ID)) ? ' checked' : ''}></td>
             <td>${i.INDICADOR_NOME ?? ''}</td>
             <td>${i.SETOR_NOME ?? ''}</td>
             <td>${i.FUNCIONARIO_NOME ?? ''}</td>
@@ -1434,31 +1758,101 @@ function renderManagerIndicadores(items) {
             const id = btn.getAttribute('data-draft-id');
             const action = btn.getAttribute('data-gestor-action');
             if (action === 'approve') {
-                await approveDraft(id);
+                await approveDrafts([id]);
             } else {
-                await rejectDraft(id);
+                await rejectDrafts([id]);
             }
         });
     });
+
+    setupManagerBulkActions();
+}
+
+/**
+ * Seleção de pendentes + botões "Aprovar/Recusar selecionados".
+ */
+function getSelectedDraftIds() {
+    return Array.from(document.querySelectorAll('.manager-draft-check:checked')).map(c => c.value);
+}
+
+function setupManagerBulkActions() {
+    const selectAll = document.getElementById('managerSelectAll');
+    const approveBtn = document.getElementById('managerApproveSelectedBtn');
+    const rejectBtn = document.getElementById('managerRejectSelectedBtn');
+    const checks = Array.from(document.querySelectorAll('.manager-draft-check'));
+
+    const refresh = () => {
+        const count = checks.filter(c => c.checked).length;
+        if (approveBtn) approveBtn.disabled = count === 0;
+        if (rejectBtn) rejectBtn.disabled = count === 0;
+        if (selectAll) selectAll.checked = count > 0 && count === checks.length;
+    };
+
+    checks.forEach(c => c.addEventListener('change', refresh));
+    if (selectAll) {
+        selectAll.onchange = () => {
+            checks.forEach(c => { c.checked = selectAll.checked; });
+            refresh();
+        };
+    }
+    if (approveBtn) approveBtn.onclick = () => approveDrafts(getSelectedDraftIds());
+    if (rejectBtn) rejectBtn.onclick = () => rejectDrafts(getSelectedDraftIds());
+    refresh();
+}
+
+/**
+ * Uma chamada a /api/drafts/bulk para N drafts; avisa quantos não foram aplicados.
+ */
+async function postDraftsBulk(acao, ids, motivo) {
+    const data = await apiPost('/api/drafts/bulk', {
+        acao,
+        ids: ids.map(Number),
+        ...(motivo ? { motivo } : {})
+    }, { idempotent: true });
+    const resultados = data.resultados || [];
+    const falhas = resultados.filter(r => r.status !== 'ok');
+    // já saíram da fila (por esta ação ou por outro usuário)
+    const resolvidos = resultados.filter(r => r.status !== 'acesso_negado').map(r => r.id);
+    return { aplicados: data.aplicados || 0, falhas, resolvidos };
+}
+
+/**
+ * Um draft pela rota do item, com a versao (ZDR_VERSAO) da linha exibida:
+ * se outro usuário alterou o draft depois que a lista carregou, o servidor responde 409.
+ */
+async function postDraftItem(acao, id, motivo) {
+    const item = managerPending.get(String(id));
+    await apiPost(`/api/drafts/${Number(id)}/${acao}`, {
+        ...(item?.ZDR_VERSAO ? { versao: item.ZDR_VERSAO } : {}),
+        ...(motivo ? { motivo } : {})
+    }, { idempotent: true });
+    return { aplicados: 1, falhas: [], resolvidos: [id] };
+}
+
+function describeBulkResult(verbo, { aplicados, falhas }) {
+    const base = aplicados === 1 ? `1 indicador ${verbo}` : `${aplicados} indicadores ${verbo}s`;
+    return falhas.length ? `${base}; ${falhas.length} nao aplicado(s) (ja resolvidos ou sem acesso)` : base;
 }
 
-async function approveDraft(draftId) {
+async function approveDrafts(ids) {
+    if (!ids.length) return;
     try {
         const confirmed = await showConfirmModal({
             title: 'Aprovar indicador',
-            message: 'Deseja aprovar este indicador?'
+            message: ids.length === 1 ? 'Deseja aprovar este indicador?' : `Deseja aprovar ${ids.length} indicadores?`
         });
         if (!confirmed) return;
 
-        await apiPost(`/api/drafts/${draftId}/approve`, {});
-        await loadManagerData();
-        showToast('Indicador aprovado');
+        const result = ids.length === 1 ? await postDraftItem('approve', ids[0]) : await postDraftsBulk('approve', ids);
+        removeManagerPending(result.resolvidos);
+        showToast(describeBulkResult('aprovado', result), result.falhas.length ? 'error' : undefined);
     } catch (err) {
         showToast(`Erro ao aprovar: ${err.message}`, 'error');
     }
 }
 
-async function rejectDraft(draftId) {
+async function rejectDrafts(ids) {
+    if (!ids.length) return;
     const motivo = await showPromptModal({
         title: 'Recusar indicador',
         message: 'Informe o motivo da recusa',
@@ -1471,13 +1865,15 @@ async function rejectDraft(draftId) {
     }
     const confirmed = await showConfirmModal({
         title: 'Confirmar recusa',
-        message: 'Deseja recusar este indicador?'
+        message: ids.length === 1 ? 'Deseja recusar este indicador?' : `Deseja recusar ${ids.length} indicadores?`
     });
     if (!confirmed) return;
     try {
-        await apiPost(`/api/drafts/${draftId}/reject`, { motivo: motivo.trim() });
-        await loadManagerData();
-        showToast('Indicador recusado');
+        const result = ids.length === 1
+            ? await postDraftItem('reject', ids[0], motivo.trim())
+            : await postDraftsBulk('reject', ids, motivo.trim());
+        removeManagerPending(result.resolvidos);
+        showToast(describeBulkResult('recusado', result), result.falhas.length ? 'error' : undefined);
     } catch (err) {
         showToast(`Erro ao recusar: ${err.message}`, 'error');
     }
@@ -1485,10 +1881,10 @@ async function rejectDraft(draftId) {
 
 async function loadAdminData() {
     try {
-        const [setoresData, usersData] = await Promise.all([
-            apiGet('/api/setores'),
-            apiGet('/api/users')
-        ]);
+        const [setoresData, usersData] = await Promise.all(apiGetMany([
+            '/api/setores',
+            '/api/users'
+        ]));
 
         adminState.setores = Array.isArray(setoresData) ? setoresData : [];
         adminState.users = Array.isArray(usersData) ? usersData : [];
@@ -0,0 +1,131 @@
+"""
+===========================================================
+THROTTLING / CONTROLE DE ADMISSÃO
+===========================================================
+
+Protege o banco de um único cliente em laço (script, aba travada) e de
+picos de carga:
+
+- TokenBuckets: cota por chave (usuário + classe de rota). Cada chave tem
+  até `burst` fichas, repostas a `rate_per_sec`; cada requisição gasta
+  `cost` fichas. Sem fichas, take() devolve quantos segundos faltam
+  (o app responde 429 com Retry-After). As chaves ficam em um LRU
+  limitado (max_keys): uma chave descartada volta com o balde cheio.
+- AdmissionGate: limite global de requisições simultâneas que usam o
+  banco, com uma fila curta de espera. Acima de max_inflight a requisição
+  espera até timeout_sec por uma vaga; com a fila cheia (max_waiting) ou
+  o tempo esgotado, acquire() devolve False (o app responde 503).
+
+Os limites são por processo (cada worker tem os seus): o app mantém um
+TokenBuckets por classe de rota (read/write/bulk) e um AdmissionGate
+(DB_MAX_INFLIGHT).
+===========================================================
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+
+class TokenBuckets:
+    def __init__(self, rate_per_sec: float, burst: int, max_keys: int = 10000):
+        self.rate_per_sec = max(float(rate_per_sec), 0.0)
+        self.burst = max(int(burst), 1)
+        self.max_keys = max(int(max_keys), 1)
+        self._lock = threading.Lock()
+        self._buckets: OrderedDict[object, list[float]] = OrderedDict()  # chave -> [fichas, instante]
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_sec > 0
+
+    def take(self, key, cost: float = 1) -> float:
+        """0 se liberou (e gastou `cost` fichas); senão, segundos até haver fichas."""
+        if not self.enabled:
+            return 0.0
+        cost = min(float(cost), self.burst)
+        now = monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_per_sec)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            self.limited += 1
+            return (cost - bucket[0]) / self.rate_per_sec
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class AdmissionGate:
+    def __init__(self, max_inflight: int, max_waiting: int = 0, timeout_sec: float = 0):
+        self.max_inflight = max(int(max_inflight), 0)
+        self.max_waiting = max(int(max_waiting), 0)
+        self.timeout_sec = max(float(timeout_sec), 0.0)
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_inflight > 0
+
+    def acquire(self) -> bool:
+        """Ocupa uma vaga (esperando na fila se preciso). False = sobrecarga."""
+        if not self.enabled:
+            return True
+        with self._cond:
+            if self._inflight < self.max_inflight and not self._waiting:
+                self._inflight += 1
+                self.admitted += 1
+                return True
+            if self._waiting >= self.max_waiting or self.timeout_sec <= 0:
+                self.rejected += 1
+                return False
+            self._waiting += 1
+            self.queued += 1
+            deadline = monotonic() + self.timeout_sec
+            try:
+                while self._inflight >= self.max_inflight:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        return False
+                    self._cond.wait(remaining)
+                self._inflight += 1
+                self.admitted += 1
+                return True
+            finally:
+                self._waiting -= 1
+
+    def release(self):
+        if not self.enabled:
+            return
+        with self._cond:
+            self._inflight = max(self._inflight - 1, 0)
+            self._cond.notify()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "max_inflight": self.max_inflight,
+                "inflight": self._inflight,
+                "waiting": self._waiting,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,103 @@
+"""
+===========================================================
+VALORES TIPADOS (ZIV_VALOR_NUM / ZIV_VALOR_DATA)
+===========================================================
+
+ZIV_VALOR/ZDR_VALOR continuam sendo o texto digitado (é o que a tela
+mostra). Ao gravar, o app também preenche as colunas tipadas conforme a
+unidade do indicador, para filtros por faixa e agregações sem converter
+texto linha a linha:
+
+- unidade de data ("date", "data"): *_VALOR_DATA;
+- unidade de texto ("text", "texto"): nenhuma;
+- demais (%, R$, dias, sem unidade...): *_VALOR_NUM, se o texto for número.
+
+Números aceitam formato brasileiro e internacional ("1.234,5", "1,234.5",
+"12,5%", "R$ 10"). Só com pontos, vale a regra brasileira: grupos de 3
+dígitos depois do ponto são milhar ("1.234" = 1234, "1.234.567" =
+1234567); fora desse padrão o ponto é decimal ("1.5", "3.14159",
+"0.123"). Texto que não é número/data fica só em *_VALOR (as colunas
+tipadas ficam NULL).
+===========================================================
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+DATE_UNITS = frozenset({"date", "data"})
+TEXT_UNITS = frozenset({"text", "texto"})
+
+# DECIMAL(19,4): 15 dígitos inteiros
+NUM_MAX = Decimal("1e15")
+NUM_QUANT = Decimal("0.0001")
+
+_DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y")
+_NUM_STRIP_RE = re.compile(r"R\$|[\s%]")
+_NUM_RE = re.compile(r"^[+-]?\d+(\.\d+)?$")
+_THOUSANDS_DOT_RE = re.compile(r"^[+-]?[1-9]\d{0,2}(\.\d{3})+$")
+
+
+def _unit(unidade) -> str:
+    return str(unidade or "").strip().lower()
+
+
+def parse_numero(value) -> Decimal | None:
+    """Número em DECIMAL(19,4) ou None se o texto não for número."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        text = str(value)
+    else:
+        text = _NUM_STRIP_RE.sub("", str(value))
+        if "," in text and "." in text:
+            # o último separador é o decimal
+            if text.rfind(",") > text.rfind("."):
+                text = text.replace(".", "").replace(",", ".")
+            else:
+                text = text.replace(",", "")
+        elif "," in text:
+            if text.count(",") > 1:
+                return None
+            text = text.replace(",", ".")
+        elif _THOUSANDS_DOT_RE.match(text):  # 1.234 / 1.234.567: milhar (pt-BR)
+            text = text.replace(".", "")
+        if not _NUM_RE.match(text):
+            return None
+    try:
+        num = Decimal(text).quantize(NUM_QUANT)
+    except (InvalidOperation, ValueError):
+        return None
+    if not num.is_finite() or abs(num) >= NUM_MAX:
+        return None
+    return num
+
+
+def parse_data(value) -> date | None:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value or "").strip()
+    if " " in text or "T" in text:  # "2024-01-31 00:00:00" / ISO com hora
+        text = re.split(r"[ T]", text, 1)[0]
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def valor_tipado(valor, unidade=None) -> tuple[Decimal | None, date | None]:
+    """(numero, data) para as colunas tipadas, conforme a unidade do indicador."""
+    if valor is None:
+        return None, None
+    unit = _unit(unidade)
+    if unit in DATE_UNITS:
+        return None, parse_data(valor)
+    if unit in TEXT_UNITS:
+        return None, None
+    return parse_numero(valor), None
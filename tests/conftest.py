@@ -0,0 +1,27 @@
+"""Fixtures compartilhadas dos testes."""
+
+import pytest
+
+
+class FakeClock:
+    """Substitui time.monotonic: parado em `now` até advance()."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, sec: float):
+        self.now += sec
+
+
+@pytest.fixture
+def clock(request, monkeypatch):
+    """
+    Relógio falso no módulo em teste: CLOCK_MODULE do arquivo de teste e a função importada
+    por ele (CLOCK_NAME, padrão "monotonic").
+    """
+    fake = FakeClock()
+    monkeypatch.setattr(request.module.CLOCK_MODULE, getattr(request.module, "CLOCK_NAME", "monotonic"), fake)
+    return fake
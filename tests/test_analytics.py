@@ -0,0 +1,63 @@
+"""analytics.atingimento (NumPy) contra a referência em Python puro do benchmark."""
+
+import json
+from datetime import date
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from bench.analytics import atingimento_python, gerar_linhas  # noqa: E402
+from src import analytics  # noqa: E402
+
+MES_DE = analytics.month_index(date(2023, 1, 1))
+
+
+def _json(result) -> str:
+    return json.dumps(result, sort_keys=True)
+
+
+@pytest.mark.parametrize("janela", [1, 3, 12])
+def test_igual_a_referencia_em_python(janela):
+    meses = 24
+    cols, metas = gerar_linhas(setores=4, indicadores=5, meses=meses, mes_de=MES_DE, falhas=0.2, seed=7)
+    mes_ate = MES_DE + meses - 1
+    esperado = atingimento_python(*cols, metas, MES_DE, mes_ate, janela=janela)
+    assert _json(analytics.atingimento(*cols, metas, MES_DE, mes_ate, janela=janela)) == _json(esperado)
+
+
+def test_periodo_menor_que_os_dados_descarta_meses_fora():
+    cols, metas = gerar_linhas(setores=2, indicadores=3, meses=12, mes_de=MES_DE, falhas=0.1, seed=3)
+    mes_de, mes_ate = MES_DE + 3, MES_DE + 8
+    esperado = atingimento_python(*cols, metas, mes_de, mes_ate)
+    assert _json(analytics.atingimento(*cols, metas, mes_de, mes_ate)) == _json(esperado)
+
+
+def test_meta_ausente_ou_zero_e_mes_anterior_zero():
+    meses = [MES_DE, MES_DE + 1, MES_DE + 3]
+    result = analytics.atingimento(
+        [1, 1, 1, 2, 2, 2], [10, 10, 10, 10, 10, 10], meses * 2, [0.0, 50.0, 80.0, 0.0, 5.0, 10.0],
+        {1: 100.0, 2: 0.0}, MES_DE, MES_DE + 3, janela=2,
+    )
+    assert result["periodos"] == ["2023-01", "2023-02", "2023-03", "2023-04"]
+    s1, s2 = result["series"]
+    assert (s1["indicador_id"], s1["setor_id"], s1["meta"]) == (1, 10, 100.0)
+    assert s1["valor"] == [0.0, 50.0, None, 80.0]
+    assert s1["atingimento"] == [0.0, 50.0, None, 80.0]
+    assert s1["variacao_mes"] == [None, None, None, None]  # anterior 0 ou vazio
+    assert s1["media_movel"] == [0.0, 25.0, 50.0, 80.0]
+    assert s2["meta"] == 0.0
+    assert s2["atingimento"] == [None, None, None, None]
+    assert analytics.atingimento([3], [10], [MES_DE], [1.0], {}, MES_DE, MES_DE)["series"][0]["meta"] is None
+
+
+def test_sem_linhas_ou_periodo_invertido():
+    assert analytics.atingimento([], [], [], [], {}, MES_DE, MES_DE + 1) == {
+        "periodos": ["2023-01", "2023-02"], "series": [],
+    }
+    assert analytics.atingimento([1], [1], [MES_DE], [1.0], {1: 1.0}, MES_DE, MES_DE - 1)["series"] == []
+
+
+def test_month_index_e_label():
+    assert analytics.month_label(analytics.month_index(date(2024, 12, 31))) == "2024-12"
+    assert analytics.month_index(date(2025, 1, 1)) - analytics.month_index(date(2024, 12, 1)) == 1
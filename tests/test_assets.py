@@ -0,0 +1,91 @@
+"""Minificação e build dos assets estáticos (src/assets.py)."""
+
+import gzip
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from src import assets
+from src.assets import MANIFEST_NAME, build_assets, load_manifest, minify_css, minify_js
+
+
+def test_minify_js_remove_comentarios_e_indentacao():
+    src = "// topo\nfunction f(a) {\n    /* bloco */\n    return a + 1; // fim\n}\n\n\nf(2);\n"
+    assert minify_js(src) == "function f(a) {\nreturn a + 1;\n}\nf(2);\n"
+
+
+@pytest.mark.parametrize("trecho", [
+    "const s = '// não é comentário';",
+    'const s = "a /* b */ c";',
+    "const t = `linha 1\n    // dentro do template\n${a + `${b}`} fim`;",
+    "const r = /\\/\\*[^/]*\\//g;",
+    "if (x) return /a b/.test(y);",
+    "const q = s.replace(/[/]/g, '');",
+])
+def test_minify_js_preserva_strings_templates_e_regex(trecho):
+    assert trecho in minify_js("  " + trecho + "  // comentário\n")
+
+
+def test_minify_js_divisao_nao_vira_regex():
+    assert minify_js("const m = a / b / c; // x\n") == "const m = a / b / c;\n"
+
+
+def test_minify_css():
+    src = '/* tema */\n.a  >  .b {\n  color: red;\n  content: "x  /* y */";\n}\n\n@media (max-width: 600px) { .c { margin: 0 } }\n'
+    assert minify_css(src) == '.a > .b{color:red;content:"x  /* y */"}@media (max-width:600px){.c{margin:0}}\n'
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node não instalado")
+def test_script_js_do_app_continua_valido(tmp_path):
+    out = tmp_path / "script.min.js"
+    out.write_text(minify_js((assets.STATIC_DIR / "script.js").read_text(encoding="utf-8-sig")), encoding="utf-8")
+    result = subprocess.run(["node", "--check", str(out)], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def _static(tmp_path, js="var a = 1; // x\n"):
+    static = tmp_path / "static"
+    static.mkdir(exist_ok=True)
+    (static / "script.js").write_text(js, encoding="utf-8")
+    (static / "styles.css").write_text("body { margin: 0 }\n", encoding="utf-8")
+    return static, static / "dist"
+
+
+def test_build_gera_hash_gzip_e_manifest(tmp_path):
+    static, dist = _static(tmp_path)
+    manifest = build_assets(static, dist)
+    assert set(manifest) == {"script.js", "styles.css"}
+    hashed = manifest["script.js"]
+    assert hashed.startswith("script.") and hashed.endswith(".js")
+    assert (dist / hashed).read_bytes() == b"var a = 1;\n"
+    assert gzip.decompress((dist / (hashed + ".gz")).read_bytes()) == b"var a = 1;\n"
+    assert load_manifest(dist) == manifest
+    assert not [p for p in dist.iterdir() if p.name.endswith(".tmp")]
+    assert build_assets(static, dist) == manifest  # idempotente
+
+
+def test_build_mantem_o_anterior_e_apaga_depois_da_carencia(tmp_path):
+    static, dist = _static(tmp_path)
+    v1 = build_assets(static, dist)["script.js"]
+    (dist / "script.0000000000.js").write_bytes(b"muito antigo")
+    os.utime(dist / "script.0000000000.js", (0, 0))
+    _static(tmp_path, js="var a = 2;\n")
+    v2 = build_assets(static, dist)["script.js"]
+    assert v2 != v1
+    assert (dist / v1).exists()  # manifest anterior: worker antigo ainda pode pedir
+    assert not (dist / "script.0000000000.js").exists()
+    _static(tmp_path, js="var a = 3;\n")
+    build_assets(static, dist, prune_grace_sec=0)
+    assert (dist / v2).exists() and (dist / (v2 + ".gz")).exists()
+    assert not (dist / v1).exists() and not (dist / (v1 + ".gz")).exists()
+
+
+def test_manifest_ausente_ou_corrompido(tmp_path):
+    assert load_manifest(tmp_path) == {}
+    (tmp_path / MANIFEST_NAME).write_text("{quebrado", encoding="utf-8")
+    assert load_manifest(tmp_path) == {}
+    (tmp_path / MANIFEST_NAME).write_text(json.dumps({"a.js": "a.1.js"}), encoding="utf-8")
+    assert load_manifest(tmp_path) == {"a.js": "a.1.js"}
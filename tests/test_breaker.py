@@ -0,0 +1,95 @@
+"""Transições de estado do CircuitBreaker (src/breaker.py), com relógio simulado."""
+
+import pytest
+
+from src import breaker
+from src.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+CLOCK_MODULE = breaker
+
+
+def _breaker(**kwargs):
+    opts = {"failure_rate": 0.5, "min_calls": 4, "window_sec": 30, "open_sec": 10, "max_open_sec": 40}
+    opts.update(kwargs)
+    return CircuitBreaker("db", **opts)
+
+
+def test_fica_fechado_abaixo_de_min_calls(clock):
+    cb = _breaker()
+    for _ in range(3):
+        cb.record_failure(RuntimeError("x"))
+    assert cb.state == CLOSED
+    cb.before_call()
+
+
+def test_abre_com_taxa_de_falha_e_recusa_chamadas(clock):
+    cb = _breaker()
+    cb.record_success()
+    cb.record_success()
+    cb.record_failure(RuntimeError("x"))
+    assert cb.state == CLOSED
+    cb.record_failure(RuntimeError("x"))  # 2 de 4 = 50%
+    assert cb.state == OPEN
+
+    clock.advance(3)
+    with pytest.raises(CircuitOpenError) as info:
+        cb.before_call()
+    assert info.value.retry_after == 7
+    assert cb.snapshot()["rejected"] == 1
+
+
+def test_falhas_fora_da_janela_nao_contam(clock):
+    cb = _breaker()
+    cb.record_failure(RuntimeError("x"))
+    cb.record_failure(RuntimeError("x"))
+    clock.advance(31)
+    cb.record_failure(RuntimeError("x"))
+    cb.record_success()
+    assert cb.state == CLOSED
+    assert cb.snapshot()["window_calls"] == 2
+
+
+def test_half_open_libera_uma_prova_e_fecha_com_sucesso(clock):
+    cb = _breaker(min_calls=1)
+    cb.record_failure(RuntimeError("x"))
+    clock.advance(10)
+    assert cb.state == HALF_OPEN
+
+    cb.before_call()  # a prova
+    with pytest.raises(CircuitOpenError):
+        cb.before_call()  # só half_open_max=1 ao mesmo tempo
+    cb.record_success()
+    assert cb.state == CLOSED
+    cb.before_call()
+
+
+def test_falha_na_prova_reabre_com_tempo_dobrado_ate_o_maximo(clock):
+    cb = _breaker(min_calls=1)
+    cb.record_failure(RuntimeError("x"))
+    for esperado in (20, 40, 40):
+        clock.advance(cb._open_for)
+        cb.before_call()
+        cb.record_failure(RuntimeError("x"))
+        assert cb.state == OPEN
+        assert cb.snapshot()["retry_after"] == esperado
+
+    clock.advance(40)
+    cb.before_call()
+    cb.record_success()
+    assert cb._open_for == 10  # sucesso volta ao open_sec inicial
+
+
+def test_snapshot_so_expoe_o_erro_quando_pedido(clock):
+    cb = _breaker(min_calls=1)
+    cb.record_failure(RuntimeError("Login failed for user 'sa'"))
+    assert "last_error" not in cb.snapshot()
+    assert cb.snapshot(include_error=True)["last_error"] == "RuntimeError: Login failed for user 'sa'"
+
+
+def test_reset_fecha(clock):
+    cb = _breaker(min_calls=1)
+    cb.record_failure()
+    assert cb.state == OPEN
+    cb.reset()
+    assert cb.state == CLOSED
+    cb.before_call()
@@ -0,0 +1,66 @@
+"""ResultCache (src/cache.py): TTL, LRU por bytes e invalidação por geração."""
+
+from src import cache
+from src.cache import ResultCache
+
+CLOCK_MODULE = cache
+
+
+def test_put_get_e_estatisticas(clock):
+    c = ResultCache(max_bytes=100, ttl_sec=60)
+    key = (1, "2024-05-01")
+    assert c.get(key) is None
+    assert c.put(key, b"[1,2]", c.generation(key))
+    assert c.get(key) == b"[1,2]"
+    stats = c.stats()
+    assert (stats["hits"], stats["misses"], stats["entradas"], stats["bytes"]) == (1, 1, 1, 5)
+
+
+def test_expira_pelo_ttl(clock):
+    c = ResultCache(max_bytes=100, ttl_sec=20)
+    c.put("k", b"x", 0)
+    clock.advance(19.9)
+    assert c.get("k") == b"x"
+    clock.advance(0.2)
+    assert c.get("k") is None
+    assert c.stats()["bytes"] == 0
+
+
+def test_invalidate_remove_e_muda_a_geracao(clock):
+    c = ResultCache(max_bytes=100)
+    gen = c.generation("k")
+    c.put("k", b"antigo", gen)
+    c.invalidate(["k"])
+    assert c.get("k") is None
+    assert c.generation("k") == gen + 1
+    assert c.invalidated_within("k", 5)
+    clock.advance(6)
+    assert not c.invalidated_within("k", 5)
+
+
+def test_leitura_iniciada_antes_da_escrita_nao_grava(clock):
+    c = ResultCache(max_bytes=100)
+    gen = c.generation("k")  # leitor começa a consulta
+    c.invalidate(["k"])      # escrita termina no meio
+    assert not c.put("k", b"desatualizado", gen)
+    assert c.get("k") is None
+    assert c.put("k", b"novo", c.generation("k"))
+
+
+def test_remove_o_menos_usado_quando_enche(clock):
+    c = ResultCache(max_bytes=10, max_entry_bytes=10)
+    c.put("a", b"aaaa", 0)
+    c.put("b", b"bbbb", 0)
+    c.get("a")  # "b" passa a ser o menos usado
+    c.put("c", b"cccc", 0)
+    assert c.get("b") is None
+    assert c.get("a") == b"aaaa" and c.get("c") == b"cccc"
+    assert c.stats()["evictions"] == 1
+
+
+def test_recusa_entrada_grande_e_cache_desativado():
+    c = ResultCache(max_bytes=100)  # max_entry_bytes = 25
+    assert not c.put("k", b"x" * 26, 0)
+    off = ResultCache(max_bytes=0)
+    assert not off.enabled
+    assert not off.put("k", b"x", 0)
@@ -0,0 +1,91 @@
+"""EventBus/Subscription (src/events.py): entrega, reconexão e fila cheia."""
+
+import pytest
+
+from src.events import RESET, BusFull, Event, EventBus
+
+
+def _todos(ev):
+    return True
+
+
+def _drain(sub) -> list:
+    out = []
+    while (ev := sub.get(timeout=0)) is not None:
+        out.append(ev)
+    return out
+
+
+def test_publica_para_quem_casa_com_o_filtro():
+    bus = EventBus()
+    setor1 = bus.subscribe(lambda ev: ev.setor_id is None or ev.setor_id == 1)
+    todos = bus.subscribe(_todos)
+    bus.publish("pending", {"items": [1]}, setor_id=1)
+    bus.publish("pending", {"items": [2]}, setor_id=2)
+    assert [ev.data["items"] for ev in _drain(setor1)] == [[1]]
+    assert [ev.data["items"] for ev in _drain(todos)] == [[1], [2]]
+    assert bus.stats() == {"assinantes": 2, "publicados": 2, "historico": 2}
+
+
+def test_reconexao_recebe_o_que_perdeu():
+    bus = EventBus()
+    primeiro = bus.publish("pending", {"n": 1})
+    bus.publish("pending", {"n": 2})
+    bus.publish("removed", {"n": 3})
+    sub = bus.subscribe(_todos, last_event_id=primeiro.id)
+    assert [ev.data["n"] for ev in _drain(sub)] == [2, 3]
+
+
+@pytest.mark.parametrize("last_id", ["outra-1", "lixo", "{epoch}-99", "{epoch}-x"])
+def test_reconexao_desconhecida_recebe_reset(last_id):
+    bus = EventBus()
+    bus.publish("pending", {})
+    sub = bus.subscribe(_todos, last_event_id=last_id.format(epoch=bus.epoch))
+    assert [ev.event for ev in _drain(sub)] == [RESET]
+
+
+def test_id_fora_do_historico_recebe_reset():
+    bus = EventBus(history=2)
+    primeiro = bus.publish("pending", {})
+    for _ in range(3):
+        bus.publish("pending", {})
+    sub = bus.subscribe(_todos, last_event_id=primeiro.id)
+    assert [ev.event for ev in _drain(sub)] == [RESET]
+
+
+def test_fila_cheia_vira_um_reset():
+    bus = EventBus(queue_size=2)
+    sub = bus.subscribe(_todos)
+    for n in range(3):
+        bus.publish("pending", {"n": n}, setor_id=5)
+    eventos = _drain(sub)
+    assert [(ev.event, ev.setor_id) for ev in eventos] == [(RESET, 5)]
+
+
+def test_limite_de_assinantes_e_close():
+    bus = EventBus(max_subscribers=1)
+    sub = bus.subscribe(_todos)
+    with pytest.raises(BusFull):
+        bus.subscribe(_todos)
+    sub.close()
+    sub.close()
+    assert not bus.has_subscribers
+    bus.subscribe(_todos)
+
+
+def test_publish_lazy_sem_assinantes_nao_consulta():
+    bus = EventBus()
+    chamadas = []
+    assert bus.publish_lazy("pending", lambda: chamadas.append(1) or {}) is None
+    assert chamadas == []
+    ultimo = bus.publish("pending", {})
+    sub = bus.subscribe(_todos, last_event_id=f"{bus.epoch}-0")
+    assert [ev.event for ev in _drain(sub)] == [RESET, "pending"]
+    assert bus.publish_lazy("pending", lambda: None) is None
+    ev = bus.publish_lazy("pending", lambda: {"items": []})
+    assert ev.id != ultimo.id and _drain(sub) == [ev]
+
+
+def test_to_sse():
+    ev = Event("ab-1", "pending", {"nome": "Manutenção"})
+    assert ev.to_sse() == 'id: ab-1\nevent: pending\ndata: {"nome":"Manutenção"}\n\n'
@@ -0,0 +1,134 @@
+"""IdempotencyStore (src/idempotency.py) com uma conexão falsa roteirizada."""
+
+import pytest
+
+from src import idempotency
+from src.idempotency import IdempotencyStore, KeyBusy, KeyMismatch, Replay, fingerprint
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = -1
+        self._row = None
+
+    def execute(self, sql, params=()):
+        if self.db.fail:
+            raise RuntimeError("banco fora")
+        self.db.sql.append(sql.split()[0])
+        self.rowcount, self._row = self.db.answers.pop(0) if self.db.answers else (0, None)
+        return self
+
+    def fetchone(self):
+        return self._row
+
+
+class FakeDb:
+    """answers: (rowcount, linha do fetchone) por execute, na ordem."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.sql: list[str] = []
+        self.commits = 0
+        self.fail = False
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture(autouse=True)
+def sem_espera(monkeypatch):
+    monkeypatch.setattr(idempotency, "sleep", lambda s: None)
+
+
+def _store(db, **kw):
+    store = IdempotencyStore(db.connect, **kw)
+    store._last_purge = float("inf")  # sem purge no begin()
+    return store
+
+
+def test_fingerprint_depende_de_metodo_rota_e_corpo():
+    base = fingerprint("post", "/api/drafts", b'{"a":1}')
+    assert base == fingerprint("POST", "/api/drafts", b'{"a":1}')
+    assert base != fingerprint("PUT", "/api/drafts", b'{"a":1}')
+    assert base != fingerprint("POST", "/api/valores", b'{"a":1}')
+    assert base != fingerprint("POST", "/api/drafts", b'{"a":2}')
+    assert fingerprint("POST", "/x", None) == fingerprint("POST", "/x", b"")
+
+
+def test_primeira_requisicao_executa():
+    db = FakeDb((0, None), (1, None))  # DELETE expirada, INSERT ganhou
+    assert _store(db).begin(1, "k", "api_drafts", "h") is None
+    assert db.sql == ["DELETE", "INSERT"]
+
+
+def test_repeticao_concluida_devolve_a_mesma_resposta():
+    db = FakeDb((0, None), (0, None), (1, ("h", "DONE", 201, '{"ok":true}', 0)))
+    assert _store(db).begin(1, "k", "api_drafts", "h") == Replay(201, '{"ok":true}')
+
+
+def test_conteudo_diferente():
+    db = FakeDb((0, None), (0, None), (1, ("outro", "DONE", 200, "", 0)))
+    with pytest.raises(KeyMismatch):
+        _store(db).begin(1, "k", "api_drafts", "h")
+
+
+def test_em_execucao_espera_e_desiste():
+    processing = (1, ("h", "PROCESSING", None, None, 0))
+    db = FakeDb(*[(0, None), (0, None), processing] * 3)
+    with pytest.raises(KeyBusy):
+        _store(db, wait_sec=0).begin(1, "k", "api_drafts", "h")
+    assert db.sql.count("INSERT") == 1
+
+
+def test_chave_abandonada_e_assumida():
+    db = FakeDb((0, None), (0, None), (1, ("h", "PROCESSING", None, None, 1)), (1, None))
+    assert _store(db).begin(1, "k", "api_drafts", "h") is None
+    assert db.sql[-1] == "UPDATE"
+
+
+def test_finish_5xx_libera_a_chave():
+    db = FakeDb()
+    _store(db).finish(1, "k", 503, "{}")
+    assert db.sql == ["DELETE"]
+
+
+def test_finish_com_banco_fora_fica_pendente(monkeypatch):
+    db = FakeDb()
+    db.fail = True
+    store = _store(db)
+    monkeypatch.setattr(store, "_ensure_keeper", lambda: None)
+    store.finish(1, "k", 200, "{}", attempts=2)
+    assert store.stats() == {"em_execucao": 0, "resultados_pendentes": 1}
+
+
+def test_running_conta_execucoes_aninhadas(monkeypatch):
+    store = _store(FakeDb())
+    monkeypatch.setattr(store, "_ensure_keeper", lambda: None)
+    with store.running(1, "k"):
+        with store.running(1, "k"):
+            assert store.stats()["em_execucao"] == 1
+            assert store._running[(1, "k")] == 2
+        assert store._running[(1, "k")] == 1
+    assert store.stats()["em_execucao"] == 0
+
+
+def test_heartbeat_e_purge():
+    db = FakeDb((1, None), (0, None))
+    assert _store(db).heartbeat([(1, "a"), (2, "b")]) == 1
+    db = FakeDb((2, None))
+    assert _store(db).purge(batch_size=5) == 2
+    db = FakeDb((5, None), (1, None))
+    assert _store(db).purge(batch_size=5) == 6
@@ -0,0 +1,114 @@
+"""Leitura de planilhas de importação (src/importer.py)."""
+
+import io
+from datetime import date, datetime
+
+import pytest
+
+from src import importer
+from src.importer import (
+    ImportErrorReport, ImportFormatError, chunked, format_valor, iter_import_rows, map_columns,
+    parse_periodo, resolve_report,
+)
+
+
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _csv(text: str, encoding: str = "utf-8") -> io.BytesIO:
+    return io.BytesIO(text.encode(encoding))
+
+
+def test_csv_ponto_e_virgula_com_bom_e_aliases():
+    data = b"\xef\xbb\xbf" + "Setor;Código Indicador;Competência;Valor\nRH;IND1;2024-01;12,5\n".encode()
+    assert list(iter_import_rows(io.BytesIO(data), "hist.csv")) == [
+        (2, {"setor": "RH", "indicador": "IND1", "periodo": "2024-01", "valor": "12,5"}),
+    ]
+
+
+@pytest.mark.parametrize("sep", [",", "\t"])
+def test_csv_detecta_separador(sep):
+    text = sep.join(["setor", "indicador_id", "periodo", "valor"]) + "\n" + sep.join(["1", "7", "01/2024", "3"]) + "\n"
+    rows = list(iter_import_rows(_csv(text), "hist.csv"))
+    assert rows == [(2, {"setor": "1", "indicador_id": "7", "periodo": "01/2024", "valor": "3"})]
+
+
+def test_csv_pula_linhas_em_branco_e_numera_linhas_fisicas():
+    text = "setor;indicador;periodo;valor\nRH;A;2024-01;1\n;;;\n\nRH;B;2024-02\n"
+    rows = list(iter_import_rows(_csv(text)))
+    assert [n for n, _ in rows] == [2, 5]
+    assert rows[1][1]["valor"] is None  # coluna faltando na linha
+
+
+def test_csv_cp1252():
+    text = "setor;indicador;periodo;valor\nManutenção;A;2024-01;1\n"
+    rows = list(iter_import_rows(_csv(text, "cp1252")))
+    assert rows[0][1]["setor"] == "Manutenção"
+
+
+def test_csv_vazio_ou_sem_colunas_obrigatorias():
+    with pytest.raises(ImportFormatError, match="vazio"):
+        list(iter_import_rows(io.BytesIO(b"")))
+    with pytest.raises(ImportFormatError, match="periodo, valor"):
+        list(iter_import_rows(_csv("setor;indicador\nRH;A\n")))
+    with pytest.raises(ImportFormatError, match="indicador"):
+        map_columns(["setor", "periodo", "valor"])
+
+
+def test_xlsx_sem_openpyxl(monkeypatch):
+    monkeypatch.setattr(importer, "openpyxl", None)
+    with pytest.raises(ImportFormatError, match="openpyxl"):
+        list(iter_import_rows(io.BytesIO(b"PK"), "hist.xlsx"))
+    with pytest.raises(ImportFormatError, match="openpyxl"):
+        list(iter_import_rows(io.BytesIO(b"PK"), "upload", XLSX_TYPE + "; charset=binary"))
+
+
+def test_xlsx():
+    openpyxl = pytest.importorskip("openpyxl")
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Setor", "Indicador", "Período", "Valor"])
+    ws.append(["RH", "IND1", datetime(2024, 3, 15), 12.0])
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    rows = list(iter_import_rows(buf, "hist.xlsx"))
+    assert rows == [(2, {"setor": "RH", "indicador": "IND1", "periodo": datetime(2024, 3, 15), "valor": 12})]
+
+
+@pytest.mark.parametrize("valor", [
+    "2024-03", "2024-03-15", "15/03/2024", "03/2024", "2024/03", " 2024-03-15 00:00:00 ",
+    date(2024, 3, 15), datetime(2024, 3, 15, 8, 30),
+])
+def test_parse_periodo_sempre_dia_1(valor):
+    assert parse_periodo(valor) == date(2024, 3, 1)
+
+
+@pytest.mark.parametrize("valor", [None, "", "2024-13", "março/2024", "32/01/2024"])
+def test_parse_periodo_invalido(valor):
+    with pytest.raises(ValueError, match="periodo inválido"):
+        parse_periodo(valor)
+
+
+def test_format_valor_e_chunked():
+    assert format_valor(12.0) == "12"
+    assert format_valor(12.5) == "12.5"
+    assert format_valor("  ") is None
+    assert format_valor(None) is None
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_relatorio_de_erros(tmp_path):
+    report = ImportErrorReport(tmp_path, owner_id=7, sample_size=1)
+    assert not report.has_file
+    report.add(2, "setor não encontrado", {"setor": "X", "indicador_id": 9, "periodo": "2024-01", "valor": None})
+    report.add(3, "periodo inválido", {"setor": "Y"})
+    report.close()
+    assert report.count == 2 and len(report.sample) == 1
+    assert report.sample[0]["indicador"] == "9"
+    owner, path = resolve_report(tmp_path, report.report_id)
+    assert owner == 7
+    lines = path.read_text(encoding="utf-8-sig").splitlines()
+    assert lines[0] == "linha;erro;setor;indicador;periodo;valor"
+    assert len(lines) == 3
+    assert resolve_report(tmp_path, "../7_" + "0" * 32) is None
@@ -0,0 +1,89 @@
+"""Formatters e ContextHandler do pipeline de logs (src/logs.py)."""
+
+import json
+import logging
+import queue
+import sys
+
+from src.logs import ContextHandler, JsonFormatter, LogPipeline, TextFormatter
+
+
+def _record(msg="valor %s", args=(1,), level=logging.INFO, **extra):
+    record = logging.LogRecord("indicadores", level, __file__, 10, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_json_formatter_inclui_contexto_e_extra():
+    out = json.loads(JsonFormatter().format(_record(request_id="abc", ms=1.5)))
+    assert out["level"] == "INFO" and out["logger"] == "indicadores"
+    assert out["msg"] == "valor 1"
+    assert (out["request_id"], out["ms"]) == ("abc", 1.5)
+    assert out["ts"].endswith("+00:00")
+    assert "exc" not in out
+
+
+def test_json_formatter_com_excecao():
+    try:
+        raise ValueError("quebrou")
+    except ValueError:
+        record = logging.LogRecord("x", logging.ERROR, __file__, 1, "falha", (), sys.exc_info())
+    out = json.loads(JsonFormatter().format(record))
+    assert "ValueError: quebrou" in out["exc"]
+
+
+def test_text_formatter_contexto_no_fim():
+    text = TextFormatter().format(_record(request_id="abc", user_id=None))
+    assert text.endswith("INFO indicadores: valor 1 request_id=abc")
+
+
+def test_context_handler_prepara_e_descarta_com_fila_cheia():
+    q = queue.Queue(maxsize=1)
+    handler = ContextHandler(q, context=lambda: {"request_id": "r1", "rota": None, "msg_id": 9})
+    args = [1]
+    handler.handle(_record("lista %s", (args,), msg_id=3))
+    args.append(2)  # mudou depois do log: a mensagem já foi formatada
+    handler.handle(_record())
+    record = q.get_nowait()
+    assert record.getMessage() == "lista [1]"
+    assert record.request_id == "r1"
+    assert record.msg_id == 3  # extra= do chamador vence o contexto
+    assert not hasattr(record, "rota")
+    assert handler.dropped == 1
+
+
+def test_context_handler_erro_no_contexto_nao_derruba():
+    q = queue.Queue()
+
+    def contexto():
+        raise RuntimeError("fora de requisição")
+
+    ContextHandler(q, context=contexto).handle(_record())
+    assert q.get_nowait().getMessage() == "valor 1"
+
+
+def test_amostragem_de_debug():
+    q = queue.Queue()
+    handler = ContextHandler(q, debug_sample=0.0)
+    handler.handle(_record(level=logging.DEBUG))
+    handler.handle(_record(level=logging.WARNING))
+    assert q.qsize() == 1 and q.get_nowait().levelno == logging.WARNING
+
+
+def test_pipeline_grava_no_arquivo(tmp_path):
+    logger = logging.getLogger("tests.logs.pipeline")
+    path = tmp_path / "app.log"
+    pipeline = LogPipeline(logger, level="INFO", fmt="json", file=str(path), context=lambda: {"request_id": "r9"})
+    pipeline.start()
+    try:
+        logger.info("gravado %d", 5)
+        logger.debug("abaixo do nível")
+    finally:
+        pipeline.stop()
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [(l["msg"], l["request_id"]) for l in lines] == [("gravado 5", "r9")]
+    assert pipeline.stats() == {"fila": 0, "descartados": 0}
+    for h in pipeline.listener.handlers:
+        h.close()
+    logger.removeHandler(pipeline.handler)
@@ -0,0 +1,76 @@
+"""Diagnóstico de memória (src/memdiag.py): approx_size, TracemallocSession e rss_bytes."""
+
+import sys
+import tracemalloc
+
+import pytest
+
+from src.memdiag import TracemallocSession, approx_size, rss_bytes
+
+
+class Slotted:
+    __slots__ = ("a", "b")
+
+    def __init__(self, a):
+        self.a = a  # b fica sem valor
+
+
+def test_objeto_compartilhado_conta_uma_vez():
+    big = "x" * 10_000
+    once = approx_size([big])
+    assert approx_size([big, big, big]) - once == 2 * 8  # só os ponteiros a mais na lista
+    assert once >= sys.getsizeof(big)
+
+
+def test_percorre_slots_e_dict():
+    payload = "y" * 5_000
+    assert approx_size(Slotted(payload)) >= sys.getsizeof(payload)
+    obj = type("Plain", (), {})()
+    obj.payload = payload
+    assert approx_size(obj) >= sys.getsizeof(payload)
+
+
+def test_max_items_extrapola_pela_media():
+    items = [f"{i:04d}" + "z" * 1_000 for i in range(200)]
+    full = approx_size(items)
+    assert full == sys.getsizeof(items) + sum(sys.getsizeof(s) for s in items)
+
+    partial = sys.getsizeof(items) + sum(sys.getsizeof(s) for s in items[-50:])
+    estimate = approx_size(items, max_items=51)  # a lista + 50 strings; sobram 150 na pilha
+    assert estimate == int(partial * (1 + 150 / 51))
+    assert partial < estimate and 0.8 * full < estimate < 1.2 * full
+
+
+@pytest.fixture
+def session():
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc já ligado fora do teste")
+    s = TracemallocSession()
+    yield s
+    s.stop()
+
+
+def test_tracemalloc_snapshot_e_diff(session):
+    with pytest.raises(RuntimeError):
+        session.snapshot()
+    assert session.start(frames=2)["frames"] == 2
+
+    first = session.snapshot(top=5)
+    assert "diff" not in first and len(first["top"]) <= 5
+    assert first["status"]["ultimo_snapshot"] == first["em"]
+
+    keep = [bytearray(1024) for _ in range(500)]  # vivo até o 2º snapshot
+    second = session.snapshot(top=5)
+    assert second["desde"] == first["em"]
+    assert second["diff"] and any(d["bytes_diff"] >= 500 * 1024 for d in second["diff"])
+    assert len(keep) == 500
+
+    status = session.stop()
+    assert status["ativo"] is False and status["ultimo_snapshot"] is None
+    assert not tracemalloc.is_tracing()
+
+
+def test_rss_no_linux():
+    if not sys.platform.startswith("linux"):
+        pytest.skip("mede por /proc ou psutil")
+    assert isinstance(rss_bytes(), int) and rss_bytes() > 0
@@ -0,0 +1,62 @@
+"""Modelos de linha com __slots__ (src/models.py)."""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from src.models import Draft, Indicador, Setor, Usuario, Valor, json_value
+
+
+def test_json_value():
+    assert json_value(date(2024, 1, 31)) == "2024-01-31"
+    assert json_value(datetime(2024, 1, 31, 8, 5)) == "2024-01-31T08:05:00"
+    assert json_value(b"\x00\x00\x00\x00\x00\x00\x07\xd1") == "00000000000007d1"
+    assert json_value(Decimal("12.5000")) == 12.5
+    assert json_value("x") == "x" and json_value(None) is None
+
+
+def test_sem_dict_por_instancia():
+    for model in (Usuario, Setor, Indicador, Valor, Draft):
+        assert not hasattr(model.from_row((1,) * len(model.COLUMNS)), "__dict__")
+
+
+def test_select_list_na_ordem_das_colunas():
+    assert Setor.select_list() == "ZSE_ID, ZSE_NOME, ZSE_ATIVO"
+    assert Setor.select_list("s") == "s.ZSE_ID, s.ZSE_NOME, s.ZSE_ATIVO"
+
+
+def test_usuario_from_row_e_sessao():
+    user = Usuario.from_row(("7", "Ana", "ana@x", 3, None, "hash", 1))
+    assert (user.id, user.nivel, user.ativo) == (7, 1, True)
+    sessao = user.for_session(scope="escopo")
+    assert sessao.senha_hash is None and sessao.scope == "escopo"
+    assert sessao.to_json() == {"id": 7, "nome": "Ana", "email": "ana@x", "setor_id": 3, "nivel": 1}
+    assert "hash" not in repr(user)
+
+
+def test_acesso_estilo_dict():
+    setor = Setor(1, "RH", True)
+    assert setor["nome"] == "RH" and setor.get("ativo") is True
+    assert setor.get("inexistente", 0) == 0
+    assert "nome" in setor and "ZSE_NOME" not in setor
+    with pytest.raises(KeyError):
+        setor["inexistente"]
+
+
+def test_to_json_com_nomes_de_coluna_e_extras():
+    valor = Valor(1, 2, 3, None, date(2024, 1, 1), "1.234", Decimal("1234.0000"), None,
+                  datetime(2024, 1, 2), None, b"\x00\x01")
+    assert valor.to_json() == {
+        "ZIV_ID": 1, "ZIV_INDICADOR_ID": 2, "ZIV_SETOR_ID": 3, "ZIV_FUNCIONARIO_ID": None,
+        "ZIV_PERIODO": "2024-01-01", "ZIV_VALOR": "1.234", "ZIV_VALOR_NUM": 1234.0, "ZIV_VALOR_DATA": None,
+        "ZIV_CRIADO_EM": "2024-01-02T00:00:00", "ZIV_ATUALIZADO_EM": None, "ZIV_VERSAO": "0001",
+    }
+    ind = Indicador.from_row((1, 2, "C", "Nome", None, "%", "90", True, None))
+    assert "read_only" not in ind.to_json()
+    ind.read_only = True
+    assert ind.to_json()["read_only"] is True
+    draft = Draft.from_row((1,) * len(Draft.COLUMNS))
+    assert "ZDR_ARQUIVADO" not in draft.to_json()
+    draft.arquivado = 1
+    assert draft.to_json()["ZDR_ARQUIVADO"] == 1
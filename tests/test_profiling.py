@@ -0,0 +1,156 @@
+"""SqlRecorder e relatórios de perfil (src/profiling.py), sobre um cursor pyodbc falso."""
+
+import cProfile
+import json
+import os
+
+import pytest
+
+from src import profiling
+from src.profiling import SqlRecorder, build_report, cleanup_profiles, resolve_profile, save_report
+
+CLOCK_MODULE = profiling
+CLOCK_NAME = "perf_counter"
+
+
+class FakeCursor:
+    """Cada execute/fetch "demora" `cost` segundos no relógio falso."""
+
+    def __init__(self, clock, rows=(), cost=0.002):
+        self.clock = clock
+        self.rows = list(rows)
+        self.cost = cost
+        self.fast_executemany = False
+        self.rowcount = -1
+        self.calls = []
+
+    def execute(self, sql, *params):
+        self.clock.advance(self.cost)
+        self.calls.append((sql, params))
+        if "ERRO" in sql:
+            raise RuntimeError("falhou")
+        self.rowcount = len(self.rows)
+        return self
+
+    def executemany(self, sql, seq):
+        self.clock.advance(self.cost)
+        self.calls.append((sql, seq))
+
+    def fetchone(self):
+        self.clock.advance(self.cost)
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        self.clock.advance(self.cost)
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size=2):
+        self.clock.advance(self.cost)
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.autocommit = False
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_registra_comando_parametros_linhas_e_tempo(clock):
+    raw = FakeCursor(clock, rows=[(1,), (2,), (3,)])
+    recorder = SqlRecorder()
+    cur = recorder.wrap(FakeConnection(raw)).cursor()
+    cur.execute("SELECT ? , ?", (1, 2))
+    assert cur.fetchall() == [(1,), (2,), (3,)]
+    cur.execute("SELECT ?", 7)
+    assert cur.fetchone() is None
+    item, item2 = recorder.statements
+    assert (item["sql"], item["params"], item["linhas"]) == ("SELECT ? , ?", 2, 3)
+    assert item["ms"] == pytest.approx(2.0) and item["fetch_ms"] == pytest.approx(2.0)
+    assert (item2["params"], item2["linhas"]) == (1, 0)
+    assert raw.calls == [("SELECT ? , ?", ((1, 2),)), ("SELECT ?", (7,))]
+
+
+def test_fetch_em_partes_acumula_tempo_e_linhas(clock):
+    recorder = SqlRecorder()
+    cur = recorder.wrap(FakeConnection(FakeCursor(clock, rows=[(i,) for i in range(5)]))).cursor()
+    cur.execute("SELECT x")
+    while cur.fetchmany(2):
+        pass
+    assert cur.fetchone() is None
+    item = recorder.statements[0]
+    assert item["linhas"] == 5
+    assert item["fetch_ms"] == pytest.approx(4 * 2.0 + 2.0)  # 3 fetchmany com linhas, 1 vazio, 1 fetchone
+    assert list(cur) == []
+
+
+def test_executemany_e_erro_tambem_sao_registrados(clock):
+    recorder = SqlRecorder()
+    cur = recorder.wrap(FakeConnection(FakeCursor(clock))).cursor()
+    cur.executemany("INSERT INTO T VALUES (?)", ((i,) for i in range(4)))
+    with pytest.raises(RuntimeError):
+        cur.execute("SELECT ERRO")
+    many, erro = recorder.statements
+    assert (many["params"], many["executemany"]) == (4, True)
+    assert erro["sql"] == "SELECT ERRO" and erro["ms"] == pytest.approx(2.0)
+
+
+def test_atributos_passam_para_cursor_e_conexao(clock):
+    raw = FakeCursor(clock, rows=[(1,)])
+    conn = FakeConnection(raw)
+    wrapped = SqlRecorder().wrap(conn)
+    cur = wrapped.cursor()
+    cur.fast_executemany = True
+    wrapped.autocommit = True
+    assert raw.fast_executemany is True and conn.autocommit is True
+    cur.execute("UPDATE T")
+    assert cur.rowcount == 1 and cur.fast_executemany is True
+    wrapped.commit()
+    assert conn.commits == 1
+
+
+def test_limite_de_comandos(clock):
+    recorder = SqlRecorder(max_statements=2)
+    cur = recorder.wrap(FakeConnection(FakeCursor(clock, rows=[(1,)] * 10))).cursor()
+    for i in range(5):
+        cur.execute(f"SELECT {i}")
+        cur.fetchone()
+    summary = recorder.summary()
+    assert (summary["total"], summary["omitidos"], len(summary["comandos"])) == (5, 3, 2)
+    # fetch de um comando omitido não soma no último registrado
+    assert recorder.statements[-1]["linhas"] == 1
+    assert summary["tempo_ms"] == pytest.approx(2 * (2.0 + 2.0))
+
+
+def test_sql_longo_e_truncado(clock):
+    recorder = SqlRecorder()
+    recorder.wrap(FakeConnection(FakeCursor(clock))).cursor().execute("SELECT " + "x" * 10000)
+    assert len(recorder.statements[0]["sql"]) == profiling.SQL_MAX_CHARS
+
+
+def test_relatorio_salvo_resolvido_e_limpo(tmp_path):
+    profiler = cProfile.Profile()
+    profiler.runcall(sorted, range(1000))
+    recorder = SqlRecorder()
+    report = build_report(profiler, recorder, {"rota": "api_x"}, top=5)
+    assert report["rota"] == "api_x" and report["sql"]["total"] == 0
+    assert report["python"]["top"] and len(report["python"]["top"]) <= 5
+
+    profile_id = save_report(tmp_path, 7, report, profiler)
+    owner, path = resolve_profile(tmp_path, profile_id)
+    assert owner == 7 and json.loads(path.read_text(encoding="utf-8"))["id"] == profile_id
+    assert resolve_profile(tmp_path, profile_id, "prof") is not None
+    assert resolve_profile(tmp_path, "../" + profile_id) is None
+
+    for p in tmp_path.iterdir():
+        os.utime(p, (0, 0))
+    cleanup_profiles(tmp_path, 3600)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,90 @@
+"""Cotas por chave (TokenBuckets) e limite de simultâneas (AdmissionGate) de src/throttle.py."""
+
+import threading
+import time
+
+import pytest
+
+from src import throttle
+from src.throttle import AdmissionGate, TokenBuckets
+
+CLOCK_MODULE = throttle
+
+
+def test_rajada_e_reposicao(clock):
+    b = TokenBuckets(rate_per_sec=0.1, burst=3)  # 6/min
+    assert [b.take("u1") for _ in range(3)] == [0, 0, 0]
+    assert b.take("u1") == pytest.approx(10)
+    assert b.limited == 1
+
+    clock.advance(10)
+    assert b.take("u1") == 0
+    assert b.take("u1") == pytest.approx(10)
+
+
+def test_chaves_independentes(clock):
+    b = TokenBuckets(rate_per_sec=1, burst=1)
+    assert b.take("u1") == 0
+    assert b.take("u2") == 0
+    assert b.take("u1") > 0
+
+
+def test_custo_proporcional_limitado_a_rajada(clock):
+    b = TokenBuckets(rate_per_sec=1, burst=20)
+    assert b.take("u", cost=15) == 0
+    assert b.take("u", cost=10) == pytest.approx(5)
+    clock.advance(100)
+    assert b.take("u", cost=500) == 0  # custo acima da rajada vale a rajada inteira
+    assert b.take("u") == pytest.approx(1)
+
+
+def test_taxa_zero_desativa():
+    b = TokenBuckets(rate_per_sec=0, burst=1)
+    assert not b.enabled
+    assert all(b.take("u") == 0 for _ in range(100))
+
+
+def test_lru_limita_chaves(clock):
+    b = TokenBuckets(rate_per_sec=1, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        b.take(key)
+    assert len(b) == 2
+    assert b.take("a") == 0  # descartada: volta com o balde cheio
+
+
+def test_admissao_sem_fila_recusa_acima_do_limite():
+    gate = AdmissionGate(max_inflight=2)
+    assert gate.acquire() and gate.acquire()
+    assert not gate.acquire()
+    gate.release()
+    assert gate.acquire()
+    snap = gate.snapshot()
+    assert (snap["inflight"], snap["admitted"], snap["rejected"]) == (2, 3, 1)
+
+
+def test_admissao_espera_na_fila_ate_liberar():
+    gate = AdmissionGate(max_inflight=1, max_waiting=1, timeout_sec=5)
+    assert gate.acquire()
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(gate.acquire()))
+    waiter.start()
+    while gate.snapshot()["waiting"] == 0:
+        time.sleep(0.001)
+    assert not gate.acquire()  # fila cheia
+    gate.release()
+    waiter.join(5)
+    assert result == [True]
+    assert gate.snapshot()["queued"] == 1
+
+
+def test_admissao_desiste_apos_timeout():
+    gate = AdmissionGate(max_inflight=1, max_waiting=1, timeout_sec=0.05)
+    assert gate.acquire()
+    assert not gate.acquire()
+    assert gate.snapshot()["rejected"] == 1
+
+
+def test_admissao_desativada():
+    gate = AdmissionGate(max_inflight=0)
+    assert all(gate.acquire() for _ in range(10))
+    gate.release()
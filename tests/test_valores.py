@@ -0,0 +1,69 @@
+"""parse_numero/parse_data/valor_tipado (src/valores.py)."""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from src.valores import parse_data, parse_numero, valor_tipado
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("1.234", "1234"),
+    ("1.234.567", "1234567"),
+    ("-1.234", "-1234"),
+    ("12.345%", "12345"),
+    ("1.5", "1.5"),
+    ("3.14159", "3.1416"),
+    ("0.123", "0.123"),
+    ("1.2345", "1.2345"),
+    ("1234.567", "1234.567"),
+    ("1.234,5", "1234.5"),
+    ("1,234.5", "1234.5"),
+    ("12,5%", "12.5"),
+    ("R$ 10", "10"),
+    ("R$ 1.234,56", "1234.56"),
+    (" 42 ", "42"),
+    ("+7", "7"),
+])
+def test_parse_numero_formatos(texto, esperado):
+    assert parse_numero(texto) == Decimal(esperado)
+
+
+@pytest.mark.parametrize("texto", ["", "abc", "1,2,3", "1.2.3", "1e5", "--1", "12 anos", "NaN", "Infinity"])
+def test_parse_numero_texto_invalido(texto):
+    assert parse_numero(texto) is None
+
+
+def test_parse_numero_tipos_nativos():
+    assert parse_numero(None) is None
+    assert parse_numero(True) is None
+    assert parse_numero(5) == Decimal("5")
+    assert parse_numero(2.5) == Decimal("2.5")
+    assert parse_numero(Decimal("1.23456")) == Decimal("1.2346")
+
+
+def test_parse_numero_limite_decimal_19_4():
+    assert parse_numero("999999999999999") == Decimal("999999999999999")
+    assert parse_numero("1000000000000000") is None
+    assert parse_numero(float("inf")) is None
+
+
+def test_parse_data():
+    assert parse_data("31/01/2024") == date(2024, 1, 31)
+    assert parse_data("2024-01-31") == date(2024, 1, 31)
+    assert parse_data("31-01-2024") == date(2024, 1, 31)
+    assert parse_data("2024-01-31 00:00:00") == date(2024, 1, 31)
+    assert parse_data("2024-01-31T10:00") == date(2024, 1, 31)
+    assert parse_data(datetime(2024, 1, 31, 10)) == date(2024, 1, 31)
+    assert parse_data("31/02/2024") is None
+    assert parse_data(None) is None
+
+
+def test_valor_tipado_por_unidade():
+    assert valor_tipado("1.234", "%") == (Decimal("1234"), None)
+    assert valor_tipado("1.234", None) == (Decimal("1234"), None)
+    assert valor_tipado("31/01/2024", " Data ") == (None, date(2024, 1, 31))
+    assert valor_tipado("123", "texto") == (None, None)
+    assert valor_tipado("abc", "dias") == (None, None)
+    assert valor_tipado(None, "%") == (None, None)